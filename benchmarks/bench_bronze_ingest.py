@@ -0,0 +1,46 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.bronze import fetch
+from tests.fake_coingecko import FakeCoinGecko
+
+def time_fetch(api_url: str, coin_ids: list, max_concurrency: int) -> float:
+    started = time.perf_counter()
+    snapshot = fetch.fetch_prices(
+        coin_ids,
+        api_url=api_url,
+        max_concurrency=max_concurrency,
+        # The rate limit is a policy, not a cost of the engine: effectively disabled here
+        rate_limiter=fetch.TokenBucket(requests_per_minute=1e9, capacity=1_000)
+    )
+    elapsed = time.perf_counter() - started
+    assert len(snapshot) == len(coin_ids)
+    return elapsed
+
+def run(coin_counts: list, concurrency_levels: list, latency: float) -> None:
+    with FakeCoinGecko(latency=latency) as server:
+        for coin_count in coin_counts:
+            coin_ids = [f"coin-{index:05d}" for index in range(coin_count)]
+            timings = " | ".join(
+                f"{level:>2} in flight: {time_fetch(server.url, coin_ids, level):7.3f}s"
+                for level in concurrency_levels
+            )
+            batches = len(fetch.split_batches(coin_ids))
+            print(f"📊 {coin_count:>6,} coins ({batches:>3} batches) | {timings}")
+
+# Entry point: python benchmarks/bench_bronze_ingest.py --coins 4 100 1000 5000 --latency 0.1
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bronze ingestion wall time vs coin count (local fake API)")
+    parser.add_argument("--coins", type=int, nargs="+", default=[4, 100, 1000, 5000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.1, help="Simulated API latency per request (seconds).")
+    args = parser.parse_args()
+
+    run(args.coins, args.concurrency, args.latency)
@@ -0,0 +1,73 @@
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT / "src"))
+
+# --- IMPORTS ---
+from downsample import CHART_POINTS, downsample_frame
+
+def coin_history(count: int) -> pd.DataFrame:
+    """
+    One coin at minute cadence: a random walk for the price and its 7-point SMA.
+    """
+    rng = np.random.default_rng(7)
+    prices = 50000 + rng.normal(0, 25, count).cumsum()
+    return pd.DataFrame({
+        "extraction_timestamp": pd.date_range("2025-01-01", periods=count, freq="min"),
+        "price_usd": prices,
+        "sma_7d": pd.Series(prices).rolling(7, min_periods=1).mean(),
+    })
+
+def build_figure(price_df: pd.DataFrame, sma_df: pd.DataFrame) -> go.Figure:
+    # Same traces as dashboard.py::main
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=price_df['extraction_timestamp'], y=price_df['price_usd'], mode='lines', name='Price'))
+    fig.add_trace(go.Scatter(x=sma_df['extraction_timestamp'], y=sma_df['sma_7d'], mode='lines', name='7-Day SMA'))
+    fig.update_layout(template="plotly_dark", height=500)
+    return fig
+
+def measure(df: pd.DataFrame, method: str) -> tuple:
+    """
+    Returns (points sent, downsampling seconds, figure build + JSON seconds, payload bytes).
+
+    The figure JSON is what Streamlit ships to the browser; its size drives the websocket
+    transfer and Plotly.js parsing/rendering on the client.
+    """
+    started = time.perf_counter()
+    if method == "full":
+        price_df, sma_df = df, df
+    else:
+        price_df = downsample_frame(df, "extraction_timestamp", "price_usd", CHART_POINTS, method)
+        sma_df = downsample_frame(df, "extraction_timestamp", "sma_7d", CHART_POINTS, method)
+    downsampled = time.perf_counter()
+
+    payload = build_figure(price_df, sma_df).to_json()
+    serialized = time.perf_counter()
+    return len(price_df) + len(sma_df), downsampled - started, serialized - downsampled, len(payload)
+
+def run(count: int) -> None:
+    df = coin_history(count)
+    for method in ("full", "minmax", "lttb"):
+        points, downsample_s, serialize_s, payload = measure(df, method)
+        print(
+            f"📊 {count:>9,} rows | {method:>6}: {points:>9,} points sent | downsample {downsample_s * 1000:7.1f} ms | "
+            f"figure JSON {serialize_s * 1000:8.1f} ms | payload {payload / 1024 ** 2:7.2f} MB"
+        )
+
+# Entry point: python benchmarks/bench_dashboard_downsampling.py --rows 10000 525600
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard chart payload and serialization time with/without downsampling")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 525_600])
+    args = parser.parse_args()
+
+    # Warm-up: the first figure pays Plotly's template/validator loading
+    build_figure(coin_history(10), coin_history(10)).to_json()
+    for count in args.rows:
+        run(count)
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.gold.backtest import backtest
+
+def price_history(coin_count: int, rows: int) -> pd.DataFrame:
+    """
+    'rows' minute snapshots in total, spread over 'coin_count' random-walk coins.
+    """
+    rng = np.random.default_rng(13)
+    rows_per_coin = rows // coin_count
+    timestamps = pd.date_range("2026-01-01", periods=rows_per_coin, freq="min").strftime("%Y%m%d_%H%M%S")
+    return pd.DataFrame({
+        "coin_id": np.repeat([f"coin-{index:03d}" for index in range(coin_count)], rows_per_coin),
+        "extraction_timestamp": np.tile(timestamps, coin_count),
+        "price_usd": 100 * np.exp(rng.normal(0, 0.001, coin_count * rows_per_coin).cumsum()),
+    })
+
+def run(coin_count: int, rows: int, windows: int, thresholds: int, workers: list) -> None:
+    history = price_history(coin_count, rows)
+    window_grid = list(range(2, 2 + windows))
+    threshold_grid = list(np.linspace(0, 0.01, thresholds))
+    print(
+        f"📊 {coin_count} coins, {len(history):,} rows, {windows} windows x {thresholds} thresholds = "
+        f"{windows * thresholds:,} parameter sets"
+    )
+
+    for worker_count in workers:
+        started = time.perf_counter()
+        results = backtest(history, window_grid, threshold_grid, workers=worker_count)
+        elapsed = time.perf_counter() - started
+        print(
+            f"   {worker_count or os.cpu_count():>2} worker(s): {elapsed:7.1f} s "
+            f"({elapsed / (windows * thresholds) * 1000:6.1f} ms per parameter set, {len(results):,} results)"
+        )
+
+# Entry point: python benchmarks/bench_gold_backtest.py --coins 100 --rows 1000000 --windows 100 --thresholds 10 --workers 1 0
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gold signal backtest: parameter sets x coins x rows")
+    parser.add_argument("--coins", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--windows", type=int, default=100)
+    parser.add_argument("--thresholds", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 0], help="Worker counts to compare (0 = one per CPU core).")
+    args = parser.parse_args()
+
+    run(args.coins, args.rows, args.windows, args.thresholds, args.workers)
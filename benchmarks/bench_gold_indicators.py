@@ -0,0 +1,75 @@
+import argparse
+import sys
+import time
+import duckdb
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.gold.indicators import DEFAULT_INDICATORS, compute_indicators, parse_indicators
+
+def silver_history(coin_count: int, rows_per_coin: int) -> pd.DataFrame:
+    """
+    Minute snapshots per coin: a random walk for the price (the window input of a full recompute).
+    """
+    rng = np.random.default_rng(11)
+    return pd.DataFrame({
+        "coin_id": np.repeat([f"coin-{index:04d}" for index in range(coin_count)], rows_per_coin),
+        "extraction_timestamp": np.tile(pd.date_range("2026-01-01", periods=rows_per_coin, freq="min"), coin_count),
+        "price_usd": 100 + rng.normal(0, 1, coin_count * rows_per_coin).cumsum(),
+        "is_seed": False,
+    })
+
+def best_of(repeats: int, function) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def sql_baseline(history: pd.DataFrame) -> None:
+    # The previous Gold query: SMA + volatility (7 rows) and the signal, as DuckDB window functions
+    duckdb.execute("""
+        SELECT *,
+            AVG(price_usd) OVER w as sma_7d,
+            STDDEV(price_usd) OVER w as volatility_7d
+        FROM history
+        WINDOW w AS (PARTITION BY coin_id ORDER BY extraction_timestamp ROWS BETWEEN 6 PRECEDING AND CURRENT ROW)
+    """).df()
+
+def run(coin_count: int, rows_per_coin: int, repeats: int) -> None:
+    history = silver_history(coin_count, rows_per_coin)
+    print(f"📊 {coin_count:,} coins x {rows_per_coin:,} rows = {len(history):,} rows")
+    print(f"   SQL baseline (sma_7d + volatility_7d): {best_of(repeats, lambda: sql_baseline(history)) * 1000:8.1f} ms")
+
+    # Indicators added one at a time: the marginal cost of each in the single pass
+    indicators = parse_indicators(DEFAULT_INDICATORS)
+    previous = best_of(repeats, lambda: compute_indicators(history, []))
+    print(f"   engine, base columns only:            {previous * 1000:8.1f} ms")
+    separate = 0.0
+    for count in range(1, len(indicators) + 1):
+        elapsed = best_of(repeats, lambda: compute_indicators(history, indicators[:count]))
+        # Same indicator in its own pass (what one query/pass per indicator would cost)
+        separate += best_of(repeats, lambda: compute_indicators(history, indicators[count - 1:count]))
+        kind, window = indicators[count - 1]
+        print(
+            f"   + {f'{kind}:{window}':<13} -> {elapsed * 1000:8.1f} ms (+{(elapsed - previous) * 1000:7.1f} ms) | "
+            f"one pass per indicator so far: {separate * 1000:8.1f} ms"
+        )
+        previous = elapsed
+
+# Entry point: python benchmarks/bench_gold_indicators.py --coins 50 --rows-per-coin 10080
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gold indicator engine: cost per extra indicator")
+    parser.add_argument("--coins", type=int, default=50)
+    parser.add_argument("--rows-per-coin", type=int, default=10_080)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.coins, args.rows_per_coin, args.repeats)
@@ -0,0 +1,89 @@
+import argparse
+import sys
+import time
+import duckdb
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.gold.indicators import compute_indicators
+
+def minute_snapshots(coin_count: int, days: int) -> pd.DataFrame:
+    """
+    Minute snapshots per coin over 'days' days, with ~5% of them missed (irregular cadence).
+    """
+    rng = np.random.default_rng(5)
+    rows_per_coin = days * 1_440
+    history = pd.DataFrame({
+        "coin_id": np.repeat([f"coin-{index:03d}" for index in range(coin_count)], rows_per_coin),
+        "extraction_timestamp": np.tile(pd.date_range("2026-01-01", periods=rows_per_coin, freq="min"), coin_count),
+        "price_usd": 100 + rng.normal(0, 0.1, coin_count * rows_per_coin).cumsum(),
+        "is_seed": False,
+    })
+    return history[rng.random(len(history)) > 0.05].reset_index(drop=True)
+
+def best_of(repeats: int, function) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def sql_range_windows(history: pd.DataFrame) -> None:
+    # The SQL formulation: RANGE frames over the raw snapshots
+    duckdb.execute("""
+        SELECT coin_id, extraction_timestamp,
+            AVG(price_usd) OVER w as sma_7d,
+            STDDEV(price_usd) OVER w as volatility_7d
+        FROM history
+        WINDOW w AS (
+            PARTITION BY coin_id ORDER BY extraction_timestamp
+            RANGE BETWEEN INTERVAL 7 DAYS PRECEDING AND CURRENT ROW
+        )
+    """).df()
+
+def hourly_bars_then_windows(history: pd.DataFrame) -> int:
+    # Resample-then-window: 1h OHLC bars first (as GOLD_BAR_INTERVAL=1h), then the engine on the closes
+    bars = duckdb.execute("""
+        SELECT
+            coin_id,
+            time_bucket(INTERVAL 1 HOUR, extraction_timestamp) as extraction_timestamp,
+            arg_min(price_usd, extraction_timestamp) as open_usd,
+            MAX(price_usd) as high_usd,
+            MIN(price_usd) as low_usd,
+            arg_max(price_usd, extraction_timestamp) as price_usd,
+            false as is_seed
+        FROM history
+        GROUP BY ALL
+    """).df()
+    compute_indicators(bars, [], window_mode="time")
+    return len(bars)
+
+def run(coin_count: int, days: int, repeats: int) -> None:
+    history = minute_snapshots(coin_count, days)
+    print(f"📊 {coin_count} coins x {days} days of minute snapshots = {len(history):,} rows (7-day windows)")
+
+    timings = {
+        "DuckDB RANGE INTERVAL '7 days' (raw)": best_of(repeats, lambda: sql_range_windows(history)),
+        "engine, time mode (raw)": best_of(repeats, lambda: compute_indicators(history, [], window_mode="time")),
+        "1h bars + engine, time mode": best_of(repeats, lambda: hourly_bars_then_windows(history)),
+    }
+    for name, elapsed in timings.items():
+        print(f"   {name:<38}: {elapsed * 1000:9.1f} ms")
+    print(f"   (1h bars: {hourly_bars_then_windows(history):,} rows)")
+
+# Entry point: python benchmarks/bench_gold_time_windows.py --coins 20 --days 90
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gold time-based windows: SQL RANGE frames vs engine vs bars first")
+    parser.add_argument("--coins", type=int, default=20)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.coins, args.days, args.repeats)
@@ -0,0 +1,87 @@
+import argparse
+import sys
+import tempfile
+import time
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.silver import clean, compact
+
+COINS = ["bitcoin", "ethereum", "solana", "cardano"]
+
+def write_small_parts(snapshot_count: int) -> None:
+    """
+    Writes one 1-row Parquet part per snapshot and coin (the uncompacted Silver layout).
+    """
+    start = datetime(2026, 1, 1)
+    parts = []
+    for index in range(snapshot_count):
+        extracted_at = start + timedelta(minutes=index)
+        timestamp = extracted_at.strftime("%Y%m%d_%H%M%S")
+        for coin_index, coin_id in enumerate(COINS):
+            table = pa.table({
+                "price_usd": [1000.0 * (coin_index + 1) + index],
+                "volume_24h": [1.0],
+                "extraction_timestamp": [timestamp],
+                "source_file": [f"raw_prices_{timestamp}.json"],
+            })
+            part_name = f"date={extracted_at:%Y-%m-%d}/coin_id={coin_id}/part-{index:07d}-0.parquet"
+            (clean.SILVER_DATASET_DIR / part_name).parent.mkdir(parents=True, exist_ok=True)
+            pq.write_table(table, clean.SILVER_DATASET_DIR / part_name)
+            parts.append(part_name)
+    clean.save_manifest({"bronze_files": {}, "parts": parts})
+
+def time_scan() -> float:
+    """
+    Times the Gold-style scan (every row, three columns) over the live Silver files.
+    """
+    duckdb_con = duckdb.connect(database=':memory:')
+    started = time.perf_counter()
+    duckdb_con.execute(f"""
+        SELECT coin_id, COUNT(*), AVG(price_usd), MAX(extraction_timestamp)
+        FROM ({clean.silver_scan_sql(clean.list_silver_files())})
+        GROUP BY coin_id
+    """).fetchall()
+    elapsed = time.perf_counter() - started
+    duckdb_con.close()
+    return elapsed
+
+def run(snapshot_count: int) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        clean.SILVER_DIR = Path(temp_dir)
+        clean.SILVER_DATASET_DIR = clean.SILVER_DIR / "cleaned_crypto_prices"
+        clean.MANIFEST_FILE = clean.SILVER_DIR / "_manifest.json"
+        clean.SILVER_DATASET_DIR.mkdir(parents=True)
+
+        write_small_parts(snapshot_count)
+        before = time_scan()
+
+        started = time.perf_counter()
+        compact.process_data_compaction()
+        compaction = time.perf_counter() - started
+
+        after = time_scan()
+        file_count = len(clean.list_silver_files())
+
+    print(
+        f"📊 {snapshot_count:>9,} snapshots | scan before: {before:8.3f}s | "
+        f"compaction: {compaction:8.3f}s | scan after: {after:8.3f}s ({file_count} files) | "
+        f"speedup: {before / after:6.1f}x"
+    )
+
+# Entry point: python benchmarks/bench_silver_compaction.py --snapshots 10000 100000 1000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Silver scan time before/after compaction")
+    parser.add_argument("--snapshots", type=int, nargs="+", default=[10_000])
+    args = parser.parse_args()
+
+    for snapshot_count in args.snapshots:
+        run(snapshot_count)
@@ -0,0 +1,160 @@
+import argparse
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import duckdb
+from pathlib import Path
+from unittest import mock
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT / "src"))
+
+# --- IMPORTS ---
+from cloud_functions.silver import main as silver_main
+
+FILE_NAME = "raw_prices_20260114_120000.json"
+
+def make_snapshot(coin_count: int) -> bytes:
+    return json.dumps({
+        f"coin-{index:05d}": {"usd": 1.0 + index, "usd_market_cap": 1.0e9, "usd_24h_vol": 1.0e6}
+        for index in range(coin_count)
+    }).encode()
+
+class FakeBlob:
+    """
+    Stand-in for a GCS blob: keeps the object bytes in a dict (no network in the timings).
+    """
+
+    def __init__(self, objects: dict, name: str):
+        self.objects = objects
+        self.name = name
+
+    def exists(self) -> bool:
+        return self.name in self.objects
+
+    def download_as_bytes(self) -> bytes:
+        return self.objects[self.name]
+
+    def download_to_filename(self, filename: str) -> None:
+        Path(filename).write_bytes(self.objects[self.name])
+
+    def upload_from_string(self, data: bytes, content_type: str = None) -> None:
+        self.objects[self.name] = data
+
+    def upload_from_filename(self, filename: str) -> None:
+        self.objects[self.name] = Path(filename).read_bytes()
+
+def fake_storage_client(objects: dict) -> mock.Mock:
+    client = mock.Mock()
+    client.bucket.return_value.blob.side_effect = lambda name: FakeBlob(objects, name)
+    return client
+
+def tmp_round_trip(storage_client, file_name: str, temp_dir: Path) -> int:
+    """
+    The previous Silver path: download to /tmp, COPY to a /tmp folder, upload every file.
+
+    Returns the bytes written to the temporary directory (RAM on Cloud Functions).
+    """
+    local_input_path = temp_dir / file_name
+    snapshot_name = Path(file_name).stem
+    local_output_path = temp_dir / f"{snapshot_name}_silver"
+
+    storage_client.bucket("bronze").blob(file_name).download_to_filename(str(local_input_path))
+    duckdb_con = duckdb.connect(database=':memory:')
+    try:
+        duckdb_con.execute(f"""
+            COPY ({silver_main._unpivot_query(f"(SELECT filename, content as json FROM read_text('{local_input_path}'))")}) TO '{local_output_path}' (
+                FORMAT PARQUET,
+                PARTITION_BY (date, coin_id),
+                FILENAME_PATTERN '{snapshot_name}_{{i}}'
+            );
+        """)
+        tmp_bytes = local_input_path.stat().st_size
+        dest_bucket = storage_client.bucket("silver")
+        for partition_file in sorted(local_output_path.rglob("*.parquet")):
+            tmp_bytes += partition_file.stat().st_size
+            dest_bucket.blob(f"processed/{partition_file.relative_to(local_output_path).as_posix()}").upload_from_filename(
+                str(partition_file)
+            )
+        return tmp_bytes
+    finally:
+        local_input_path.unlink()
+        shutil.rmtree(local_output_path)
+        duckdb_con.close()
+
+def in_memory(storage_client, file_name: str) -> None:
+    """
+    The current Silver path (process_data_cleaning): bytes in, Parquet buffers out.
+    """
+    event = mock.Mock()
+    event.data = {"bucket": "bronze", "name": file_name}
+    with mock.patch.object(silver_main, "_storage_client", storage_client), \
+            mock.patch("builtins.print"):
+        silver_main.process_data_cleaning(event)
+
+def measure(mode: str, coin_count: int, repeats: int) -> dict:
+    """
+    Runs one mode in this process and reports its best latency and the process peak RSS.
+    """
+    objects = {FILE_NAME: make_snapshot(coin_count)}
+    storage_client = fake_storage_client(objects)
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    best = float("inf")
+    tmp_bytes = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            if mode == "tmp":
+                tmp_bytes = tmp_round_trip(storage_client, FILE_NAME, Path(temp_dir))
+            else:
+                # Transformed again on every repeat: drop the content-hash marker of the last one
+                for name in [name for name in objects if name.startswith(f"{silver_main.HASH_PREFIX}/")]:
+                    del objects[name]
+                in_memory(storage_client, FILE_NAME)
+            best = min(best, time.perf_counter() - started)
+
+    assert len([name for name in objects if name.startswith("processed/")]) == coin_count
+    return {
+        "latency_s": best,
+        "rss_peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "rss_growth_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before_kb) / 1024,
+        "tmp_mb": tmp_bytes / 1024 ** 2,
+    }
+
+def run(coin_count: int, repeats: int) -> None:
+    results = {}
+    for mode in ("tmp", "memory"):
+        # One fresh process per mode: the peak RSS of one path can't hide the other's
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--coins", str(coin_count), "--repeats", str(repeats)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    tmp, memory = results["tmp"], results["memory"]
+    print(
+        f"📊 {coin_count:>6,} coins | /tmp: {tmp['latency_s'] * 1000:8.2f} ms, "
+        f"peak RSS {tmp['rss_peak_mb']:6.1f} MB (+{tmp['rss_growth_mb']:5.1f}) + {tmp['tmp_mb']:5.2f} MB in /tmp | "
+        f"in-memory: {memory['latency_s'] * 1000:8.2f} ms, "
+        f"peak RSS {memory['rss_peak_mb']:6.1f} MB (+{memory['rss_growth_mb']:5.1f})"
+    )
+
+# Entry point: python benchmarks/bench_silver_function_io.py --coins 4 1000 20000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Silver function latency and peak RSS: /tmp round-trip vs in-memory")
+    parser.add_argument("--coins", type=int, nargs="+", default=[4, 1000, 20000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--child", choices=["tmp", "memory"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.coins[0], args.repeats)))
+    else:
+        for coin_count in args.coins:
+            run(coin_count, args.repeats)
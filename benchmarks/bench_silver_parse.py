@@ -0,0 +1,119 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+import pandas as pd
+import pyarrow as pa
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.silver import clean
+
+COINS = ["bitcoin", "ethereum", "solana", "cardano"]
+
+def write_bronze_files(bronze_dir: Path, file_count: int) -> list:
+    """
+    Writes one synthetic CoinGecko snapshot per minute (same shape as 'ingest.py').
+    """
+    start = datetime(2026, 1, 1)
+    file_paths = []
+    for index in range(file_count):
+        timestamp = (start + timedelta(minutes=index)).strftime("%Y%m%d_%H%M%S")
+        file_path = bronze_dir / f"raw_prices_{timestamp}.json"
+        with open(file_path, "w") as json_file:
+            json.dump({
+                coin_id: {"usd": 1000.0 * (coin_index + 1) + index, "usd_24h_vol": 1.0e9 + index}
+                for coin_index, coin_id in enumerate(COINS)
+            }, json_file, indent=4)
+        file_paths.append(file_path)
+    return file_paths
+
+def parse_row_loop(file_paths: list) -> pa.Table:
+    """
+    The previous implementation: one dict per coin per file, then a DataFrame.
+    """
+    data_list = []
+    for file_path in file_paths:
+        with open(file_path, "r") as json_file:
+            json_data = json.load(json_file)
+        timestamp_str = clean._snapshot_timestamp(file_path)
+        for coin_id, metrics in json_data.items():
+            data_list.append({
+                "coin_id": coin_id,
+                "price_usd": float(metrics.get("usd", 0)),
+                "volume_24h": float(metrics.get("usd_24h_vol", 0)),
+                "extraction_timestamp": timestamp_str,
+                "source_file": file_path.name
+            })
+    df = pd.DataFrame(data_list)
+    df["date"] = pd.to_datetime(df["extraction_timestamp"], format="%Y%m%d_%H%M%S").dt.strftime("%Y-%m-%d")
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def parse_columnar(file_paths: list) -> pa.Table:
+    table, _, _ = clean._parse_bronze_files(file_paths)
+    return table
+
+def run_parallel(file_count: int, worker_counts: list) -> None:
+    """
+    Throughput of the process-pool parser per worker count (run with a warm page cache).
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_paths = write_bronze_files(Path(temp_dir), file_count)
+        # Warm the page cache so the timings measure parsing, not disk reads
+        parse_columnar(file_paths)
+
+        baseline = None
+        for workers in worker_counts:
+            started = time.perf_counter()
+            if workers == 1:
+                table = parse_columnar(file_paths)
+            else:
+                table, _, _ = clean._parse_bronze_files_parallel(file_paths, workers)
+            elapsed = time.perf_counter() - started
+            assert table.num_rows == file_count * len(COINS)
+
+            baseline = baseline or elapsed
+            print(
+                f"⚡ {file_count:>9,} files | {workers:>2} workers: {elapsed:8.3f}s | "
+                f"{file_count / elapsed:>10,.0f} files/s | scaling: {baseline / elapsed:5.2f}x"
+            )
+
+def run(file_count: int) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_paths = write_bronze_files(Path(temp_dir), file_count)
+
+        timings = {}
+        for name, parser in [("row loop", parse_row_loop), ("columnar", parse_columnar)]:
+            started = time.perf_counter()
+            table = parser(file_paths)
+            timings[name] = time.perf_counter() - started
+            assert table.num_rows == file_count * len(COINS)
+
+    print(
+        f"📊 {file_count:>9,} files | row loop: {timings['row loop']:8.3f}s | "
+        f"columnar: {timings['columnar']:8.3f}s | speedup: {timings['row loop'] / timings['columnar']:6.1f}x"
+    )
+
+# Entry point: python benchmarks/bench_silver_parse.py --files 1000 10000 100000 [--workers 1 2 4 8]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bronze -> Silver parsing: per-row loop vs columnar")
+    parser.add_argument("--files", type=int, nargs="+", default=[100_000])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        help="Measure the parallel parser with these worker counts instead (first one is the baseline)."
+    )
+    args = parser.parse_args()
+
+    for file_count in args.files:
+        if args.workers:
+            run_parallel(file_count, args.workers)
+        else:
+            run(file_count)
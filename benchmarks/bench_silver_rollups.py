@@ -0,0 +1,72 @@
+import argparse
+import sys
+import tempfile
+import time
+import duckdb
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.silver.rollup import RESOLUTIONS, TIMESTAMP_FORMAT, bars_query, snapshot_bars_sql
+
+def minute_snapshots(coin_count: int, days: int) -> pd.DataFrame:
+    """
+    Minute snapshots per coin, with the local Silver columns (string timestamps).
+    """
+    rng = np.random.default_rng(7)
+    rows_per_coin = days * 1_440
+    timestamps = pd.date_range("2025-01-01", periods=rows_per_coin, freq="min").strftime(TIMESTAMP_FORMAT)
+    return pd.DataFrame({
+        "coin_id": np.repeat([f"coin-{index:03d}" for index in range(coin_count)], rows_per_coin),
+        "extraction_timestamp": np.tile(timestamps, coin_count),
+        "price_usd": 100 + rng.normal(0, 0.1, coin_count * rows_per_coin).cumsum(),
+        "volume_24h": 1_000.0,
+    })
+
+def best_of(repeats: int, function) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run(coin_count: int, days: int, repeats: int) -> None:
+    history = minute_snapshots(coin_count, days)
+    print(f"📊 {coin_count} coins x {days} days of minute snapshots = {len(history):,} rows")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # The same data as Silver rows and as bars of every resolution, sorted like the real files
+        files = {"raw": Path(temp_dir) / "raw.parquet"}
+        duckdb.execute(f"COPY (SELECT * FROM history ORDER BY coin_id, extraction_timestamp) TO '{files['raw']}' (FORMAT PARQUET)")
+        for name, seconds in RESOLUTIONS.items():
+            files[name] = Path(temp_dir) / f"{name}.parquet"
+            duckdb.execute(f"""
+                COPY ({bars_query(f"({snapshot_bars_sql('history')})", seconds)} ORDER BY coin_id, extraction_timestamp)
+                TO '{files[name]}' (FORMAT PARQUET)
+            """)
+
+        # The dashboard's query: one coin over the whole history
+        for name, path in files.items():
+            query = f"""
+                SELECT extraction_timestamp, price_usd FROM read_parquet('{path}')
+                WHERE coin_id = 'coin-000' ORDER BY extraction_timestamp
+            """
+            rows = len(duckdb.execute(query).df())
+            elapsed = best_of(repeats, lambda: duckdb.execute(query).df())
+            print(f"   {name:<4}: {rows:>9,} rows for one coin in {elapsed * 1000:8.1f} ms")
+
+# Entry point: python benchmarks/bench_silver_rollups.py --coins 5 --days 365
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Silver rollups: rows and time of a year-long chart query per resolution")
+    parser.add_argument("--coins", type=int, default=5)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.coins, args.days, args.repeats)
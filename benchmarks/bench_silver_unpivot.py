@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+import duckdb
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT / "src"))
+
+# --- IMPORTS ---
+from cloud_functions.silver.main import _unpivot_query
+
+def write_snapshot(directory: Path, coin_count: int) -> Path:
+    file_path = directory / "raw_prices_20260114_120000.json"
+    file_path.write_text(json.dumps({
+        f"coin-{index:05d}": {"usd": 1.0 + index, "usd_market_cap": 1.0e9, "usd_24h_vol": 1.0e6}
+        for index in range(coin_count)
+    }))
+    return file_path
+
+def column_per_coin_query(file_path: Path, coin_count: int) -> str:
+    """
+    The previous transform: one STRUCT column per coin in read_json + UNPIVOT over all of them.
+    """
+    coin_ids = [f"coin-{index:05d}" for index in range(coin_count)]
+    columns = ", ".join(
+        f"'{coin_id}': 'STRUCT(usd DOUBLE, usd_market_cap DOUBLE, usd_24h_vol DOUBLE)'" for coin_id in coin_ids
+    )
+    return f"""
+        WITH raw_data AS (
+            SELECT * FROM read_json('{file_path}', columns={{{columns}}})
+        ),
+        unpivoted_data AS (
+            UNPIVOT raw_data ON COLUMNS(*) INTO NAME coin_id VALUE metrics
+        )
+        SELECT
+            coin_id,
+            CAST(metrics.usd AS DECIMAL(18, 2)) as price_usd,
+            CAST(metrics.usd_market_cap AS DECIMAL(24, 2)) as market_cap,
+            CAST(metrics.usd_24h_vol AS DECIMAL(24, 2)) as volume_24h
+        FROM unpivoted_data
+    """
+
+def time_query(query: str, expected_rows: int, repeats: int) -> float:
+    duckdb_con = duckdb.connect(database=':memory:')
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = duckdb_con.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0]
+        best = min(best, time.perf_counter() - started)
+        assert rows == expected_rows
+    duckdb_con.close()
+    return best
+
+def run(coin_count: int, repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = write_snapshot(Path(temp_dir), coin_count)
+        column_per_coin = time_query(column_per_coin_query(file_path, coin_count), coin_count, repeats)
+        # The transform reads any (filename, json) relation: here, the file as text
+        snapshot = f"(SELECT filename, content as json FROM read_text('{file_path}'))"
+        map_unnest = time_query(_unpivot_query(snapshot), coin_count, repeats)
+
+    print(
+        f"📊 {coin_count:>6,} coins | column per coin: {column_per_coin * 1000:9.2f} ms "
+        f"({column_per_coin / coin_count * 1e6:7.2f} µs/coin) | map unnest: {map_unnest * 1000:7.2f} ms "
+        f"({map_unnest / coin_count * 1e6:5.2f} µs/coin)"
+    )
+
+# Entry point: python benchmarks/bench_silver_unpivot.py --coins 4 100 5000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Silver transform time per Bronze file vs coin count")
+    parser.add_argument("--coins", type=int, nargs="+", default=[4, 100, 5000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for coin_count in args.coins:
+        run(coin_count, args.repeats)
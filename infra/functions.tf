@@ -4,10 +4,23 @@
 
 # --- BRONZE LAYER (Ingestion) ---
 
+# The fetch engine is shared with the local pipeline: fetch.py is copied next to main.py
 data "archive_file" "bronze_layer_zip" {
   type        = "zip"
-  source_dir  = "${path.module}/../src/cloud_functions/bronze"
   output_path = "${path.module}/bronze_layer_function.zip"
+
+  source {
+    content  = file("${path.module}/../src/cloud_functions/bronze/main.py")
+    filename = "main.py"
+  }
+  source {
+    content  = file("${path.module}/../src/cloud_functions/bronze/requirements.txt")
+    filename = "requirements.txt"
+  }
+  source {
+    content  = file("${path.module}/../src/pipeline/bronze/fetch.py")
+    filename = "fetch.py"
+  }
 }
 
 resource "google_storage_bucket_object" "bronze_layer_zip_upload" {
@@ -69,17 +82,108 @@ resource "google_cloudfunctions_function" "silver_clean" {
     resource   = google_storage_bucket.data_lake.name
   }
 
+  environment_variables = {
+    SILVER_BUCKET_NAME = google_storage_bucket.silver_layer.name
+    SILVER_MICRO_BATCH = var.silver_micro_batch ? "true" : "false"
+  }
+}
+
+# --- SILVER LAYER (Micro-batch drain) ---
+# Transforms the Bronze files queued by silver-cleaning-func when SILVER_MICRO_BATCH is on
+
+resource "google_cloudfunctions_function" "silver_batch" {
+  name        = "silver-batching-func"
+  description = "Transforms queued Bronze files to Silver Parquet in micro-batches"
+  runtime     = "python310"
+  region      = var.region
+  project     = var.project_id
+
+  available_memory_mb   = 1024
+  timeout               = 540
+  source_archive_bucket = google_storage_bucket.function_source.name
+  source_archive_object = google_storage_bucket_object.silver_layer_zip_upload.name
+  trigger_http          = true
+  entry_point           = "process_pending_batch"
+
+  # A single drain at a time: batches are claimed without locks
+  max_instances = 1
+
+  service_account_email = google_service_account.function_runner.email
+
   environment_variables = {
     SILVER_BUCKET_NAME = google_storage_bucket.silver_layer.name
   }
 }
 
+# --- SILVER LAYER (Compaction) ---
+# Same source archive as the cleaning function, different entry point
+
+resource "google_cloudfunctions_function" "silver_compact" {
+  name        = "silver-compacting-func"
+  description = "Merges small Silver Parquet files into day partitions"
+  runtime     = "python310"
+  region      = var.region
+  project     = var.project_id
+
+  available_memory_mb   = 1024
+  timeout               = 540
+  source_archive_bucket = google_storage_bucket.function_source.name
+  source_archive_object = google_storage_bucket_object.silver_layer_zip_upload.name
+  trigger_http          = true
+  entry_point           = "process_data_compaction"
+
+  service_account_email = google_service_account.function_runner.email
+
+  environment_variables = {
+    SILVER_BUCKET_NAME = google_storage_bucket.silver_layer.name
+  }
+}
+
+# --- SILVER LAYER (Quarantine reprocessing) ---
+# Invoked manually once quarantined Bronze files are fixed:
+#   gcloud functions call silver-reprocessing-func [--data '{"files": ["raw_prices_....json"]}']
+
+resource "google_cloudfunctions_function" "silver_reprocess" {
+  name        = "silver-reprocessing-func"
+  description = "Sends quarantined Bronze files back through the Silver transform"
+  runtime     = "python310"
+  region      = var.region
+  project     = var.project_id
+
+  available_memory_mb   = 512
+  timeout               = 540
+  source_archive_bucket = google_storage_bucket.function_source.name
+  source_archive_object = google_storage_bucket_object.silver_layer_zip_upload.name
+  trigger_http          = true
+  entry_point           = "process_quarantine_reprocess"
+
+  service_account_email = google_service_account.function_runner.email
+
+  environment_variables = {
+    SILVER_BUCKET_NAME = google_storage_bucket.silver_layer.name
+    SILVER_MICRO_BATCH = var.silver_micro_batch ? "true" : "false"
+  }
+}
+
 # --- GOLD LAYER (Analysis) ---
 
+# The indicator engine is shared with the local pipeline: indicators.py is copied next to main.py
 data "archive_file" "gold_layer_zip" {
   type        = "zip"
-  source_dir  = "${path.module}/../src/cloud_functions/gold"
   output_path = "${path.module}/gold_layer_function.zip"
+
+  source {
+    content  = file("${path.module}/../src/cloud_functions/gold/main.py")
+    filename = "main.py"
+  }
+  source {
+    content  = file("${path.module}/../src/cloud_functions/gold/requirements.txt")
+    filename = "requirements.txt"
+  }
+  source {
+    content  = file("${path.module}/../src/pipeline/gold/indicators.py")
+    filename = "indicators.py"
+  }
 }
 
 resource "google_storage_bucket_object" "gold_layer_zip_upload" {
@@ -99,6 +203,9 @@ resource "google_cloudfunctions_function" "gold_analyze" {
   source_archive_bucket = google_storage_bucket.function_source.name
   source_archive_object = google_storage_bucket_object.gold_layer_zip_upload.name
 
+  # One file per coin lands for every snapshot; serialize the summary read-modify-write
+  max_instances = 1
+
   entry_point           = "process_data_analyzing"
   service_account_email = google_service_account.function_runner.email
 
@@ -15,4 +15,43 @@ resource "google_cloud_scheduler_job" "daily_bronze_trigger" {
       audience              = google_cloudfunctions_function.bronze_ingest.https_trigger_url
     }
   }
-}
\ No newline at end of file
+}
+
+resource "google_cloud_scheduler_job" "daily_silver_compaction" {
+  name        = "daily-silver-compaction"
+  description = "Compacts the one-file-per-snapshot Silver objects into day partitions"
+  schedule    = "30 0 * * *"
+  time_zone   = "Australia/Brisbane"
+  region      = var.region
+  project     = var.project_id
+
+  http_target {
+    http_method = "POST"
+    uri         = google_cloudfunctions_function.silver_compact.https_trigger_url
+
+    oidc_token {
+      service_account_email = google_service_account.function_runner.email
+      audience              = google_cloudfunctions_function.silver_compact.https_trigger_url
+    }
+  }
+}
+
+resource "google_cloud_scheduler_job" "silver_micro_batch" {
+  count       = var.silver_micro_batch ? 1 : 0
+  name        = "silver-micro-batch"
+  description = "Drains the queued Bronze files into Silver every minute"
+  schedule    = "* * * * *"
+  time_zone   = "Australia/Brisbane"
+  region      = var.region
+  project     = var.project_id
+
+  http_target {
+    http_method = "POST"
+    uri         = google_cloudfunctions_function.silver_batch.https_trigger_url
+
+    oidc_token {
+      service_account_email = google_service_account.function_runner.email
+      audience              = google_cloudfunctions_function.silver_batch.https_trigger_url
+    }
+  }
+}
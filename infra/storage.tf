@@ -20,6 +20,17 @@ resource "google_storage_bucket" "data_lake" {
   uniform_bucket_level_access = true
   
   versioning { enabled = true }
+
+  # Content-hash markers of the ingestion dedup only need to cover recent snapshots
+  lifecycle_rule {
+    condition {
+      age            = 1
+      matches_prefix = ["_hashes/"]
+    }
+    action {
+      type = "Delete"
+    }
+  }
 }
 
 # --- SILVER LAYER (Clean Data) ---
@@ -33,6 +44,18 @@ resource "google_storage_bucket" "silver_layer" {
 
   versioning { enabled = true }
 
+  # Content-hash markers of the Silver dedup: they also turn redelivered Bronze events into
+  # no-ops, so they outlive the event delivery window by a wide margin
+  lifecycle_rule {
+    condition {
+      age            = 7
+      matches_prefix = ["_hashes/"]
+    }
+    action {
+      type = "Delete"
+    }
+  }
+
   labels = {
     environment = "dev"
     layer       = "silver"
@@ -22,4 +22,10 @@ variable "silver_bucket_name" {
 variable "gold_bucket_name" {
   description = "Name of the Gold bucket"
   type        = string
-}
\ No newline at end of file
+}
+
+variable "silver_micro_batch" {
+  description = "Queue Bronze events and transform them in scheduled micro-batches instead of one by one"
+  type        = bool
+  default     = false
+}
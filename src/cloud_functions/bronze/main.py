@@ -1,7 +1,9 @@
 import functions_framework
 from google.cloud import storage
 import requests
+import hashlib
 import json
+import time
 from datetime import datetime
 import os
 from typing import Tuple
@@ -9,7 +11,71 @@ from typing import Tuple
 # --- CONFIGURATION ---
 BUCKET_NAME = os.environ.get("BRONZE_BUCKET_NAME", "crypto-bronze-crypto-platform-carlo-2026")
 COINGECKO_URL = "https://api.coingecko.com/api/v3/simple/price"
-DEFAULT_COINS = "bitcoin,ethereum,solana,cardano"
+DEFAULT_COINS = os.environ.get("COINS_TO_FETCH", "bitcoin,ethereum,solana,cardano")
+# Dedup of identical payloads (a cached API response): one marker per recent snapshot content,
+# '_hashes/<sha256>' (value: the file holding it). Their events are dropped first thing by the
+# Silver trigger; a bucket lifecycle rule expires them after a day (infra/storage.tf)
+HASH_PREFIX = "_hashes"
+
+# Fetch engine: src/pipeline/bronze/fetch.py, copied next to main.py when the function archive
+# is built (infra/functions.tf), so there is a single implementation
+try:
+    import fetch
+except ImportError: # Running from the repository (tests)
+    from pipeline.bronze import fetch
+
+BATCH_SIZE = int(os.environ.get("COINGECKO_BATCH_SIZE", fetch.BATCH_SIZE))
+MAX_CONCURRENCY = int(os.environ.get("COINGECKO_MAX_CONCURRENCY", fetch.MAX_CONCURRENCY))
+REQUESTS_PER_MINUTE = float(os.environ.get("COINGECKO_REQUESTS_PER_MINUTE", fetch.REQUESTS_PER_MINUTE))
+
+# Module-global clients, reused across warm invocations of the same instance.
+# Created on first use (not at import) so cold starts don't pay for them up front.
+_http_session = None
+_storage_client = None
+_rate_limiter = None
+
+def _get_http_session() -> requests.Session:
+    """
+    Returns the pooled HTTP session (keep-alive connections survive between invocations,
+    so warm calls skip the TCP/TLS handshakes with CoinGecko).
+    """
+    global _http_session
+    if _http_session is None:
+        _http_session = fetch.create_session(MAX_CONCURRENCY)
+    return _http_session
+
+def _get_rate_limiter() -> fetch.TokenBucket:
+    """
+    Returns the token bucket shared by every request of this instance.
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = fetch.TokenBucket(REQUESTS_PER_MINUTE)
+    return _rate_limiter
+
+def _get_storage_client() -> storage.Client:
+    """
+    Returns the GCS client (credentials and its HTTP transport are set up once per instance).
+    """
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client()
+    return _storage_client
+
+def fetch_prices(coin_ids: list, metrics: fetch.FetchMetrics) -> dict:
+    """
+    Fetches every coin in batches of BATCH_SIZE, MAX_CONCURRENCY batches at a time over the
+    pooled session, and merges the responses into a single snapshot (see fetch.fetch_prices).
+    """
+    return fetch.fetch_prices(
+        coin_ids,
+        session=_get_http_session(),
+        api_url=COINGECKO_URL,
+        batch_size=BATCH_SIZE,
+        max_concurrency=MAX_CONCURRENCY,
+        rate_limiter=_get_rate_limiter(),
+        metrics=metrics
+    )
 
 @functions_framework.http
 def process_data_ingestion(request) -> Tuple[str, int]:
@@ -22,8 +88,12 @@ def process_data_ingestion(request) -> Tuple[str, int]:
 
     Process:
         1. Parses the 'request' for custom coins (optional).
-        2. Fetches real-time prices from CoinGecko.
-        3. Uploads the raw data to the Bronze GCS Bucket.
+        2. Fetches real-time prices from CoinGecko (batched and concurrent for large coin lists).
+        3. Uploads the raw data (canonical JSON) to the Bronze GCS Bucket, unless its content
+           hash matches a recent snapshot (nothing new for Silver to transform).
+
+    The HTTP session and the GCS client are module globals, created lazily and reused by
+    warm invocations. Time spent in client setup, fetch and upload is logged per call.
 
     Returns:
         tuple: ("Success Message", 200) on success.
@@ -41,33 +111,46 @@ def process_data_ingestion(request) -> Tuple[str, int]:
         target_coins = DEFAULT_COINS
         print(f"🚀 Starting Bronze Layer - Data Ingestion for: {target_coins}")
 
-    try:
-        # 2. Fetch data
-        params = {
-            "ids": target_coins,
-            "vs_currencies": "usd",
-            "include_24hr_vol": "true"
-        }
+    metrics = fetch.FetchMetrics()
+    cold = _http_session is None or _storage_client is None
+    timings = {"setup_s": 0.0, "fetch_s": 0.0, "upload_s": 0.0}
 
-        response = requests.get(COINGECKO_URL, params=params, timeout=10) # Added timeout
-        response.raise_for_status() # Raises error for 404, 500, etc.
+    try:
+        # Client setup (only does work on a cold instance)
+        started = time.perf_counter()
+        _get_http_session()
+        storage_client = _get_storage_client()
+        timings["setup_s"] = time.perf_counter() - started
 
-        coingecko_data = response.json()
-        print("✅ CoinGecko data fetched successfully.")
+        # 2. Fetch data
+        started = time.perf_counter()
+        coin_ids = fetch.parse_coin_list(target_coins)
+        coingecko_data = fetch_prices(coin_ids, metrics)
+        timings["fetch_s"] = time.perf_counter() - started
+        print(f"✅ CoinGecko data fetched successfully ({len(coingecko_data)} coins).")
 
         # 3. Upload to GCS
-        storage_client = storage.Client()
+        started = time.perf_counter()
         bucket = storage_client.bucket(BUCKET_NAME)
 
+        # Canonical JSON (sorted keys): identical payloads give identical bytes, which is the
+        # content hash Silver deduplicates on
+        data = json.dumps(coingecko_data, sort_keys=True)
+        hash_blob = bucket.blob(f"{HASH_PREFIX}/{hashlib.sha256(data.encode()).hexdigest()}")
+        if hash_blob.exists():
+            existing = json.loads(hash_blob.download_as_bytes())["file"]
+            timings["upload_s"] = time.perf_counter() - started
+            print(f"♻️ Identical to {existing} (same content hash). Not uploaded again.")
+            return f"Success: {existing} (unchanged)", 200
+
         # Generate filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         blob_name = f"raw_prices_{timestamp}.json"
         blob = bucket.blob(blob_name)
 
-        blob.upload_from_string(
-            data=json.dumps(coingecko_data),
-            content_type="application/json"
-        )
+        blob.upload_from_string(data=data, content_type="application/json")
+        hash_blob.upload_from_string(data=json.dumps({"file": blob_name}), content_type="application/json")
+        timings["upload_s"] = time.perf_counter() - started
 
         print(f"💾 Uploaded to gs://{BUCKET_NAME}/{blob_name}")
         return f"Success: {blob_name}", 200 # Returns a tuple
@@ -76,3 +159,7 @@ def process_data_ingestion(request) -> Tuple[str, int]:
         print(f"❌ Critical Error in Bronze Cloud Function: {error}")
         # Re-raise the error to stop the pipeline
         raise error
+
+    finally:
+        print(f"📈 Fetch metrics: {json.dumps(metrics.summary())}")
+        print(f"⏱️ Timings ({'cold' if cold else 'warm'}): {json.dumps({name: round(value, 4) for name, value in timings.items()})}")
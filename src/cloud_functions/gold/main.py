@@ -1,13 +1,279 @@
 import functions_framework
-from google.cloud import storage
+import gcsfs
 import duckdb
+import json
 import os
-import shutil
-from pathlib import Path
+import re
+from datetime import datetime
 
 # --- CONFIGURATION ---
 GOLD_BUCKET_NAME = os.environ.get("GOLD_BUCKET_NAME", "crypto-gold-data")
-WINDOW_SIZE = 7
+SUMMARY_BLOB_NAME = "analytics/market_summary.parquet"
+# Incremental runs only write their new rows, as one part each; the summary is the base file +
+# the parts listed in the manifest (published last). Past MAX_SUMMARY_PARTS parts, the next run
+# folds them into a new base. Every base gets a new name (market_summary_<run time>.parquet):
+# the manifest switches readers to it in one write
+SUMMARY_MANIFEST_BLOB_NAME = "analytics/_summary_manifest.json"
+SUMMARY_PARTS_PREFIX = "analytics/summary_parts"
+MAX_SUMMARY_PARTS = int(os.environ.get("GOLD_MAX_SUMMARY_PARTS", 64))
+# One row per coin (its most recent summary row): all the dashboard's metric tiles need
+LATEST_BLOB_NAME = "analytics/latest_per_coin.parquet"
+# The summary is clustered by (coin_id, extraction_timestamp) in small row groups (~11 days of
+# minute snapshots per coin), so readers filtering on a coin and a time range skip the rest
+# from the row-group statistics
+SUMMARY_ROW_GROUP_SIZE = 16_384
+# The Silver rows the next run needs per coin (+ the EMA/RSI carries), used to seed the new rows
+STATE_BLOB_NAME = "analytics/_rolling_state.parquet"
+# Outputs are written here first, then moved over the published objects
+STAGING_PREFIX = "analytics/_staging"
+# Silver layout (Hive-partitioned): processed/date=YYYY-MM-DD/coin_id=<coin>/raw_prices_<ts>_0.parquet
+# (micro-batches are named raw_prices_<first ts>_to_<last ts>_<digest>_0.parquet)
+PROCESSED_GLOB = "processed/date=*/coin_id=*/*.parquet"
+SNAPSHOT_PATTERN = re.compile(r"coin_id=([^/]+)/raw_prices_(\d{8}_\d{6})(?:_to_(\d{8}_\d{6}))?")
+# Written by the Silver compaction job (see silver/main.py::process_data_compaction)
+COMPACTION_MANIFEST = "compacted/_manifest.json"
+# Set to "true" to always recompute the analytics over the full Silver history
+FULL_REBUILD = os.environ.get("GOLD_FULL_REBUILD", "false").lower() == "true"
+
+# Indicator engine: src/pipeline/gold/indicators.py, copied next to main.py when the function
+# archive is built (infra/functions.tf), so there is a single implementation
+try:
+    from indicators import INDICATORS, WINDOW_MODE, carry_columns, compute_indicators, output_columns
+except ImportError: # Running from the repository (tests)
+    from pipeline.gold.indicators import INDICATORS, WINDOW_MODE, carry_columns, compute_indicators, output_columns
+
+# Reused across warm invocations
+_filesystem = None
+
+def _get_filesystem():
+    """
+    Returns the fsspec filesystem used to read and write the buckets in place.
+
+    DuckDB reads Parquet through it with range requests, so only the footers and the
+    column chunks a query needs are fetched (no full downloads to /tmp).
+    """
+    global _filesystem
+    if _filesystem is None:
+        _filesystem = gcsfs.GCSFileSystem()
+    return _filesystem
+
+def _url(filesystem, bucket_name: str, object_name: str) -> str:
+    """
+    Builds a DuckDB-readable URL (e.g. gs://bucket/object) for the given filesystem.
+    """
+    return filesystem.unstrip_protocol(f"{bucket_name}/{object_name}")
+
+def _list_processed_files(filesystem, bucket_name: str) -> list:
+    """
+    Lists the object names under 'processed/' (metadata only).
+    """
+    bucket_root = f"{bucket_name}/"
+    return sorted(
+        path.lstrip("/")[len(bucket_root):] for path in filesystem.glob(bucket_root + PROCESSED_GLOB)
+    )
+
+def _list_silver_files(filesystem, bucket_name: str) -> list:
+    """
+    Lists the Silver objects that make up the full history.
+
+    Compacted files come from the compaction manifest; 'processed/' files are added unless
+    the manifest marks them as tombstones (already merged into a compacted file).
+    """
+    manifest_url = _url(filesystem, bucket_name, COMPACTION_MANIFEST)
+    manifest = {"files": [], "tombstones": []}
+    if filesystem.exists(manifest_url):
+        manifest = json.loads(filesystem.cat(manifest_url))
+
+    tombstones = set(manifest["tombstones"])
+    small_files = [name for name in _list_processed_files(filesystem, bucket_name) if name not in tombstones]
+    return [_url(filesystem, bucket_name, name) for name in manifest["files"] + small_files]
+
+def _silver_scan_sql(urls: list) -> str:
+    """
+    Returns a query over the given Silver objects with the Hive partition columns typed.
+    """
+    file_list = ", ".join(f"'{url}'" for url in urls)
+    return f"""
+        SELECT extraction_timestamp, coin_id, price_usd
+        FROM read_parquet(
+            [{file_list}],
+            hive_partitioning = true,
+            hive_types = {{'date': DATE, 'coin_id': VARCHAR}}
+        )
+    """
+
+def _parse_snapshot(object_name: str):
+    """
+    Extracts (coin_id, first snapshot time, last snapshot time) from a 'processed/' object
+    name, or (None, None, None). Both times are equal for a single-snapshot object.
+    """
+    match = SNAPSHOT_PATTERN.search(object_name)
+    if not match:
+        return None, None, None
+    first = datetime.strptime(match.group(2), "%Y%m%d_%H%M%S")
+    last = datetime.strptime(match.group(3), "%Y%m%d_%H%M%S") if match.group(3) else first
+    return match.group(1), first, last
+
+def _analyze(duckdb_con, seeded: bool) -> str:
+    """
+    Runs the indicator engine over 'window_input' (Silver rows + 'is_seed'), registers the
+    result as 'metrics' and returns the query of the analyzed (non-seed) rows.
+    """
+    carries = carry_columns(INDICATORS) if seeded else []
+    engine_columns = ", ".join(["coin_id", "extraction_timestamp", "price_usd", "is_seed"] + carries)
+    window_input = duckdb_con.execute(f"SELECT {engine_columns} FROM window_input").df()
+    duckdb_con.register("metrics", compute_indicators(window_input, INDICATORS, WINDOW_MODE))
+
+    # Price-scale indicators keep the Silver money type; RSI is a 0-100 score
+    indicator_columns = []
+    for column in output_columns(INDICATORS):
+        if column == "signal":
+            indicator_columns.append("metrics.signal")
+        elif column.startswith("rsi_"):
+            indicator_columns.append(f"CAST(metrics.{column} AS DECIMAL(5, 2)) as {column}")
+        else:
+            indicator_columns.append(f"CAST(metrics.{column} AS DECIMAL(18, 2)) as {column}")
+
+    return f"""
+        SELECT
+            window_input.extraction_timestamp,
+            window_input.coin_id,
+            window_input.price_usd,
+            {", ".join(indicator_columns)}
+        FROM window_input JOIN metrics USING (coin_id, extraction_timestamp)
+        WHERE NOT window_input.is_seed
+    """
+
+def _load_summary_manifest(filesystem) -> dict:
+    """
+    Returns the published summary layout: {"base": <object>, "parts": [<object>, ...]}.
+    A summary published before the manifest existed is a base without parts.
+    """
+    manifest_url = _url(filesystem, GOLD_BUCKET_NAME, SUMMARY_MANIFEST_BLOB_NAME)
+    if filesystem.exists(manifest_url):
+        return json.loads(filesystem.cat(manifest_url))
+    return {"base": SUMMARY_BLOB_NAME, "parts": []}
+
+def _state_query() -> str:
+    """
+    Returns the rows of 'window_input' the next run needs per coin (flagged 'in_state' by the
+    engine), with the carry columns the recursive indicators continue from.
+    """
+    carries = "".join(f", metrics.{column}" for column in carry_columns(INDICATORS))
+    return f"""
+        SELECT window_input.extraction_timestamp, window_input.coin_id, window_input.price_usd{carries}
+        FROM window_input JOIN metrics USING (coin_id, extraction_timestamp)
+        WHERE metrics.in_state
+    """
+
+def _latest_query(source: str) -> str:
+    """
+    Returns the most recent row per coin of the given relation.
+    """
+    return f"""
+        SELECT * FROM {source}
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY coin_id ORDER BY extraction_timestamp DESC
+        ) = 1
+        ORDER BY coin_id
+    """
+
+def _plan_incremental(duckdb_con, filesystem, source_bucket_name: str, object_name: str, manifest: dict) -> str:
+    """
+    Decides how to process the new Silver object.
+
+    Every 'processed/' object newer than its coin's watermark is picked up (not only the
+    triggering one), so a missed or out-of-order event is caught up by the next one.
+
+    Returns:
+        str: "incremental" if there are new rows after the per-coin watermarks,
+             "duplicate" if the triggering rows are already in the Gold summary (redelivered
+             event, or already picked up by an earlier invocation),
+             "full" otherwise (first run, late data, missing/inconsistent state, or a
+             changed window mode or indicator set).
+    """
+    if FULL_REBUILD:
+        return "full"
+
+    summary_urls = [_url(filesystem, GOLD_BUCKET_NAME, name) for name in [manifest["base"]] + manifest["parts"]]
+    state_url = _url(filesystem, GOLD_BUCKET_NAME, STATE_BLOB_NAME)
+    if not all(filesystem.exists(url) for url in summary_urls) or not filesystem.exists(state_url):
+        return "full"
+
+    # Views read the objects in place; only the projected columns are fetched
+    duckdb_con.execute(f"CREATE VIEW current_summary AS SELECT * FROM read_parquet({summary_urls})")
+    duckdb_con.execute(f"CREATE TABLE rolling_state AS SELECT * FROM read_parquet('{state_url}')")
+
+    # Both must have been built with the configured window mode and indicators
+    state_config = duckdb_con.execute(f"""
+        SELECT decode(value) FROM parquet_kv_metadata('{state_url}') WHERE decode(key) = 'window_mode'
+    """).fetchone()
+    if state_config is None or state_config[0] != WINDOW_MODE:
+        return "full"
+    silver_columns = {"extraction_timestamp", "coin_id", "price_usd"}
+    state_columns = {row[0] for row in duckdb_con.execute("DESCRIBE rolling_state").fetchall()}
+    summary_columns = {row[0] for row in duckdb_con.execute("DESCRIBE current_summary").fetchall()}
+    if state_columns - silver_columns != set(carry_columns(INDICATORS)) \
+            or summary_columns - silver_columns != set(output_columns(INDICATORS)):
+        return "full"
+
+    # The summary and the state are published separately, so both must end at the same watermark
+    consistent = duckdb_con.execute("""
+        SELECT (SELECT MAX(extraction_timestamp) FROM rolling_state)
+             = (SELECT MAX(extraction_timestamp) FROM current_summary)
+    """).fetchone()[0]
+    if not consistent:
+        return "full"
+
+    duckdb_con.execute("""
+        CREATE TABLE watermarks AS
+        SELECT coin_id, MAX(extraction_timestamp) as watermark FROM rolling_state GROUP BY coin_id
+    """)
+    watermarks = dict(duckdb_con.execute("SELECT coin_id, watermark FROM watermarks").fetchall())
+
+    # Late or redelivered object: its rows are behind the watermark of its coin
+    object_coin, _, object_last = _parse_snapshot(object_name)
+    if object_coin in watermarks and object_last <= watermarks[object_coin]:
+        missing_rows = duckdb_con.execute(f"""
+            SELECT COUNT(*)
+            FROM ({_silver_scan_sql([_url(filesystem, source_bucket_name, object_name)])}) silver
+            ANTI JOIN current_summary USING (coin_id, extraction_timestamp)
+        """).fetchone()[0]
+        return "duplicate" if missing_rows == 0 else "full"
+
+    # New objects: pruned by the snapshot range in their name before any file is opened
+    candidates = []
+    straddling = []
+    for candidate in _list_processed_files(filesystem, source_bucket_name):
+        coin_id, first_time, last_time = _parse_snapshot(candidate)
+        if coin_id is None or coin_id not in watermarks or last_time > watermarks[coin_id]:
+            candidates.append(_url(filesystem, source_bucket_name, candidate))
+            # A micro-batch can mix rows before and after the watermark
+            if coin_id in watermarks and first_time <= watermarks[coin_id]:
+                straddling.append(_url(filesystem, source_bucket_name, candidate))
+
+    if straddling:
+        late_rows = duckdb_con.execute(f"""
+            SELECT COUNT(*)
+            FROM ({_silver_scan_sql(straddling)}) silver
+            JOIN watermarks USING (coin_id)
+            ANTI JOIN current_summary USING (coin_id, extraction_timestamp)
+            WHERE silver.extraction_timestamp <= watermarks.watermark
+        """).fetchone()[0]
+        if late_rows:
+            return "full"
+
+    if not candidates:
+        return "duplicate"
+
+    duckdb_con.execute(f"""
+        CREATE TABLE new_rows AS
+        SELECT silver.*
+        FROM ({_silver_scan_sql(candidates)}) silver
+        LEFT JOIN watermarks USING (coin_id)
+        WHERE watermarks.watermark IS NULL OR silver.extraction_timestamp > watermarks.watermark
+    """)
+    return "incremental"
 
 @functions_framework.cloud_event
 def process_data_analyzing(cloud_event):
@@ -18,11 +284,22 @@ def process_data_analyzing(cloud_event):
         Google Cloud Storage (Object Finalize) on the Silver Bucket.
 
     Process:
-        1. Downloads ALL historical Parquet files from Silver.
-        2. Aggregates them using DuckDB.
-        3. Calculates Moving Averages (SMA) and Volatility.
+        1. Incremental mode (default): reads only the Silver files newer than each coin's
+           watermark, the current Gold summary and the per-coin rolling state (the rows
+           the windows still need + EMA/RSI carries). New rows are analyzed with their
+           windows seeded from the state, which is row-for-row identical to a full recompute.
+           Redelivered events are skipped.
+        2. Full mode (first run, late data, or GOLD_FULL_REBUILD=true): scans ALL
+           historical Parquet files from Silver in place (gcsfs range reads, no /tmp copies).
+           Compacted files are picked up transparently through the compaction manifest.
+        3. Calculates Moving Averages (SMA), Volatility and the configured indicators
+           (GOLD_INDICATORS: SMA/EMA/RSI/Bollinger at any window) in one sorted pass per coin.
+           Windows count snapshots, or span days with GOLD_WINDOW_MODE=time.
         4. Generates BUY/SELL signals.
-        5. Publishes a single 'market_summary.parquet' to the Gold Bucket.
+        5. Publishes the summary to the Gold Bucket: a full run writes a new base file, an
+           incremental run only adds a part with its new rows ('_summary_manifest.json' lists
+           the base and the parts). Also publishes the rolling state and
+           'latest_per_coin.parquet' (one row per coin) for the dashboard's metrics.
     """
     data = cloud_event.data
     source_bucket_name = data["bucket"]
@@ -30,97 +307,109 @@ def process_data_analyzing(cloud_event):
     print("🚀 Event triggered! Starting Gold Layer - Data Analysis")
     print(f"Source: gs://{source_bucket_name}/{data['name']}")
 
-    # 1. Setup Paths
-    temp_root = Path("/tmp")
-    history_dir = temp_root / "silver_history"
-    output_file = temp_root / "market_summary.parquet"
-    
-    # Clean up old run data as a fresh start
-    if history_dir.exists():
-        shutil.rmtree(history_dir)
-    history_dir.mkdir(parents=True)
+    # Compaction outputs only reorganize rows that were already analyzed
+    if not data["name"].startswith("processed/"):
+        print("⚠️ Not a new Silver snapshot. Skipping.")
+        return
+
+    duckdb_con = duckdb.connect(database=':memory:')
 
     try:
-        # 2. Download History
-        storage_client = storage.Client()
-        source_bucket = storage_client.bucket(source_bucket_name)
-
-        # List all processed files from Silver Layer
-        blobs = list(source_bucket.list_blobs(prefix="processed/"))
-
-        download_count = 0
-        for blob in blobs:
-            if blob.name.endswith(".parquet"):
-                # Using Path to get the filename
-                safe_name = Path(blob.name).name
-                destination = history_dir / safe_name
-                blob.download_to_filename(str(destination))
-                download_count += 1
-
-        print(f"✅ Downloaded {download_count} files for historical analysis.")
-
-        if download_count == 0:
-            print("⚠️ No history found. Aborting analysis.")
+        # 1. Register the object store with DuckDB
+        filesystem = _get_filesystem()
+        duckdb_con.register_filesystem(filesystem)
+
+        manifest = _load_summary_manifest(filesystem)
+        mode = _plan_incremental(duckdb_con, filesystem, source_bucket_name, data["name"], manifest)
+
+        if mode == "duplicate":
+            print("✅ No new Silver rows (duplicate event or already analyzed). Nothing to do.")
             return
 
-        # 3. Analyze (DuckDB)
-        duckdb_con = duckdb.connect(database=':memory:')
-
-        # SQL Query
-        query = f"""
-        COPY (
-            WITH base_metrics AS (
-                SELECT
-                    extraction_timestamp,
-                    coin_id,
-                    price_usd,
-
-                    -- Calculate {WINDOW_SIZE}-Day Moving Average
-                    AVG(price_usd) OVER (
-                        PARTITION BY coin_id 
-                        ORDER BY extraction_timestamp 
-                        ROWS BETWEEN {WINDOW_SIZE - 1} PRECEDING AND CURRENT ROW
-                    ) as sma_7d,
-
-                    -- Calculate Volatility
-                    STDDEV(price_usd) OVER (
-                        PARTITION BY coin_id 
-                        ORDER BY extraction_timestamp 
-                        ROWS BETWEEN {WINDOW_SIZE - 1} PRECEDING AND CURRENT ROW
-                    ) as volatility_7d
-
-                FROM read_parquet('{history_dir}/*.parquet')
-            )
-
-            SELECT
-                extraction_timestamp,
-                coin_id,
-                price_usd,
-                CAST(sma_7d AS DECIMAL(18, 2)) as sma_7d,
-                CAST(volatility_7d AS DECIMAL(18, 2)) as volatility_7d,
-
-                -- Logic aligned with Local Pipeline
-                CASE 
-                    WHEN price_usd < sma_7d AND volatility_7d > 0 THEN 'BUY'
-                    WHEN price_usd > sma_7d THEN 'SELL'
-                    ELSE 'WAIT'
-                END as signal
-
-            FROM base_metrics
-            ORDER BY extraction_timestamp DESC, coin_id
-        ) TO '{output_file}' (FORMAT PARQUET);
-        """
-
-        duckdb_con.execute(query)
-        print(f"📊 Analysis Complete. Saved to {output_file}")
-
-        # 4. Publish to Gold
-        dest_bucket = storage_client.bucket(GOLD_BUCKET_NAME)
-        # Overwrite the single file to allow dashboard view the latest state
-        dest_blob = dest_bucket.blob("analytics/market_summary.parquet")
-
-        dest_blob.upload_from_filename(str(output_file))
-        print(f"🚀 Published dashboard data: gs://{GOLD_BUCKET_NAME}/analytics/market_summary.parquet")
+        if mode == "incremental":
+            # 2a. Seed the windows with the rolling state and keep only the new rows
+            print("⚡ Incremental mode: analyzing only the new Silver rows.")
+            duckdb_con.execute("""
+                CREATE TABLE window_input AS
+                SELECT *, true as is_seed FROM rolling_state
+                UNION ALL BY NAME
+                SELECT *, false as is_seed FROM new_rows
+            """)
+            query = f"{_analyze(duckdb_con, seeded=True)} ORDER BY coin_id, extraction_timestamp"
+        else:
+            # 2b. List the Silver history (metadata only, nothing is downloaded)
+            history_files = _list_silver_files(filesystem, source_bucket_name)
+            print(f"✅ Found {len(history_files)} Silver files for historical analysis.")
+
+            if not history_files:
+                print("⚠️ No history found. Aborting analysis.")
+                return
+
+            # Only the needed columns are fetched from each file (projection pushdown)
+            duckdb_con.execute(f"""
+                CREATE TABLE window_input AS
+                SELECT *, false as is_seed FROM ({_silver_scan_sql(history_files)})
+            """)
+            query = f"{_analyze(duckdb_con, seeded=False)} ORDER BY coin_id, extraction_timestamp"
+
+        # 3. Analyze (indicator engine + DuckDB), writing straight to staging objects
+        staged_summary = _url(filesystem, GOLD_BUCKET_NAME, f"{STAGING_PREFIX}/market_summary.parquet")
+        staged_state = _url(filesystem, GOLD_BUCKET_NAME, f"{STAGING_PREFIX}/rolling_state.parquet")
+        staged_latest = _url(filesystem, GOLD_BUCKET_NAME, f"{STAGING_PREFIX}/latest_per_coin.parquet")
+        duckdb_con.execute(f"CREATE TABLE gold_summary AS {query}")
+
+        latest_source = "gold_summary"
+        if mode == "incremental":
+            # Coins without new rows keep their latest row
+            latest_url = _url(filesystem, GOLD_BUCKET_NAME, LATEST_BLOB_NAME)
+            previous_latest = f"read_parquet('{latest_url}')" if filesystem.exists(latest_url) else "current_summary"
+            latest_source = f"(SELECT * FROM gold_summary UNION ALL BY NAME SELECT * FROM {previous_latest})"
+
+            if len(manifest["parts"]) >= MAX_SUMMARY_PARTS:
+                # Fold the parts into a new base (the only full rewrite between full recomputes)
+                print(f"🧹 Folding {len(manifest['parts'])} summary parts into the base file.")
+                duckdb_con.execute("""
+                    CREATE OR REPLACE TABLE gold_summary AS
+                    SELECT * FROM (SELECT * FROM gold_summary UNION ALL BY NAME SELECT * FROM current_summary)
+                    ORDER BY coin_id, extraction_timestamp
+                """)
+                mode = "full"
+
+        duckdb_con.execute(f"""
+            COPY gold_summary TO '{staged_summary}' (FORMAT PARQUET, ROW_GROUP_SIZE {SUMMARY_ROW_GROUP_SIZE});
+        """)
+        duckdb_con.execute(f"COPY ({_latest_query(latest_source)}) TO '{staged_latest}' (FORMAT PARQUET);")
+        duckdb_con.execute(f"""
+            COPY ({_state_query()}) TO '{staged_state}' (FORMAT PARQUET, KV_METADATA {{window_mode: '{WINDOW_MODE}'}});
+        """)
+        print(f"📊 Analysis Complete. {duckdb_con.execute('SELECT COUNT(*) FROM gold_summary').fetchone()[0]} rows written.")
+
+        # 4. Publish to Gold. The manifest decides what the summary is; the state goes last, so an
+        # interrupted publish leaves the summary and the state at different watermarks, which
+        # the next run detects (full recompute)
+        manifest_url = _url(filesystem, GOLD_BUCKET_NAME, SUMMARY_MANIFEST_BLOB_NAME)
+        if mode == "incremental":
+            # Named after the new watermark: a re-run of the same rows overwrites its own part
+            last_time = duckdb_con.execute("SELECT MAX(extraction_timestamp) FROM gold_summary").fetchone()[0]
+            part = f"{SUMMARY_PARTS_PREFIX}/part_{last_time:%Y%m%d_%H%M%S}.parquet"
+            filesystem.mv(staged_summary, _url(filesystem, GOLD_BUCKET_NAME, part))
+            new_manifest = {"base": manifest["base"], "parts": manifest["parts"] + [part]}
+            filesystem.pipe(manifest_url, json.dumps(new_manifest, indent=4).encode())
+        else:
+            # The new base is complete before the manifest points to it (without the parts):
+            # readers see the old base + parts or the new base, never a mix. The replaced
+            # objects are deleted last
+            base = f"{SUMMARY_BLOB_NAME.removesuffix('.parquet')}_{datetime.now():%Y%m%d_%H%M%S_%f}.parquet"
+            filesystem.mv(staged_summary, _url(filesystem, GOLD_BUCKET_NAME, base))
+            filesystem.pipe(manifest_url, json.dumps({"base": base, "parts": []}, indent=4).encode())
+            stale = [f"{GOLD_BUCKET_NAME}/{manifest['base']}"]
+            stale += filesystem.glob(f"{GOLD_BUCKET_NAME}/{SUMMARY_PARTS_PREFIX}/*.parquet")
+            for stale_object in stale:
+                if filesystem.exists(stale_object):
+                    filesystem.rm(stale_object)
+        filesystem.mv(staged_latest, _url(filesystem, GOLD_BUCKET_NAME, LATEST_BLOB_NAME))
+        filesystem.mv(staged_state, _url(filesystem, GOLD_BUCKET_NAME, STATE_BLOB_NAME))
+        print(f"🚀 Published dashboard data: gs://{GOLD_BUCKET_NAME}/{SUMMARY_MANIFEST_BLOB_NAME}")
 
     except Exception as error:
         print(f"❌ Critical Error in Gold Layer: {error}")
@@ -128,10 +417,4 @@ def process_data_analyzing(cloud_event):
         raise error
 
     finally:
-        # 5. Cleanup
-        if history_dir.exists():
-            shutil.rmtree(history_dir)
-        if output_file.exists():
-            output_file.unlink()
-        print("🧹 Local cleanup complete.")
         duckdb_con.close()
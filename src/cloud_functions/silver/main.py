@@ -1,12 +1,140 @@
 import functions_framework
 from google.cloud import storage
+import gcsfs
 import duckdb
+import hashlib
+import json
+from datetime import datetime, timezone
 import os
+import re
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
+from typing import Tuple
 
 # --- CONFIGURATION ---
 SILVER_BUCKET_NAME = os.environ.get("SILVER_BUCKET_NAME", "crypto-silver-data")
 
+# Silver layout (shared with the local pipeline): processed/date=YYYY-MM-DD/coin_id=<coin>/<snapshot>_0.parquet
+PROCESSED_GLOB = "processed/date=*/coin_id=*/*.parquet"
+
+# Compaction: small 'processed/' files are merged into one file per partition under 'compacted/'
+COMPACTED_PREFIX = "compacted"
+COMPACTION_MANIFEST = f"{COMPACTED_PREFIX}/_manifest.json"
+COMPACTION_ROW_GROUP_SIZE = 122_880
+
+# Micro-batching: Bronze events only enqueue a 'pending/' marker; the scheduled drain
+# (process_pending_batch) transforms every pending file in one DuckDB pass
+MICRO_BATCH = os.environ.get("SILVER_MICRO_BATCH", "false").lower() == "true"
+PENDING_PREFIX = "pending"
+# One object per Bronze file already transformed (value: the batch that wrote it)
+LEDGER_PREFIX = "_ledger"
+MAX_BATCH_FILES = int(os.environ.get("SILVER_MAX_BATCH_FILES", 500))
+SNAPSHOT_PATTERN = re.compile(r"raw_prices_(\d{8}_\d{6})")
+
+# Dead letters: corrupt or schema-violating Bronze files are copied to 'quarantine/' and
+# indexed with the reason ('quarantine/_index/<file>.json'). Their events are then
+# acknowledged instead of failing and being retried; process_quarantine_reprocess retries them.
+QUARANTINE_PREFIX = "quarantine"
+QUARANTINE_INDEX_PREFIX = f"{QUARANTINE_PREFIX}/_index"
+# Content-hash dedup (same key as the local pipeline: the SHA-256 of the Bronze file). One
+# marker per distinct snapshot ('_hashes/<sha256>.json', value: the first file with that
+# content); a file whose content is already marked by another file adds no rows. Expired after
+# 7 days by a bucket lifecycle rule (infra/storage.tf).
+HASH_PREFIX = "_hashes"
+# The Bronze ingestion's own dedup markers, written to the triggering bucket
+BRONZE_HASH_PREFIX = "_hashes"
+# Coin metrics must be JSON numbers (or null): anything else is a schema violation
+NUMERIC_JSON_TYPES = ("BIGINT", "UBIGINT", "DOUBLE", "NULL")
+
+# Shape of a Bronze snapshot: {"<coin_id>": {"usd": ..., "usd_market_cap": ..., "usd_24h_vol": ...}, ...}
+# Read as one MAP per file, so any set of coins is handled without a column per coin.
+BRONZE_JSON_TYPE = "MAP(VARCHAR, STRUCT(usd DOUBLE, usd_market_cap DOUBLE, usd_24h_vol DOUBLE))"
+
+def _snapshot_timestamp_sql(filename: str, parse: str = "strptime") -> str:
+    """
+    SQL expression of the snapshot timestamp in a Bronze file name (raw_prices_YYYYMMDD_HHMMSS).
+    """
+    return f"{parse}(regexp_extract({filename}, '{SNAPSHOT_PATTERN.pattern}', 1), '%Y%m%d_%H%M%S')"
+
+def _invalid_snapshots_query(source: str) -> str:
+    """
+    Returns (filename, reason) for the snapshots of 'source' (filename, json) that can't be
+    transformed: no valid snapshot timestamp in the name, malformed JSON, not an object of coin
+    metrics, or non-numeric metrics (they would silently become NULL).
+    """
+    metric_types = ", ".join(
+        f"json_type(json, '$.*.{metric}')" for metric in ("usd", "usd_market_cap", "usd_24h_vol")
+    )
+    return f"""
+        SELECT filename, reason
+        FROM (
+            SELECT
+                filename,
+                CASE
+                    WHEN {_snapshot_timestamp_sql("filename", "try_strptime")} IS NULL THEN 'invalid snapshot file name'
+                    WHEN json IS NULL OR NOT json_valid(json) THEN 'malformed JSON'
+                    WHEN json_type(json) != 'OBJECT'
+                      OR list_filter(json_type(json, '$.*'), metric_type -> metric_type != 'OBJECT') != []
+                        THEN 'expected an object of coin metrics'
+                    WHEN list_filter(list_concat({metric_types}), value_type -> value_type NOT IN {NUMERIC_JSON_TYPES}) != []
+                        THEN 'non-numeric coin metrics'
+                END as reason
+            FROM {source}
+        )
+        WHERE reason IS NOT NULL
+        ORDER BY filename
+    """
+
+def _quarantine_entry(source_bucket_name: str, reason: str) -> bytes:
+    """
+    Returns the index object of a quarantined Bronze file.
+    """
+    return json.dumps({
+        "bucket": source_bucket_name,
+        "reason": reason,
+        "quarantined_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }).encode()
+
+def _hash_marker_entry(file_name: str) -> bytes:
+    """
+    Content of a '_hashes/' marker: the Bronze file whose rows hold that content.
+    """
+    return json.dumps({"file": file_name}).encode()
+
+def _unpivot_query(source: str) -> str:
+    """
+    Returns the Bronze -> Silver transform over 'source', any relation with one row per
+    snapshot: (filename, json).
+
+    Each file is parsed into a single MAP value and unnested (Wide -> Long) in one vectorized
+    pass, whatever the number of coins.
+    """
+    return f"""
+        WITH raw_data AS (
+            SELECT
+                filename,
+                json_transform(json, '"{BRONZE_JSON_TYPE}"') as coins
+            FROM {source}
+        ),
+        unpivoted_data AS (
+            SELECT filename, unnest(map_entries(coins)) as entry
+            FROM raw_data
+        ),
+        cleaned_data AS (
+            SELECT
+                {_snapshot_timestamp_sql("filename")} as extraction_timestamp,
+                entry.key as coin_id,
+                CAST(entry.value.usd AS DECIMAL(18, 2)) as price_usd,
+                CAST(entry.value.usd_market_cap AS DECIMAL(24, 2)) as market_cap,
+                CAST(entry.value.usd_24h_vol AS DECIMAL(24, 2)) as volume_24h
+            FROM unpivoted_data
+        )
+        -- Hive partition columns (written as folders, not stored in the files)
+        SELECT *, CAST(extraction_timestamp AS DATE) as date
+        FROM cleaned_data
+    """
+
 @functions_framework.cloud_event
 def process_data_cleaning(cloud_event):
     """
@@ -16,10 +144,16 @@ def process_data_cleaning(cloud_event):
         Google Cloud Storage (Object Finalize) on the Bronze Bucket.
 
     Process:
-        1. Downloads the new JSON file from Bronze.
-        2. Uses DuckDB to UNPIVOT the data (Wide -> Long format).
-        3. Enforces Schema (Bitcoin, Ethereum, Solana, Cardano).
-        4. Saves the result as Parquet in the Silver Bucket.
+        1. Downloads the new JSON file from Bronze into memory. A file with the same content
+           hash as a snapshot already transformed is skipped.
+        2. Uses DuckDB to UNPIVOT the data (Wide -> Long format) for whatever coins the
+           snapshot contains (e.g. added through the Bronze '?coins=' override).
+        3. Enforces the metric types (DECIMAL prices, market caps and volumes).
+        4. Writes one Parquet buffer per partition and uploads it to the Silver Bucket
+           (processed/date=YYYY-MM-DD/coin_id=<coin>/). Nothing touches /tmp.
+
+    With SILVER_MICRO_BATCH=true, the event only enqueues the file; the transform happens in
+    'process_pending_batch'.
     """
     data = cloud_event.data
 
@@ -27,6 +161,10 @@ def process_data_cleaning(cloud_event):
     file_name = data["name"]
     source_bucket_name = data["bucket"]
 
+    # One Bronze dedup marker lands next to every snapshot: nothing to transform
+    if file_name.startswith(f"{BRONZE_HASH_PREFIX}/"):
+        return
+
     print("🚀 Event triggered! Starting Silver Layer - Data Cleaning")
     print(f"Source: gs://{source_bucket_name}/{file_name}")
 
@@ -34,80 +172,507 @@ def process_data_cleaning(cloud_event):
         print("⚠️ Not a JSON file. Skipping.")
         return
 
-    # 2. Setup Paths
-    temp_dir = Path("/tmp")
-    local_input_path = temp_dir / file_name
+    if MICRO_BATCH:
+        _enqueue_bronze_file(_get_filesystem(), source_bucket_name, file_name)
+        return
 
-    # Create output filename: raw_prices_2026...json -> raw_prices_2026...parquet
-    safe_filename = Path(file_name).with_suffix('.parquet').name
-    local_output_path = temp_dir / safe_filename
+    _transform_bronze_file(source_bucket_name, file_name)
 
-    # 3. Download
-    storage_client = storage.Client()
+def _transform_bronze_file(source_bucket_name: str, file_name: str) -> None:
+    """
+    Transforms one Bronze snapshot into its Silver partitions, or quarantines it if it is
+    corrupt (the event is then acknowledged: retrying can't fix the file).
+    """
+    storage_client = _get_storage_client()
+    dest_bucket = storage_client.bucket(SILVER_BUCKET_NAME)
+    index_blob = dest_bucket.blob(f"{QUARANTINE_INDEX_PREFIX}/{file_name}.json")
+    if index_blob.exists():
+        print(f"🚧 {file_name} is quarantined. Skipping.")
+        return
+
+    # 2. Download straight into memory (no /tmp copy: /tmp is RAM-backed on Cloud Functions)
     source_bucket = storage_client.bucket(source_bucket_name)
     source_blob = source_bucket.blob(file_name)
+    snapshot_bytes = source_blob.download_as_bytes()
+    try:
+        snapshot_json = snapshot_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        snapshot_json = None
+    if snapshot_json is not None:
+        print(f"✅ Downloaded {len(snapshot_json):,} characters")
+
+    # Same content as a snapshot already transformed (a cached API response or a replay).
+    # The marker is written last, so it also covers a redelivered event for this very file:
+    # its partitions may have been compacted since, rewriting them would duplicate the rows.
+    hash_blob = dest_bucket.blob(f"{HASH_PREFIX}/{hashlib.sha256(snapshot_bytes).hexdigest()}.json")
+    if hash_blob.exists():
+        original = json.loads(hash_blob.download_as_bytes())["file"]
+        if original == file_name:
+            print(f"♻️ {file_name} was already transformed (redelivered event). Skipping.")
+        else:
+            print(f"♻️ {file_name} is identical to {original} (same content hash). Skipping.")
+        return
 
-    # Using str(path_obj) since GCS library expects a string
-    source_blob.download_to_filename(str(local_input_path))
-    print(f"✅ Downloaded to {local_input_path}")
+    # Output: raw_prices_2026...json -> date=.../coin_id=.../raw_prices_2026..._0.parquet
+    snapshot_name = Path(file_name).stem
 
-    # 4. Transform (DuckDB)
+    # 3. Transform (DuckDB) into an Arrow table sorted by partition
     duckdb_con = duckdb.connect(database=':memory:')
 
-    query = f"""
-        COPY (
-            WITH raw_data AS (
-                SELECT * FROM read_json('{local_input_path}',
-                    columns={{
-                        'bitcoin': 'STRUCT(usd DOUBLE, usd_market_cap DOUBLE, usd_24h_vol DOUBLE)',
-                        'ethereum': 'STRUCT(usd DOUBLE, usd_market_cap DOUBLE, usd_24h_vol DOUBLE)',
-                        'solana': 'STRUCT(usd DOUBLE, usd_market_cap DOUBLE, usd_24h_vol DOUBLE)',
-                        'cardano': 'STRUCT(usd DOUBLE, usd_market_cap DOUBLE, usd_24h_vol DOUBLE)',
-                    }},
-                    filename=True
-                )
-            ),
-            unpivoted_data AS (
-                UNPIVOT raw_data
-                ON bitcoin, ethereum, solana, cardano
-                INTO NAME coin_id VALUE metrics
+    try:
+        # The snapshot is bound as a query parameter: parsed by DuckDB, never written anywhere
+        snapshot = "(SELECT $filename as filename, $json as json)"
+        params = {"filename": file_name, "json": snapshot_json}
+        invalid = duckdb_con.execute(_invalid_snapshots_query(snapshot), params).fetchall()
+        if invalid:
+            reason = invalid[0][1]
+            source_bucket.copy_blob(source_blob, dest_bucket, f"{QUARANTINE_PREFIX}/{file_name}")
+            index_blob.upload_from_string(_quarantine_entry(source_bucket_name, reason), content_type="application/json")
+            print(f"🚧 Quarantined corrupt file {file_name}: {reason}")
+            return
+
+        silver_table = duckdb_con.execute(f"""
+            SELECT * FROM ({_unpivot_query(snapshot)})
+            ORDER BY date, coin_id
+        """, params).arrow().read_all()
+        print(f"✅ Transformation Complete. {silver_table.num_rows} rows.")
+
+        # 4. Upload to Silver: one Parquet buffer per partition, uploaded as soon as it is written
+        for partition, partition_table in _split_partitions(silver_table):
+            # Putting the processed files in a 'processed/' to keep bucket clean
+            dest_blob_name = f"processed/{partition}/{snapshot_name}_0.parquet"
+            buffer = pa.BufferOutputStream()
+            pq.write_table(partition_table, buffer)
+
+            dest_bucket.blob(dest_blob_name).upload_from_string(
+                buffer.getvalue().to_pybytes(), content_type="application/octet-stream"
             )
-            SELECT
-                strptime(
-                    regexp_extract(filename, 'raw_prices_(\\d{{8}}_\\d{{6}})', 1),
-                    '%Y%m%d_%H%M%S'
-                ) as extraction_timestamp,
-                coin_id,
-                CAST(metrics.usd AS DECIMAL(18, 2)) as price_usd,
-                CAST(metrics.usd_market_cap AS DECIMAL(24, 2)) as market_cap,
-                CAST(metrics.usd_24h_vol AS DECIMAL(24, 2)) as volume_24h
-            FROM unpivoted_data
-        ) TO '{local_output_path}' (FORMAT PARQUET);
+            print(f"💾 Uploaded to gs://{SILVER_BUCKET_NAME}/{dest_blob_name}")
+
+        # Marker last: the content only counts as transformed once its rows are durable
+        hash_blob.upload_from_string(_hash_marker_entry(file_name), content_type="application/json")
+
+    except Exception as error:
+        print(f"❌ DuckDB Transformation Error: {error}")
+        # Re-raise the error to stop the pipeline
+        raise error
+
+    finally:
+        duckdb_con.close()
+
+def _split_partitions(table: pa.Table):
+    """
+    Yields ('date=YYYY-MM-DD/coin_id=<coin>', rows) for a table sorted by (date, coin_id).
+
+    The partition columns are dropped from the rows: like DuckDB's PARTITION_BY, they only
+    live in the object names.
     """
+    keys = list(zip(table.column("date").to_pylist(), table.column("coin_id").to_pylist()))
+    rows = table.drop_columns(["date", "coin_id"])
+    start = 0
+    for end in range(1, len(keys) + 1):
+        if end == len(keys) or keys[end] != keys[start]:
+            partition_date, coin_id = keys[start]
+            yield f"date={partition_date.isoformat()}/coin_id={coin_id}", rows.slice(start, end - start)
+            start = end
+
+
+_storage_client = None
+
+def _get_storage_client():
+    """
+    Returns the GCS client, created once per instance and reused by warm invocations.
+    """
+    global _storage_client
+    if _storage_client is None:
+        _storage_client = storage.Client()
+    return _storage_client
+
+_filesystem = None
+
+def _get_filesystem():
+    """
+    Returns the fsspec filesystem used by the compaction and micro-batch jobs (gcsfs in
+    production), created once per instance and reused by warm invocations.
+    """
+    global _filesystem
+    if _filesystem is None:
+        _filesystem = gcsfs.GCSFileSystem()
+    return _filesystem
+
+def _load_compaction_manifest(filesystem, manifest_url: str) -> dict:
+    """
+    Loads the compaction manifest, or returns an empty one before the first compaction.
+
+    Manifest fields:
+        generation: Incremented by every compaction run.
+        files: Live compacted objects (readers use these instead of the merged sources).
+        tombstones: Objects merged/replaced by the latest run. Readers must ignore them;
+                    they are only deleted by the NEXT run, so a reader holding the previous
+                    manifest can still finish its scan.
+    """
+    if not filesystem.exists(manifest_url):
+        return {"generation": 0, "files": [], "tombstones": []}
+    return json.loads(filesystem.cat(manifest_url))
+
+@functions_framework.http
+def process_data_compaction(request) -> Tuple[str, int]:
+    """
+    Merges the one-file-per-snapshot Silver objects into one Parquet file per partition.
+
+    Trigger:
+        HTTP Request (Cloud Scheduler).
+
+    Process:
+        1. Deletes the tombstones left by the previous run (their grace period is over).
+        2. Lists the small 'processed/' files and groups them by partition (date, coin_id).
+           Outputs of a micro-batch that is still claimed in 'pending/' are left for a later
+           run: its re-run rewrites them, which must not bring back rows already compacted.
+        3. Rewrites every touched partition (existing compacted file + new files) as
+           'compacted/date=YYYY-MM-DD/coin_id=<coin>/part-<generation>.parquet', sorted by
+           timestamp, with large row groups.
+        4. Publishes the new manifest in a single object write (the atomic swap).
+
+    Returns:
+        tuple: ("Success Message", 200) on success.
+    """
+    print("🚀 Starting Silver Layer - Compaction")
+
+    filesystem = _get_filesystem()
+    bucket_root = f"{SILVER_BUCKET_NAME}/"
+    manifest_url = filesystem.unstrip_protocol(bucket_root + COMPACTION_MANIFEST)
+    manifest = _load_compaction_manifest(filesystem, manifest_url)
+
+    duckdb_con = duckdb.connect(database=':memory:')
 
     try:
-        duckdb_con.execute(query)
-        print(f"✅ Transformation Complete. Saved to {local_output_path}")
+        # 1. Garbage-collect the previous run's tombstones
+        for object_name in manifest["tombstones"]:
+            if filesystem.exists(bucket_root + object_name):
+                filesystem.rm(bucket_root + object_name)
+        manifest["tombstones"] = []
+
+        # 2. Small files waiting to be compacted, grouped by partition folder
+        small_files = sorted(
+            path.lstrip("/")[len(bucket_root):] for path in filesystem.glob(bucket_root + PROCESSED_GLOB)
+        )
+        # Listed after the objects: a batch claimed later only writes objects not listed above
+        claimed = {
+            json.loads(filesystem.cat(path.lstrip("/")))["batch"]
+            for path in filesystem.glob(f"{bucket_root}{PENDING_PREFIX}/*.json")
+        } - {None}
+        small_files = [
+            name for name in small_files if not any(name.rsplit("/", 1)[1].startswith(f"{batch}_") for batch in claimed)
+        ]
+        if not small_files:
+            filesystem.pipe(manifest_url, json.dumps(manifest, indent=4).encode())
+            print("✅ Nothing to compact.")
+            return "Success: nothing to compact", 200
+
+        touched_partitions = {}
+        for object_name in small_files:
+            # processed/date=.../coin_id=.../file.parquet -> date=.../coin_id=...
+            partition = object_name.split("/", 1)[1].rsplit("/", 1)[0]
+            touched_partitions.setdefault(partition, []).append(object_name)
+
+        duckdb_con.register_filesystem(filesystem)
+
+        # 3. Rewrite every touched partition
+        generation = manifest["generation"] + 1
+        replaced = []
+        new_files = []
+        for partition, partition_files in sorted(touched_partitions.items()):
+            existing = [name for name in manifest["files"] if name.startswith(f"{COMPACTED_PREFIX}/{partition}/")]
+            object_name = f"{COMPACTED_PREFIX}/{partition}/part-{generation:05d}.parquet"
+            sources = [filesystem.unstrip_protocol(bucket_root + name) for name in existing + partition_files]
+
+            # The partition columns live in the object names, not in the files
+            duckdb_con.execute(f"""
+                COPY (
+                    SELECT * FROM read_parquet({sources}, hive_partitioning = false)
+                    ORDER BY extraction_timestamp
+                ) TO '{filesystem.unstrip_protocol(bucket_root + object_name)}'
+                (FORMAT PARQUET, ROW_GROUP_SIZE {COMPACTION_ROW_GROUP_SIZE})
+            """)
+            replaced.extend(existing)
+            new_files.append(object_name)
 
-        # 5. Upload to Silver
-        dest_bucket = storage_client.bucket(SILVER_BUCKET_NAME)
-        # Putting the processed files in a 'processed/' to keep bucket clean
-        dest_blob_name = f"processed/{safe_filename}"
-        dest_blob = dest_bucket.blob(dest_blob_name)
+        # 4. Atomic swap: one object write publishes the new layout
+        replaced_names = set(replaced)
+        manifest = {
+            "generation": generation,
+            "files": [name for name in manifest["files"] if name not in replaced_names] + new_files,
+            "tombstones": small_files + replaced,
+        }
+        filesystem.pipe(manifest_url, json.dumps(manifest, indent=4).encode())
 
-        dest_blob.upload_from_filename(str(local_output_path))
-        print(f"💾 Uploaded to gs://{SILVER_BUCKET_NAME}/{dest_blob_name}")
+        print(f"✅ Compacted {len(small_files)} files into {len(new_files)} partitions (generation {generation}).")
+        return f"Success: compacted {len(small_files)} files", 200
 
     except Exception as error:
-        print(f"❌ DuckDB Transformation Error: {error}")
+        print(f"❌ Compaction Error: {error}")
         # Re-raise the error to stop the pipeline
         raise error
 
     finally:
-        # 6. Cleanup using pathlib's unlink
-        if local_input_path.exists():
-            local_input_path.unlink()
-        if local_output_path.exists():
-            local_output_path.unlink()
-        print("🧹 Cleanup complete.")
         duckdb_con.close()
+
+
+def _batch_name(file_names: list) -> str:
+    """
+    Deterministic output name for a batch: re-running the same files overwrites the same objects.
+
+    The name keeps the 'raw_prices_<first>_to_<last>' snapshot range, which Gold uses to skip
+    objects that are older than its watermark.
+    """
+    timestamps = sorted(SNAPSHOT_PATTERN.search(file_name).group(1) for file_name in file_names)
+    digest = hashlib.sha1("\n".join(sorted(file_names)).encode()).hexdigest()[:8]
+    return f"raw_prices_{timestamps[0]}_to_{timestamps[-1]}_{digest}"
+
+def _enqueue_bronze_file(filesystem, source_bucket_name: str, file_name: str) -> None:
+    """
+    Records a Bronze file as pending. Redelivered events (already pending or already
+    transformed) are ignored, so nothing is ever transformed twice.
+    """
+    bucket_root = f"{SILVER_BUCKET_NAME}/"
+    if not SNAPSHOT_PATTERN.search(file_name):
+        print(f"⚠️ {file_name} has no snapshot timestamp. Skipping.")
+        return
+
+    if filesystem.exists(f"{bucket_root}{LEDGER_PREFIX}/{file_name}") or filesystem.exists(f"{bucket_root}{PENDING_PREFIX}/{file_name}"):
+        print(f"✅ {file_name} is already queued or transformed (duplicate event). Nothing to do.")
+        return
+
+    if filesystem.exists(f"{bucket_root}{QUARANTINE_INDEX_PREFIX}/{file_name}.json"):
+        print(f"🚧 {file_name} is quarantined. Skipping.")
+        return
+
+    filesystem.pipe(
+        f"{bucket_root}{PENDING_PREFIX}/{file_name}",
+        json.dumps({"bucket": source_bucket_name, "batch": None}).encode()
+    )
+    print(f"📥 Queued {file_name} for the next micro-batch.")
+
+@functions_framework.http
+def process_pending_batch(request) -> Tuple[str, int]:
+    """
+    Transforms every pending Bronze file in micro-batches (one DuckDB pass per batch).
+
+    Trigger:
+        HTTP Request (Cloud Scheduler, every minute).
+
+    Process:
+        1. Lists the 'pending/' markers written by the Bronze events.
+        2. Claims up to MAX_BATCH_FILES unclaimed files per batch by writing the batch name
+           into their markers. Batches claimed by an interrupted run are re-run with exactly
+           the same files.
+        3. Reads the batch's Bronze files in place and writes one Parquet file per partition
+           (processed/date=.../coin_id=.../<batch>_0.parquet), overwriting any partial output.
+           Partitions whose object compaction already merged are not rewritten.
+           Files whose content hash is already marked (by an earlier file) add no rows.
+        4. Records the content hashes and every file in the ledger, then removes its marker.
+
+    Returns:
+        tuple: ("Success Message", 200) on success.
+    """
+    print("🚀 Starting Silver Layer - Micro-batch")
+
+    filesystem = _get_filesystem()
+    bucket_root = f"{SILVER_BUCKET_NAME}/"
+
+    # 1. Pending files, split into already-claimed batches and new files
+    claimed_batches = {}
+    unclaimed = []
+    for path in sorted(filesystem.glob(f"{bucket_root}{PENDING_PREFIX}/*.json")):
+        marker = path.lstrip("/")
+        file_name = marker.rsplit("/", 1)[1]
+        entry = json.loads(filesystem.cat(marker))
+
+        # A claimed file stays in its batch even if already in the ledger: the re-run must
+        # rewrite the batch's objects with exactly the same rows
+        if entry["batch"]:
+            claimed_batches.setdefault(entry["batch"], []).append((file_name, entry["bucket"]))
+        elif filesystem.exists(f"{bucket_root}{LEDGER_PREFIX}/{file_name}"):
+            filesystem.rm(marker)
+        else:
+            unclaimed.append((file_name, entry["bucket"]))
+
+    # 2. Claim the new files
+    batches = list(claimed_batches.items())
+    for start in range(0, len(unclaimed), MAX_BATCH_FILES):
+        batch_files = unclaimed[start:start + MAX_BATCH_FILES]
+        batch = _batch_name([file_name for file_name, _ in batch_files])
+        for file_name, source_bucket_name in batch_files:
+            filesystem.pipe(
+                f"{bucket_root}{PENDING_PREFIX}/{file_name}",
+                json.dumps({"bucket": source_bucket_name, "batch": batch}).encode()
+            )
+        batches.append((batch, batch_files))
+
+    if not batches:
+        print("✅ No pending Bronze files.")
+        return "Success: no pending files", 200
+
+    duckdb_con = duckdb.connect(database=':memory:')
+
+    try:
+        duckdb_con.register_filesystem(filesystem)
+        output_url = filesystem.unstrip_protocol(f"{bucket_root}processed")
+        compacted = set(_load_compaction_manifest(filesystem, f"{bucket_root}{COMPACTION_MANIFEST}")["tombstones"])
+
+        for batch, batch_files in batches:
+            # 3. One pass over the whole batch, straight from and to the buckets. The files
+            # are read once; corrupt ones are quarantined instead of failing the whole batch
+            # (a re-run finds the same ones, so the batch's output stays the same)
+            input_urls = [
+                filesystem.unstrip_protocol(f"{source_bucket_name}/{file_name}")
+                for file_name, source_bucket_name in batch_files
+            ]
+            # Read as bytes and decoded per file: read_text() fails the whole batch on one
+            # non-UTF-8 file, while a NULL here is quarantined as malformed JSON
+            duckdb_con.execute(f"""
+                CREATE OR REPLACE TEMP TABLE batch_snapshots AS
+                SELECT filename, try(decode(content)) as json FROM read_blob({input_urls})
+            """)
+            invalid = {
+                filename.rsplit("/", 1)[1]: reason
+                for filename, reason in duckdb_con.execute(_invalid_snapshots_query("batch_snapshots")).fetchall()
+            }
+            for file_name, source_bucket_name in batch_files:
+                if file_name in invalid:
+                    filesystem.copy(f"{source_bucket_name}/{file_name}", f"{bucket_root}{QUARANTINE_PREFIX}/{file_name}")
+                    filesystem.pipe(
+                        f"{bucket_root}{QUARANTINE_INDEX_PREFIX}/{file_name}.json",
+                        _quarantine_entry(source_bucket_name, invalid[file_name])
+                    )
+                    print(f"🚧 Quarantined corrupt file {file_name}: {invalid[file_name]}")
+
+            duckdb_con.execute(f"""
+                DELETE FROM batch_snapshots
+                WHERE filename IN (SELECT filename FROM ({_invalid_snapshots_query("batch_snapshots")}))
+            """)
+
+            # Content-hash dedup, within the batch and against earlier snapshots. A marker
+            # naming a file of this batch comes from an interrupted run of the same batch
+            batch_names = {file_name for file_name, _ in batch_files}
+            first_files, duplicates = {}, {}
+            for filename, digest in duckdb_con.execute(
+                "SELECT filename, sha256(json) FROM batch_snapshots ORDER BY filename"
+            ).fetchall():
+                file_name = filename.rsplit("/", 1)[1]
+                marker = f"{bucket_root}{HASH_PREFIX}/{digest}.json"
+                original = first_files.get(digest)
+                if original is None and filesystem.exists(marker):
+                    original = json.loads(filesystem.cat(marker))["file"]
+                    if original in batch_names:
+                        original = None
+                if original:
+                    duplicates[filename] = original
+                    print(f"♻️ {file_name} is identical to {original} (same content hash). Skipping.")
+                else:
+                    first_files[digest] = file_name
+            if duplicates:
+                duckdb_con.execute(
+                    "DELETE FROM batch_snapshots WHERE list_contains($duplicates, filename)",
+                    {"duplicates": list(duplicates)}
+                )
+
+            # A re-run must not rewrite objects compaction already merged (and tombstoned):
+            # they would come back as new small files, duplicating their rows
+            merged_partitions = [
+                name.split("/", 1)[1].rsplit("/", 1)[0]
+                for name in compacted
+                if name.startswith("processed/") and name.endswith(f"/{batch}_0.parquet")
+            ]
+            if merged_partitions:
+                print(f"♻️ Batch {batch}: {len(merged_partitions)} partitions already compacted. Not rewritten.")
+
+            if len(invalid) + len(duplicates) < len(batch_files):
+                duckdb_con.execute(f"""
+                    COPY (
+                        SELECT * FROM ({_unpivot_query("batch_snapshots")})
+                        WHERE NOT list_contains($merged, 'date=' || CAST(date AS VARCHAR) || '/coin_id=' || coin_id)
+                    ) TO '{output_url}' (
+                        FORMAT PARQUET,
+                        PARTITION_BY (date, coin_id),
+                        FILENAME_PATTERN '{batch}_{{i}}',
+                        OVERWRITE_OR_IGNORE true
+                    );
+                """, {"merged": merged_partitions})
+
+            # 4. Hash markers and ledger first: a pending marker is only removed once its rows
+            # are durable (duplicates are in the ledger too, with no rows of their own)
+            for digest, file_name in first_files.items():
+                filesystem.pipe(f"{bucket_root}{HASH_PREFIX}/{digest}.json", _hash_marker_entry(file_name))
+            for file_name, _ in batch_files:
+                if file_name not in invalid:
+                    filesystem.pipe(f"{bucket_root}{LEDGER_PREFIX}/{file_name}", batch.encode())
+                filesystem.rm(f"{bucket_root}{PENDING_PREFIX}/{file_name}")
+            print(
+                f"💾 Batch {batch}: {len(batch_files) - len(invalid) - len(duplicates)} Bronze files transformed, "
+                f"{len(duplicates)} duplicates skipped."
+            )
+
+        file_count = sum(len(batch_files) for _, batch_files in batches)
+        print(f"✅ Micro-batch complete: {file_count} files in {len(batches)} batches.")
+        return f"Success: processed {file_count} files in {len(batches)} batches", 200
+
+    except Exception as error:
+        print(f"❌ Micro-batch Error: {error}")
+        # Re-raise the error so the scheduler retries (claimed batches are re-run as-is)
+        raise error
+
+    finally:
+        duckdb_con.close()
+
+@functions_framework.http
+def process_quarantine_reprocess(request) -> Tuple[str, int]:
+    """
+    Sends quarantined Bronze files back through the Silver transform (e.g. after fixing them
+    in Bronze, or after a parser fix).
+
+    Trigger:
+        HTTP Request (manual: 'gcloud functions call silver-reprocessing-func', optionally
+        with '{"files": ["raw_prices_....json"]}' to pick files).
+
+    Process:
+        1. Lists the quarantine index (every entry, or the requested files).
+        2. Removes each entry and its quarantined copy.
+        3. Re-queues the file (SILVER_MICRO_BATCH) or transforms it right away. A file that
+           is still corrupt is quarantined again.
+
+    Returns:
+        tuple: ("Success Message", 200) on success.
+    """
+    print("🚀 Starting Silver Layer - Quarantine Reprocessing")
+
+    filesystem = _get_filesystem()
+    bucket_root = f"{SILVER_BUCKET_NAME}/"
+    requested = (request.get_json(silent=True) or {}).get("files")
+
+    reprocessed = []
+    try:
+        for path in sorted(filesystem.glob(f"{bucket_root}{QUARANTINE_INDEX_PREFIX}/*.json")):
+            index_object = path.lstrip("/")
+            file_name = index_object.rsplit("/", 1)[1][:-len(".json")]
+            if requested is not None and file_name not in requested:
+                continue
+
+            source_bucket_name = json.loads(filesystem.cat(index_object))["bucket"]
+            filesystem.rm(index_object)
+            if filesystem.exists(f"{bucket_root}{QUARANTINE_PREFIX}/{file_name}"):
+                filesystem.rm(f"{bucket_root}{QUARANTINE_PREFIX}/{file_name}")
+
+            if MICRO_BATCH:
+                _enqueue_bronze_file(filesystem, source_bucket_name, file_name)
+            else:
+                _transform_bronze_file(source_bucket_name, file_name)
+            reprocessed.append(file_name)
+
+        print(f"✅ Reprocessed {len(reprocessed)} quarantined files.")
+        return f"Success: reprocessed {len(reprocessed)} files", 200
+
+    except Exception as error:
+        print(f"❌ Quarantine Reprocessing Error: {error}")
+        # Re-raise the error so the call can be retried (entries not reached are kept)
+        raise error
@@ -1,9 +1,12 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+import duckdb
+import gcsfs
+import json
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from google.cloud import storage
-import io
+from downsample import CHART_POINTS, downsample_frame
 
 # CONFIGURATION:
 ST_PAGE_TITLE = "Crypto Strategy Command Center"
@@ -16,87 +19,315 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Path that points to: /Users/<NAME>/Developer/crypto-project/data/gold/analyzed_market_summary.parquet file
 LOCAL_GOLD_PATH = BASE_DIR / "data" / "gold" / "analyzed_market_summary.parquet"
+# The local summary is the base file + the incremental parts listed in this manifest
+LOCAL_SUMMARY_MANIFEST_PATH = BASE_DIR / "data" / "gold" / "_summary_manifest.json"
+# Latest Gold row per coin (published by the Gold layer next to the summary)
+LOCAL_LATEST_PATH = BASE_DIR / "data" / "gold" / "latest_per_coin.parquet"
+# OHLCV bars maintained by the Silver rollup stage (src/pipeline/silver/rollup.py)
+LOCAL_BARS_DIR = BASE_DIR / "data" / "silver" / "bars"
+LOCAL_BARS_MANIFEST_PATH = LOCAL_BARS_DIR / "_manifest.json"
+# Rollup resolutions, coarsest first (same names as rollup.RESOLUTIONS)
+BAR_RESOLUTIONS = {"1d": 86_400, "1h": 3_600, "1m": 60}
+# Rows averaged by 'sma_7d' (same window as Gold's, indicators.WINDOW_SIZE)
+SMA_WINDOW = 7
 
 # Cloud paths
 CLOUD_BUCKET_NAME = "crypto-gold-crypto-platform-carlo-2026"
 CLOUD_BLOB_NAME = "analytics/market_summary.parquet"
+# The cloud summary is the base file + the incremental parts listed in this manifest
+CLOUD_SUMMARY_MANIFEST_BLOB_NAME = "analytics/_summary_manifest.json"
+CLOUD_LATEST_BLOB_NAME = "analytics/latest_per_coin.parquet"
+
+# Chart window shown on first load (ending at the coin's latest snapshot)
+DEFAULT_RANGE_DAYS = 30
+# The local Gold layer keeps the Silver snapshot ids ("20260114_120000") as timestamps
+LOCAL_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
 
 # Setup page
 st.set_page_config(page_title=ST_PAGE_TITLE, layout="wide")
 st.title(f"📊 {ST_PAGE_TITLE}")
 
 # Data Loader
-@st.cache_data(ttl=600) # Clear cache every 10 minutes for live data
-def load_data():
+@st.cache_resource
+def get_filesystem():
+    """
+    Returns the gcsfs filesystem (CLOUD mode), shared by every session.
+    """
+    return gcsfs.GCSFileSystem()
+
+@st.cache_resource
+def get_duckdb():
+    """
+    Returns the DuckDB connection shared by every session. In CLOUD mode it reads the Gold
+    bucket in place through gcsfs (range reads: footers + the row groups a query needs).
+    """
+    duckdb_con = duckdb.connect(database=':memory:')
+    if DATA_SOURCE == "CLOUD":
+        duckdb_con.register_filesystem(get_filesystem())
+    return duckdb_con
+
+def gold_url(local_path: Path, blob_name: str) -> str:
+    """
+    Returns the DuckDB-readable location of a Gold artifact based on DATA_SOURCE toggle.
+    """
+    if DATA_SOURCE == "LOCAL":
+        return str(local_path)
+    return f"gs://{CLOUD_BUCKET_NAME}/{blob_name}"
+
+def gold_version(local_path: Path, blob_name: str):
+    """
+    Returns a token that changes whenever the Gold artifact is rewritten, or None if it
+    doesn't exist. Metadata only: the file's mtime + size, or the object's generation.
+
+    The loaders below take it as an argument, so their cache entries are reused until Gold
+    actually publishes something new (no fixed TTL, no periodic re-download).
+    """
+    if DATA_SOURCE == "LOCAL":
+        if not local_path.exists():
+            return None
+        stat = local_path.stat()
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    filesystem = get_filesystem()
+    url = gold_url(local_path, blob_name)
+    # Bypass the listing cache: this call is the freshness check
+    filesystem.invalidate_cache(url)
+    try:
+        info = filesystem.info(url)
+    except FileNotFoundError:
+        return None
+    return str(info.get("generation") or info.get("etag") or f"{info.get('updated')}-{info.get('size')}")
+
+def summary_source() -> str:
     """
-    Loads Gold Layer data based on DATA_SOURCE toggle.
+    Returns the DuckDB scan of the Gold summary: the base file + the incremental parts listed
+    in the summary manifest (local or cloud).
     """
+    if DATA_SOURCE == "LOCAL":
+        manifest = {"base": LOCAL_GOLD_PATH.name, "parts": []}
+        if LOCAL_SUMMARY_MANIFEST_PATH.exists():
+            manifest = json.loads(LOCAL_SUMMARY_MANIFEST_PATH.read_text())
+        paths = [str(LOCAL_GOLD_PATH.parent / name) for name in [manifest["base"]] + manifest["parts"]]
+        return f"read_parquet({paths})"
+
+    try:
+        manifest = json.loads(get_filesystem().cat(gold_url(LOCAL_GOLD_PATH, CLOUD_SUMMARY_MANIFEST_BLOB_NAME)))
+    except FileNotFoundError:
+        # Gold published before the summary manifest existed
+        manifest = {"base": CLOUD_BLOB_NAME, "parts": []}
+    urls = [gold_url(LOCAL_GOLD_PATH, name) for name in [manifest["base"]] + manifest["parts"]]
+    return f"read_parquet({urls})"
+
+def query_gold(query: str, params: list = None) -> pd.DataFrame:
+    """
+    Runs a query against the Gold artifacts.
+    """
+    # One cursor per query: the shared connection is used by concurrent sessions
+    cursor = get_duckdb().cursor()
+    try:
+        return cursor.execute(query, params or []).df()
+    finally:
+        cursor.close()
+
+def to_datetime(values):
+    """
+    Converts Gold timestamps (local snapshot ids or cloud TIMESTAMPs) for display.
+    """
+    if DATA_SOURCE == "LOCAL":
+        return pd.to_datetime(values, format=LOCAL_TIMESTAMP_FORMAT)
+    return pd.to_datetime(values)
+
+def timestamp_bound(day: date):
+    """
+    Converts a sidebar date into a bound comparable with the stored timestamps, so the
+    predicate is pushed down to the Parquet row-group statistics.
+    """
+    if DATA_SOURCE == "LOCAL":
+        return day.strftime(LOCAL_TIMESTAMP_FORMAT)
+    return datetime.combine(day, datetime.min.time())
+
+# Cache entries are shared by every session and keyed on the Gold versions; failed loads
+# raise and are never cached. Entry counts bound the memory held by old versions and ranges.
+@st.cache_data(max_entries=4)
+def load_latest(latest_version: str, summary_version: str) -> pd.DataFrame:
+    """
+    Loads the latest Gold row per coin (a few rows, whatever the history length).
+    """
+    if latest_version is not None:
+        return query_gold(f"SELECT * FROM read_parquet('{gold_url(LOCAL_LATEST_PATH, CLOUD_LATEST_BLOB_NAME)}')")
+
+    # Gold published before the latest-per-coin artifact existed
+    return query_gold(f"""
+        SELECT * FROM {summary_source()}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY coin_id ORDER BY extraction_timestamp DESC) = 1
+    """)
+
+@st.cache_data(max_entries=32)
+def load_coin_history(coin_id: str, start: date, end: date, summary_version: str) -> pd.DataFrame:
+    """
+    Loads the chart series of one coin between two dates (inclusive).
+
+    The coin and time-range filters are pushed down to the Parquet scan: the Gold summary is
+    clustered by (coin_id, extraction_timestamp), so row groups outside the selection are
+    skipped from their statistics and never downloaded.
+    """
+    df = query_gold(f"""
+        SELECT extraction_timestamp, price_usd, sma_7d
+        FROM {summary_source()}
+        WHERE coin_id = ? AND extraction_timestamp >= ? AND extraction_timestamp < ?
+        ORDER BY extraction_timestamp
+    """, [coin_id, timestamp_bound(start), timestamp_bound(end + timedelta(days=1))])
+    if not df.empty:
+        df["extraction_timestamp"] = to_datetime(df["extraction_timestamp"])
+    return df
+
+def chart_resolution(coin_id: str, start: date, end: date):
+    """
+    Returns the coarsest rollup resolution that still gives the chart CHART_POINTS bars over
+    the date range, or None to chart the Gold rows (CLOUD mode, short ranges, no rollup yet).
+
+    A year at 1h is ~8,760 bars per coin, where the Gold summary holds every snapshot.
+    """
+    if DATA_SOURCE != "LOCAL" or not LOCAL_BARS_MANIFEST_PATH.exists():
+        return None
+
+    range_seconds = ((end - start).days + 1) * 86_400
+    for name, seconds in BAR_RESOLUTIONS.items():
+        if range_seconds // seconds < CHART_POINTS:
+            continue
+        coin_dir = LOCAL_BARS_DIR / f"resolution={name}" / f"coin_id={coin_id}"
+        if any(coin_dir.glob("period=*/*.parquet")):
+            return name
+    return None
+
+@st.cache_data(max_entries=32)
+def load_coin_bars(coin_id: str, resolution: str, start: date, end: date, bars_version: str) -> pd.DataFrame:
+    """
+    Loads the closed bars of one coin between two dates (inclusive), with the SMA of their
+    closes over SMA_WINDOW rows, like Gold's 'sma_7d' over its rows (the bars just before
+    'start' are read to seed it).
+
+    Only the coin's folder is scanned; the range filter is pushed down to the row groups.
+    """
+    return query_gold(f"""
+        WITH bars AS (
+            SELECT extraction_timestamp, price_usd
+            FROM read_parquet('{LOCAL_BARS_DIR / f"resolution={resolution}" / f"coin_id={coin_id}"}/period=*/*.parquet')
+        )
+        SELECT extraction_timestamp, price_usd, sma_7d
+        FROM (
+            SELECT
+                strptime(extraction_timestamp, '{LOCAL_TIMESTAMP_FORMAT}') as extraction_timestamp,
+                price_usd,
+                AVG(price_usd) OVER (ORDER BY extraction_timestamp ROWS BETWEEN {SMA_WINDOW - 1} PRECEDING AND CURRENT ROW) as sma_7d
+            FROM (
+                (SELECT * FROM bars WHERE extraction_timestamp < ? ORDER BY extraction_timestamp DESC LIMIT {SMA_WINDOW - 1})
+                UNION ALL
+                (SELECT * FROM bars WHERE extraction_timestamp >= ? AND extraction_timestamp < ?)
+            )
+        )
+        WHERE extraction_timestamp >= ?
+        ORDER BY extraction_timestamp
+    """, [
+        timestamp_bound(start),
+        timestamp_bound(start),
+        timestamp_bound(end + timedelta(days=1)),
+        datetime.combine(start, datetime.min.time())
+    ])
+
+# Main function
+def main():
     if DATA_SOURCE == "LOCAL":
         st.info("🏠 Mode: LOCAL (Reading from disk)")
-        if not LOCAL_GOLD_PATH.exists():
-            st.error(f"❌ File not found: {LOCAL_GOLD_PATH}")
-            return pd.DataFrame()
-        return pd.read_parquet(LOCAL_GOLD_PATH)
-        
     elif DATA_SOURCE == "CLOUD":
         st.info(f"☁️ Mode: CLOUD (Reading from {CLOUD_BUCKET_NAME})")
-        try:
-            # Download from GCS into memory
-            storage_client = storage.Client()
-            bucket = storage_client.bucket(CLOUD_BUCKET_NAME)
-            blob = bucket.blob(CLOUD_BLOB_NAME)
-            
-            data_bytes = blob.download_as_bytes()
-            return pd.read_parquet(io.BytesIO(data_bytes))
-        except Exception as error:
-            st.error(f"❌ Cloud Connection Failed: {error}")
-            return pd.DataFrame()
 
-# Main function
-def main():
-    # Load data
-    df = load_data()
-    
-    if df.empty:
+    # Cheap freshness check: the data is only reloaded when Gold was rewritten
+    # (every publish rewrites the summary manifest)
+    summary_version = gold_version(LOCAL_SUMMARY_MANIFEST_PATH, CLOUD_SUMMARY_MANIFEST_BLOB_NAME) or gold_version(LOCAL_GOLD_PATH, CLOUD_BLOB_NAME)
+    if summary_version is None:
+        st.error(f"❌ File not found: {gold_url(LOCAL_GOLD_PATH, CLOUD_BLOB_NAME)}")
+        return
+
+    # Load the latest row per coin (enough for the coin list and the metrics)
+    try:
+        latest_df = load_latest(gold_version(LOCAL_LATEST_PATH, CLOUD_LATEST_BLOB_NAME), summary_version)
+    except Exception as error:
+        st.error(f"❌ Gold query failed ({DATA_SOURCE}): {error}")
+        return
+
+    if latest_df.empty:
         st.warning("No data available to display.")
         return
 
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
     # Get unique coins from the data
-    all_coins = df['coin_id'].unique()
+    all_coins = sorted(latest_df['coin_id'].unique())
     selected_coin = st.sidebar.selectbox("Select Asset", all_coins, index=0)
 
-    # Filter data for just that coin
-    coin_df = df[df['coin_id'] == selected_coin].copy()
-    
-    # Sort by time for charting (Oldest to Newest)
-    coin_df = coin_df.sort_values("extraction_timestamp")
-
     # Key Metrics
-    # Get the very latest row (the most recent price)
-    if not coin_df.empty:
-        latest = coin_df.iloc[-1]
-
-        volatility = latest['volatility_7d']
-        if pd.isna(volatility) or volatility is None:
-            vol_display = "0.00"
-        else:
-            vol_display = f"{volatility:,.2f}"
-
-        col1, col2, col3, col4 = st.columns(4)
-        with col1: st.metric("Current Price", f"${latest['price_usd']:,.2f}")
-        with col2: st.metric("7-Day SMA", f"${latest['sma_7d']:,.2f}")
-        with col3: st.metric("Volatility", vol_display) 
-        with col4: st.metric("Signal", latest['signal'])
-
-    # Visualization chart
+    # The most recent row of the selected coin (the most recent price)
+    latest = latest_df[latest_df['coin_id'] == selected_coin].iloc[0]
+
+    # Chart window: defaults to the last DEFAULT_RANGE_DAYS days of the selected coin
+    last_day = to_datetime(pd.Series([latest['extraction_timestamp']])).iloc[0].date()
+    date_range = st.sidebar.date_input(
+        "Date Range",
+        value=(last_day - timedelta(days=DEFAULT_RANGE_DAYS), last_day),
+        max_value=last_day
+    )
+    # While the user is picking, only the start date is set
+    start_day, end_day = (date_range[0], date_range[-1]) if date_range else (last_day, last_day)
+
+    volatility = latest['volatility_7d']
+    if pd.isna(volatility) or volatility is None:
+        vol_display = "0.00"
+    else:
+        vol_display = f"{volatility:,.2f}"
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1: st.metric("Current Price", f"${latest['price_usd']:,.2f}")
+    with col2: st.metric("7-Day SMA", f"${latest['sma_7d']:,.2f}")
+    with col3: st.metric("Volatility", vol_display)
+    with col4: st.metric("Signal", latest['signal'])
+
+    # Visualization chart: only the selected coin and date range are read, from the coarsest
+    # rollup that still fills the chart when the range is long
+    resolution = chart_resolution(selected_coin, start_day, end_day)
+    try:
+        with st.spinner("Loading price history..."):
+            if resolution:
+                bars_version = gold_version(LOCAL_BARS_MANIFEST_PATH, None)
+                coin_df = load_coin_bars(selected_coin, resolution, start_day, end_day, bars_version)
+            else:
+                coin_df = load_coin_history(selected_coin, start_day, end_day, summary_version)
+    except Exception as error:
+        st.error(f"❌ Gold query failed ({DATA_SOURCE}): {error}")
+        return
+
     st.subheader(f"Price vs. Moving Average ({selected_coin.upper()})")
+    if coin_df.empty:
+        st.info("No data in the selected date range.")
+        return
+
+    # Long ranges are downsampled (LTTB, ~2 points per pixel) before they are sent to the
+    # browser; narrowing the Date Range zooms in down to full resolution
+    price_df = downsample_frame(coin_df, 'extraction_timestamp', 'price_usd')
+    sma_df = downsample_frame(coin_df, 'extraction_timestamp', 'sma_7d')
+    if resolution:
+        st.caption(
+            f"Showing {resolution} bar closes from the Silver rollup (the 7-Day SMA averages the last 7 bars, "
+            "as Gold's averages its last 7 rows, up to the last closed bar). Narrow the Date Range for every snapshot."
+        )
+    if len(coin_df) > CHART_POINTS:
+        st.caption(f"Showing {len(price_df):,} of {len(coin_df):,} points. Narrow the Date Range for full resolution.")
+
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=coin_df['extraction_timestamp'], y=coin_df['price_usd'], mode='lines', name='Price', line=dict(color='#00CC96')))
-    fig.add_trace(go.Scatter(x=coin_df['extraction_timestamp'], y=coin_df['sma_7d'], mode='lines', name='7-Day SMA', line=dict(color='#EF553B', dash='dash')))
+    fig.add_trace(go.Scatter(x=price_df['extraction_timestamp'], y=price_df['price_usd'], mode='lines', name='Price', line=dict(color='#00CC96')))
+    fig.add_trace(go.Scatter(x=sma_df['extraction_timestamp'], y=sma_df['sma_7d'], mode='lines', name='7-Day SMA', line=dict(color='#EF553B', dash='dash')))
     fig.update_layout(template="plotly_dark", height=500, xaxis_title="Date", yaxis_title="Price")
     st.plotly_chart(fig, use_container_width=True)
-    
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+# --- CONSTANTS ---
+# Points sent per chart trace: ~2 per horizontal pixel of a full-width chart
+CHART_POINTS = 2_000
+
+def _as_float(x) -> np.ndarray:
+    """
+    Converts the x axis (datetimes or numbers) to float64 for the area computations.
+    """
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return values.astype(np.float64)
+
+def lttb_indices(x, y, n_out: int = CHART_POINTS) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks 'n_out' points that preserve the visual shape.
+
+    The first and last points are always kept. The points in between are split into
+    (n_out - 2) equal buckets; from each bucket the point forming the largest triangle with
+    the previously selected point and the average of the next bucket is kept. Every bucket
+    is scored with one vectorized NumPy expression (only the loop over buckets is Python).
+
+    Args:
+        x: Sorted x values (datetimes or numbers).
+        y: y values (NaN points are never selected).
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted positional indices of the kept points (all of them if the series
+            already has at most 'n_out' points).
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= max(n_out, 2):
+        return valid
+    x, y = x[valid], y[valid]
+
+    n_points = len(x)
+    # Bucket edges over the inner points [1, n_points - 1)
+    edges = np.linspace(1, n_points - 1, n_out - 1).astype(np.int64)
+
+    # Average of every bucket, computed once (the "third vertex" of the triangles)
+    sums_x = np.add.reduceat(x[1:-1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:-1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    means_x = np.append(sums_x / counts, x[-1])
+    means_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n_points - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Twice the triangle area (the constant factor doesn't change the argmax)
+        areas = np.abs(
+            (x[previous] - means_x[bucket + 1]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (means_y[bucket + 1] - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return valid[selected]
+
+def minmax_indices(x, y, n_out: int = CHART_POINTS) -> np.ndarray:
+    """
+    Min/max bucketing: keeps the lowest and the highest point of each of (n_out / 2) buckets.
+
+    Fully vectorized and cheaper than LTTB; it never drops a spike, at the cost of a more
+    jagged line.
+
+    Returns:
+        np.ndarray: Sorted positional indices of the kept points.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) <= max(n_out, 2):
+        return valid
+    y = y[valid]
+
+    n_buckets = n_out // 2
+    edges = np.linspace(0, len(y), n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    # Position of the min/max inside its bucket, from a (bucket, offset) view padded with NaN
+    width = int(np.diff(edges).max())
+    offsets = np.arange(width)
+    positions = starts[:, None] + offsets[None, :]
+    in_bucket = positions < edges[1:, None]
+    padded = np.where(in_bucket, y[np.minimum(positions, len(y) - 1)], np.nan)
+    lows = starts + np.nanargmin(padded, axis=1)
+    highs = starts + np.nanargmax(padded, axis=1)
+
+    return valid[np.unique(np.concatenate([lows, highs]))]
+
+def downsample_frame(df: pd.DataFrame, x_column: str, y_column: str, n_out: int = CHART_POINTS, method: str = "lttb") -> pd.DataFrame:
+    """
+    Returns the rows of 'df' (sorted by 'x_column') kept for charting 'y_column'.
+    """
+    select = lttb_indices if method == "lttb" else minmax_indices
+    return df.iloc[select(df[x_column].to_numpy(), df[y_column].to_numpy(), n_out)]
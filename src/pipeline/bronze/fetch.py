@@ -0,0 +1,270 @@
+import os
+import random
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+
+# --- CONSTANTS ---
+COINGECKO_API_URL = "https://api.coingecko.com/api/v3/simple/price"
+# Coins per request: keeps the 'ids' query string and the response well under the API limits
+BATCH_SIZE = 50
+# Batches in flight at the same time (also the size of the HTTP connection pool)
+MAX_CONCURRENCY = 4
+# Polite default for the public CoinGecko API, shared by every caller in the process
+REQUESTS_PER_MINUTE = float(os.getenv("COINGECKO_REQUESTS_PER_MINUTE", 30))
+REQUEST_BURST = 5
+REQUEST_TIMEOUT = 10
+
+# Retries: jittered exponential backoff, capped; 'Retry-After' wins when the API sends it
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+# Longest server-requested cool-down honoured: a longer 'Retry-After' fails the batch instead
+# of pausing the shared bucket (and every caller behind it, e.g. the stream poller) for that long
+MAX_RETRY_AFTER = float(os.getenv("COINGECKO_MAX_RETRY_AFTER", 60))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter (thread-safe).
+
+    Allows bursts of up to 'capacity' requests, refilled at 'requests_per_minute'.
+    A 429 with 'Retry-After' pauses the bucket, which holds back every caller sharing it.
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: int = REQUEST_BURST):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a token is available, then takes it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Holds back every caller for 'seconds' (server-requested cool-down).
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+_shared_rate_limiter = None
+_shared_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> TokenBucket:
+    """
+    Returns the process-wide token bucket (created on first use).
+    """
+    global _shared_rate_limiter
+    with _shared_rate_limiter_lock:
+        if _shared_rate_limiter is None:
+            _shared_rate_limiter = TokenBucket(REQUESTS_PER_MINUTE)
+        return _shared_rate_limiter
+
+class FetchMetrics:
+    """
+    Collects per-request latency and retry counts (thread-safe).
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record_request(self, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+
+    def record_retry(self, throttled: bool) -> None:
+        with self._lock:
+            self.retries += 1
+            self.throttled += int(throttled)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else 0.0
+
+        return {
+            "requests": len(latencies),
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "latency_p50_s": round(percentile(0.50), 4),
+            "latency_p95_s": round(percentile(0.95), 4),
+            "latency_max_s": round(latencies[-1] if latencies else 0.0, 4),
+        }
+
+def split_batches(coin_ids: list, batch_size: int = BATCH_SIZE) -> list:
+    """
+    Splits the coin universe into batches of at most 'batch_size' ids (order preserved).
+    """
+    return [coin_ids[start:start + batch_size] for start in range(0, len(coin_ids), batch_size)]
+
+def parse_coin_list(coins: str) -> list:
+    """
+    Parses a comma-separated coin list ("bitcoin, ethereum,,solana") into unique ids.
+    """
+    return list(dict.fromkeys(coin.strip() for coin in coins.split(",") if coin.strip()))
+
+def create_session(pool_size: int = MAX_CONCURRENCY) -> requests.Session:
+    """
+    Creates an HTTP session whose connection pool can serve every concurrent batch.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _retry_after_seconds(response: requests.Response):
+    """
+    Parses a 'Retry-After' header (delta-seconds or HTTP date), or returns None.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def _backoff_seconds(attempt: int) -> float:
+    # "Full jitter": spreads retries of concurrent callers instead of synchronizing them
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def _fetch_batch(
+    session: requests.Session,
+    api_url: str,
+    coin_ids: list,
+    rate_limiter: TokenBucket,
+    metrics: FetchMetrics
+) -> dict:
+    params = {
+        "ids": ",".join(coin_ids),
+        "vs_currencies": "usd",
+        "include_24hr_vol": "true"
+    }
+
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            response = session.get(api_url, params=params, timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            metrics.record_request(time.perf_counter() - started)
+            if attempt == MAX_RETRIES:
+                metrics.record_failure()
+                raise error
+            print(f"⚠️ Request failed ({error.__class__.__name__}), retrying (attempt {attempt + 1}/{MAX_RETRIES}).")
+            metrics.record_retry(throttled=False)
+            time.sleep(_backoff_seconds(attempt))
+            continue
+
+        metrics.record_request(time.perf_counter() - started)
+        retry_after = _retry_after_seconds(response) if response.status_code in RETRYABLE_STATUS else None
+        if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+            print(f"❌ CoinGecko asked to wait {retry_after:.0f} s (more than {MAX_RETRY_AFTER:g} s). Giving up.")
+            metrics.record_failure()
+            response.raise_for_status()
+
+        if response.status_code not in RETRYABLE_STATUS or attempt == MAX_RETRIES:
+            if not response.ok:
+                metrics.record_failure()
+            response.raise_for_status() # Raises error for 404, 500, etc.
+            return response.json()
+
+        throttled = response.status_code == 429
+        print(f"⚠️ CoinGecko returned {response.status_code}, retrying (attempt {attempt + 1}/{MAX_RETRIES}).")
+        metrics.record_retry(throttled=throttled)
+        if retry_after is not None:
+            # Server-requested cool-down applies to every caller sharing the bucket
+            rate_limiter.pause(retry_after)
+        else:
+            time.sleep(_backoff_seconds(attempt))
+
+def fetch_prices(
+    coin_ids: list,
+    session: requests.Session = None,
+    api_url: str = COINGECKO_API_URL,
+    batch_size: int = BATCH_SIZE,
+    max_concurrency: int = MAX_CONCURRENCY,
+    rate_limiter: TokenBucket = None,
+    metrics: FetchMetrics = None
+) -> dict:
+    """
+    Fetches price and volume for every coin, batching the ids and fetching batches concurrently.
+
+    Process:
+    1. Splits the coin ids into batches of 'batch_size'.
+    2. Fetches the batches on a thread pool over one pooled HTTP session.
+        - Every request takes a token from the process-wide token bucket (or 'rate_limiter').
+        - 429/5xx responses, timeouts and connection errors are retried with jittered
+          exponential backoff; a 'Retry-After' header pauses the bucket for that long (a batch
+          asked to wait more than MAX_RETRY_AFTER fails instead).
+    3. Merges the batch responses into one snapshot ({coin_id: {"usd": ..., "usd_24h_vol": ...}}).
+
+    Args:
+        metrics (FetchMetrics): Optional collector for request latency and retry counts.
+
+    Returns:
+        dict: The merged snapshot (same shape as a single CoinGecko response).
+
+    Raises:
+        requests.HTTPError: If any batch still fails after MAX_RETRIES (a partial snapshot
+            is never returned).
+    """
+    batches = split_batches(coin_ids, batch_size)
+    rate_limiter = rate_limiter or get_rate_limiter()
+    metrics = metrics or FetchMetrics()
+    workers = max(1, min(max_concurrency, len(batches)))
+
+    owns_session = session is None
+    session = session or create_session(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(
+                lambda batch: _fetch_batch(session, api_url, batch, rate_limiter, metrics), batches
+            ))
+    finally:
+        if owns_session:
+            session.close()
+
+    snapshot = {}
+    for response in responses:
+        snapshot.update(response)
+    return snapshot
@@ -1,6 +1,7 @@
 import os
-import requests
+import sys
 import json
+import hashlib
 from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
@@ -9,11 +10,91 @@ from pathlib import Path
 load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
 DATA_DIR = BASE_DIR / "data" / "bronze"
+sys.path.append(str(BASE_DIR))
+
+# --- IMPORTS ---
+from src.pipeline.bronze import fetch
 
 # --- CONSTANTS ---
-COINGECKO_API_URL = "https://api.coingecko.com/api/v3/simple/price"
+COINGECKO_API_URL = fetch.COINGECKO_API_URL
 # Default to a safe list if env is missing
 TARGET_COINS = os.getenv("COINS_TO_FETCH", "bitcoin,ethereum,solana,cardano")
+# Content-hash dedup: CoinGecko serves the same cached payload when it is polled faster than
+# its refresh. The index keeps the hashes of the most recent snapshots (a day at one per
+# minute); it lives in a subfolder, so Silver never lists it as a snapshot.
+HASH_INDEX_FILE = DATA_DIR / "_index" / "recent_hashes.json"
+RECENT_HASHES = 1_440
+
+def snapshot_bytes(snapshot: dict) -> bytes:
+    """
+    Serializes a snapshot canonically (sorted keys): identical payloads give identical files,
+    whatever order the batches were merged in.
+    """
+    return json.dumps(snapshot, indent=4, sort_keys=True).encode("utf-8")
+
+def content_hash(data: bytes) -> str:
+    """
+    Returns the dedup key of a Bronze file: the SHA-256 of its bytes (also used by Silver).
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def load_hash_index() -> dict:
+    """
+    Loads the recent snapshot hashes ({hash: file name}, oldest first), or an empty index.
+    """
+    if not HASH_INDEX_FILE.exists():
+        return {"recent": {}}
+
+    with open(HASH_INDEX_FILE, "r") as index_file:
+        return json.load(index_file)
+
+def save_hash_index(index: dict) -> None:
+    """
+    Keeps the RECENT_HASHES newest entries and writes the index atomically (temp file + rename).
+    """
+    index["recent"] = dict(list(index["recent"].items())[-RECENT_HASHES:])
+    HASH_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = HASH_INDEX_FILE.with_suffix(".json.tmp")
+    with open(temp_file, "w") as index_file:
+        json.dump(index, index_file, indent=4)
+    os.replace(temp_file, HASH_INDEX_FILE)
+
+def fetch_snapshot(metrics: fetch.FetchMetrics = None, session=None) -> dict:
+    """
+    Fetches one snapshot of every target coin (batched and concurrent, see fetch.py).
+    A long-running caller passes its own 'session' to keep the connections alive between polls.
+    """
+    coin_ids = fetch.parse_coin_list(TARGET_COINS)
+    return fetch.fetch_prices(coin_ids, session=session, api_url=COINGECKO_API_URL, metrics=metrics)
+
+def store_snapshot(snapshot: dict, extracted_at: datetime) -> Path:
+    """
+    Saves a snapshot as 'raw_prices_<extracted_at>.json' unless its content hash matches a
+    recent snapshot, in which case the path of the stored one is returned.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    # Dedup: an identical payload is a reference to the stored snapshot, not a new file
+    data = snapshot_bytes(snapshot)
+    digest = content_hash(data)
+    index = load_hash_index()
+    existing = index["recent"].get(digest)
+    if existing and (DATA_DIR / existing).exists():
+        print(f"♻️ Identical to {existing} (same content hash). Not stored again.")
+        return DATA_DIR / existing
+
+    # Generate filename
+    filename = f"raw_prices_{extracted_at.strftime('%Y%m%d_%H%M%S')}.json"
+    file_path = DATA_DIR / filename
+
+    # Save to disk
+    file_path.write_bytes(data)
+    index["recent"].pop(digest, None)
+    index["recent"][digest] = filename
+    save_hash_index(index)
+
+    print(f"💾 Ingested data was saved to: {file_path}")
+    return file_path
 
 def process_data_ingestion() -> Path:
     """
@@ -22,49 +103,37 @@ def process_data_ingestion() -> Path:
     Process:
     1. Reads the list of target coins from the environment (TARGET_COINS).
     2. Requests real-time price and volume data from the CoinGecko API.
-    3. Generates a timestamped filename (e.g., raw_prices_20260116.json).
-    4. Saves the raw JSON response to 'data/bronze/'.
+        - Large coin lists are split into batches fetched concurrently (see fetch.py)
+          and merged into a single snapshot.
+        - 429/5xx responses and timeouts are retried with backoff, so a transient error
+          does not leave a hole in the snapshot series.
+    3. Hashes the canonical JSON and checks it against the recent hashes: a payload
+       identical to a recent snapshot is not stored again.
+    4. Generates a timestamped filename (e.g., raw_prices_20260116.json).
+    5. Saves the raw JSON response to 'data/bronze/' and records its hash.
 
     Returns:
-        Path: The absolute path to the saved JSON file.
+        Path: The absolute path to the saved JSON file (or to the identical snapshot
+            already stored).
 
     Raises:
-        requests.HTTPError: If the API call fails.
+        requests.HTTPError: If the API call still fails after the retries.
         IOError: If the file cannot be written.
     """
     print(f"🚀 Starting Bronze Layer - Data Ingestion for: {TARGET_COINS}")
-    
-    # Ensure data/bronze directory exists
-    os.makedirs(DATA_DIR, exist_ok=True)
 
-    params = {
-        "ids": TARGET_COINS,
-        "vs_currencies": "usd",
-        "include_24hr_vol": "true"
-    }
+    metrics = fetch.FetchMetrics()
 
     try:
-        response = requests.get(COINGECKO_API_URL, params=params, timeout=10) # Added timeout
-        response.raise_for_status() # Raises error for 404, 500, etc.
-        
-        coingecko_data = response.json()
-        print("✅ CoinGecko data fetched successfully.")
-
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"raw_prices_{timestamp}.json"
-        file_path = DATA_DIR / filename
-
-        # Save to disk
-        with open(file_path, "w") as json_file:
-            json.dump(coingecko_data, json_file, indent=4)
+        coingecko_data = fetch_snapshot(metrics)
+        print(f"✅ CoinGecko data fetched successfully ({len(coingecko_data)} coins).")
+        print(f"📈 Fetch metrics: {metrics.summary()}")
 
-        print(f"💾 Ingested data was saved to: {file_path}")
-        
-        return file_path # Return the path for other scripts to use it
+        return store_snapshot(coingecko_data, datetime.now()) # Return the path for other scripts to use it
 
     except Exception as error:
         print(f"❌ Critical error in Bronze Layer: {error}")
+        print(f"📈 Fetch metrics: {metrics.summary()}")
         # Re-raise the error to stop the pipeline
         raise error
  
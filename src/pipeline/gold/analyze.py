@@ -1,95 +1,375 @@
+import argparse
+import json
+import os
+import sys
 import duckdb
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # --- SETUP ---
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
-SILVER_DIR = BASE_DIR / "data" / "silver"
+sys.path.append(str(BASE_DIR))
 GOLD_DIR = BASE_DIR / "data" / "gold"
 
+# --- IMPORTS ---
+from src.pipeline.silver.clean import list_silver_files, silver_scan_sql
+from src.pipeline.silver.rollup import available_resolutions, bars_query, rolled_up_sql, snapshot_bars_sql
+from src.pipeline.gold.indicators import (
+    INDICATORS, TIMESTAMP_FORMAT, WINDOW_MODE, carry_columns, compute_indicators, output_columns
+)
+
 # --- CONSTANTS ---
-SILVER_FILE = SILVER_DIR / "cleaned_crypto_prices.parquet"
+# The Gold summary is a base file + the incremental parts listed in the manifest (same layout
+# as the cloud summary). Incremental runs only write their new rows, as one part each; a full
+# recompute, or the first run past MAX_SUMMARY_PARTS parts, writes a new base under a new name
 GOLD_FILE = GOLD_DIR / "analyzed_market_summary.parquet"
+SUMMARY_MANIFEST_FILE = GOLD_DIR / "_summary_manifest.json"
+SUMMARY_PARTS_DIR = GOLD_DIR / "summary_parts"
+MAX_SUMMARY_PARTS = int(os.getenv("GOLD_MAX_SUMMARY_PARTS", 64))
+# Most recent Gold row per coin: all the dashboard's metric tiles need
+LATEST_FILE = GOLD_DIR / "latest_per_coin.parquet"
+# The Silver rows (or bars) per coin the next run's windows still need + the values the
+# recursive indicators (EMA, RSI) continue from
+STATE_FILE = GOLD_DIR / "_rolling_state.parquet"
+
+# The summary is clustered by (coin_id, extraction_timestamp) in small row groups, so the
+# dashboard's coin + time-range queries skip the rest from the row-group statistics
+ROW_GROUP_SIZE = 16_384
+
+def _bar_seconds(spec: str) -> int:
+    """
+    Parses a bar interval ("15m", "1h", "1d") into seconds (0: no bars).
+
+    Raises:
+        ValueError: On an unknown unit or a non-positive length.
+    """
+    spec = spec.strip().lower()
+    if not spec:
+        return 0
+    units = {"m": 60, "h": 3_600, "d": 86_400}
+    if spec[-1] not in units or not spec[:-1].isdigit() or int(spec[:-1]) < 1:
+        raise ValueError(f"Invalid bar interval '{spec}': expected <n>m, <n>h or <n>d.")
+    return int(spec[:-1]) * units[spec[-1]]
+
+# Pre-aggregates the Silver snapshots into OHLC bars of this interval before the windows run
+# (e.g. "1h"; empty: one Gold row per snapshot), from the bar rollups when they are built.
+# Only closed bars are published.
+BAR_SECONDS = _bar_seconds(os.getenv("GOLD_BAR_INTERVAL", ""))
+
+def _gold_config() -> str:
+    """
+    Returns the settings the rolling state is only valid for (stored in its Parquet metadata).
+    """
+    return f"window_mode={WINDOW_MODE};bar_seconds={BAR_SECONDS}"
+
+def load_summary_manifest() -> dict:
+    """
+    Returns the published summary layout: {"base": <file>, "parts": [<file>, ...]}, names
+    relative to GOLD_DIR. A summary written before the manifest existed is a base without parts.
+    """
+    if not SUMMARY_MANIFEST_FILE.exists():
+        return {"base": GOLD_FILE.name, "parts": []}
+
+    with open(SUMMARY_MANIFEST_FILE, "r") as manifest_file:
+        return json.load(manifest_file)
+
+def save_summary_manifest(manifest: dict) -> None:
+    """
+    Writes the summary manifest atomically (temp file + rename): it switches readers from one
+    summary to the next in a single step.
+    """
+    temp_file = SUMMARY_MANIFEST_FILE.with_suffix(".json.tmp")
+    with open(temp_file, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    os.replace(temp_file, SUMMARY_MANIFEST_FILE)
+
+def list_gold_files() -> list:
+    """
+    Returns the files of the published Gold summary (base + parts), or [] if there is none.
+    """
+    manifest = load_summary_manifest()
+    if not (GOLD_DIR / manifest["base"]).exists():
+        return []
+    return [GOLD_DIR / name for name in [manifest["base"]] + manifest["parts"]]
+
+def _publish_summary(df, incremental: bool, manifest: dict) -> None:
+    """
+    Writes the analyzed rows as a new part (incremental) or a new base (full), then points
+    the manifest at them. Every file gets a new name, so the manifest on disk always lists
+    complete files; the ones it no longer lists are deleted last.
+    """
+    if incremental:
+        # Named after the new watermark: a re-run of the same rows overwrites its own part
+        SUMMARY_PARTS_DIR.mkdir(parents=True, exist_ok=True)
+        target = SUMMARY_PARTS_DIR / f"part_{df['extraction_timestamp'].max()}.parquet"
+        new_manifest = {"base": manifest["base"], "parts": manifest["parts"] + [target.relative_to(GOLD_DIR).as_posix()]}
+    else:
+        target = GOLD_DIR / f"{GOLD_FILE.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.parquet"
+        new_manifest = {"base": target.name, "parts": []}
+
+    # Staged then renamed: an interrupted run leaves the previous summary in place
+    temp_file = target.with_suffix(".parquet.tmp")
+    df.to_parquet(temp_file, index=False, row_group_size=ROW_GROUP_SIZE)
+    os.replace(temp_file, target)
+    save_summary_manifest(new_manifest)
+
+    if not incremental:
+        live_files = {GOLD_DIR / name for name in [new_manifest["base"]] + new_manifest["parts"]}
+        stale_files = [GOLD_DIR / manifest["base"]] + list(SUMMARY_PARTS_DIR.glob("*.parquet"))
+        for stale_file in stale_files:
+            if stale_file not in live_files:
+                stale_file.unlink(missing_ok=True)
+
+def _create_bar_source(duckdb_con) -> str:
+    """
+    Creates the 'bar_source' view Gold's bars are built from: the coarsest rollup resolution
+    that divides BAR_SECONDS (see silver/rollup.py), or the Silver snapshots if no such rollup
+    is built or it is behind Silver (the rollup stage hasn't caught up with late rows yet).
+
+    Returns:
+        str: What the bars are built from.
+    """
+    candidates = [(seconds, name) for name, seconds in available_resolutions().items() if BAR_SECONDS % seconds == 0]
+    if candidates:
+        _, name = max(candidates)
+        duckdb_con.execute(f"CREATE TEMP VIEW bar_source AS {rolled_up_sql(name, 'silver')}")
+        # Snapshot counts of the bars (one small column) vs. the Silver row count (footers only)
+        source_rows, silver_rows = duckdb_con.execute("""
+            SELECT (SELECT SUM(snapshots) FROM bar_source), (SELECT COUNT(*) FROM silver)
+        """).fetchone()
+        if source_rows == silver_rows:
+            return f"{name} rollup bars"
+        print(f"⚠️ The {name} rollup is behind Silver. Building the bars from the snapshots.")
 
-# Analysis Parameters
-WINDOW_SIZE = 7
+    duckdb_con.execute(f"CREATE OR REPLACE TEMP VIEW bar_source AS {snapshot_bars_sql('silver')}")
+    return "Silver snapshots"
 
-def process_data_analytics() -> Path:
+def _analyze(duckdb_con, seeded: bool) -> str:
+    """
+    Runs the indicator engine over 'window_input' (Silver rows + 'is_seed') and registers the
+    result as 'metrics'.
+
+    Returns:
+        str: The Silver columns of 'window_input' as a select list (engine columns excluded).
+    """
+    carries = carry_columns(INDICATORS) if seeded else []
+    engine_columns = ", ".join(["coin_id", "extraction_timestamp", "price_usd", "is_seed"] + carries)
+    window_input = duckdb_con.execute(f"SELECT {engine_columns} FROM window_input").df()
+    duckdb_con.register("metrics", compute_indicators(window_input, INDICATORS, WINDOW_MODE))
+    return f"window_input.* EXCLUDE ({', '.join(['is_seed'] + carries)})"
+
+def _save_rolling_state(duckdb_con, silver_columns: str) -> None:
+    """
+    Persists the rows the next run needs per coin (flagged 'in_state' by the engine: Silver
+    columns + the carry columns of the recursive indicators) as the rolling state, with the
+    settings they were computed with.
+    """
+    carries = "".join(f", metrics.{column}" for column in carry_columns(INDICATORS))
+    temp_file = STATE_FILE.with_suffix(".parquet.tmp")
+    duckdb_con.execute(f"""
+        COPY (
+            SELECT {silver_columns}{carries}
+            FROM window_input JOIN metrics USING (coin_id, extraction_timestamp)
+            WHERE metrics.in_state
+        ) TO '{temp_file}' (FORMAT PARQUET, KV_METADATA {{gold_config: '{_gold_config()}'}})
+    """)
+    os.replace(temp_file, STATE_FILE)
+
+def _save_latest_snapshot(duckdb_con, source: str) -> None:
+    """
+    Persists the most recent row per coin of the given relation (the Gold summary).
+    """
+    temp_file = LATEST_FILE.with_suffix(".parquet.tmp")
+    duckdb_con.execute(f"""
+        COPY (
+            SELECT * FROM {source}
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY coin_id ORDER BY extraction_timestamp DESC
+            ) = 1
+            ORDER BY coin_id
+        ) TO '{temp_file}' (FORMAT PARQUET)
+    """)
+    os.replace(temp_file, LATEST_FILE)
+
+def _can_run_incremental(duckdb_con) -> bool:
+    """
+    Checks that every Silver row is either already in Gold or one of the 'new_rows'
+    (i.e. no late, rewritten or deleted Silver rows since the last run), and that Gold and
+    the rolling state were built with the configured indicators, window mode and bars.
+    """
+    state_config = duckdb_con.execute(f"""
+        SELECT decode(value) FROM parquet_kv_metadata('{STATE_FILE}') WHERE decode(key) = 'gold_config'
+    """).fetchone()
+    if state_config is None or state_config[0] != _gold_config():
+        return False
+
+    input_columns = {row[0] for row in duckdb_con.execute("DESCRIBE new_input").fetchall()}
+    state_columns = {row[0] for row in duckdb_con.execute("DESCRIBE rolling_state").fetchall()}
+    gold_columns = {row[0] for row in duckdb_con.execute("DESCRIBE current_summary").fetchall()}
+    if state_columns - input_columns != set(carry_columns(INDICATORS)) \
+            or gold_columns - input_columns != set(output_columns(INDICATORS)):
+        return False
+
+    # Row counts come from the Parquet footers: no data pages are read (with bars, their
+    # snapshot counts are summed instead)
+    rows = "COALESCE(SUM(snapshots), 0)" if BAR_SECONDS else "COUNT(*)"
+    source_rows = duckdb_con.execute(f"SELECT {rows} FROM {'bar_source' if BAR_SECONDS else 'silver'}").fetchone()[0]
+    gold_rows = duckdb_con.execute(f"SELECT {rows} FROM current_summary").fetchone()[0]
+    new_rows = duckdb_con.execute(f"SELECT {rows} FROM new_rows").fetchone()[0]
+
+    return source_rows == gold_rows + new_rows
+
+def process_data_analytics(full_rebuild: bool = False) -> Path:
     """
     Performs financial analysis on the Silver layer data (Parquet).
 
     Process:
-    1. Reads the clean Parquet file using DuckDB.
-    2. Calculates a 7-Day Moving Average (SMA).
-    3. Calculates Volatility (Standard Deviation).
-    4. Generates a 'Signal' (BUY/WAIT) based on price vs. SMA.
-    5. Saves the result to the Gold layer.
+    1. Reads the live Silver part files (from the Silver manifest) using DuckDB.
+        - Incremental runs filter on the 'date' partition, so old partitions are never opened.
+    2. Optionally pre-aggregates the snapshots into OHLC bars (GOLD_BAR_INTERVAL), so the
+       windows run over one row per bar instead of one per snapshot. The bars are built from
+       the coarsest bar rollup that fits (e.g. 1h rollups for 4h bars) when it exists.
+    3. Calculates a 7-Day Moving Average (SMA), Volatility (Standard Deviation) and the
+       configured indicators (GOLD_INDICATORS: SMA/EMA/RSI/Bollinger at any window), all in
+       one sorted pass per coin (see indicators.py). Windows count rows, or span days with
+       GOLD_WINDOW_MODE=time.
+    4. Generates a 'Signal' (BUY/SELL/WAIT) based on price vs. SMA.
+    5. Saves the result to the Gold layer (a new base file, or one new part in incremental
+       mode, listed in the summary manifest), plus the latest row per coin (for the dashboard).
+
+    Incremental mode (default):
+        Only Silver rows newer than the rolling state watermark are analyzed. Their windows
+        are seeded with the last rows per coin from the rolling state, and EMA/RSI continue
+        from the values stored with them, so the output is row-for-row identical to a full
+        recompute. Late or rewritten Silver rows, or changed settings, fall back to a full
+        recompute automatically.
+
+    Args:
+        full_rebuild (bool): Recomputes the metrics over the entire Silver history.
 
     Returns:
-        Path: The absolute path to the Gold Parquet file.
-    
+        Path: The absolute path to the Gold summary manifest (see list_gold_files).
+
     Raises:
-        FileNotFoundError: If the Silver input file is missing.
+        FileNotFoundError: If the Silver dataset is missing.
     """
     print("🚀 Starting Gold Layer - Data Analysis")
 
     # 1. Check parquet file existence before crashing
-    if not SILVER_FILE.exists():
-        raise FileNotFoundError(f"❌ No parquet file at: {SILVER_FILE}. Please run 'clean.py' first.")
+    silver_files = [str(path) for path in list_silver_files()]
+    if not silver_files:
+        raise FileNotFoundError("❌ No Silver parquet files found. Please run 'clean.py' first.")
 
-    print(f"📖 Reading from: {SILVER_FILE}")
+    print(f"📖 Reading {len(silver_files)} Silver part files.")
 
     # Ensure gold/data directory exists
     GOLD_DIR.mkdir(parents=True, exist_ok=True)
 
     # 2. DuckDB Connection
     duckdb_con = duckdb.connect(database=':memory:')
-
-    # 3. SQL Query
-    query = f"""
-        WITH moved_data AS (
-            SELECT 
-                *,
-                -- Moving Average
-                AVG(price_usd) OVER (
-                    PARTITION BY coin_id 
-                    ORDER BY extraction_timestamp 
-                    ROWS BETWEEN {WINDOW_SIZE - 1} PRECEDING AND CURRENT ROW
-                ) as sma_7d,
-                
-                -- Volatility (Standard Deviation)
-                STDDEV(price_usd) OVER (
-                    PARTITION BY coin_id 
-                    ORDER BY extraction_timestamp 
-                    ROWS BETWEEN {WINDOW_SIZE - 1} PRECEDING AND CURRENT ROW
-                ) as volatility_7d
-            FROM '{SILVER_FILE}'
-        )
-        SELECT 
-            *,
-            -- Signal Logic
-            CASE 
-                WHEN price_usd < sma_7d AND volatility_7d > 0 THEN 'BUY'
-                WHEN price_usd > sma_7d THEN 'SELL'
-                ELSE 'WAIT'
-            END as signal
-        FROM moved_data
-        ORDER BY extraction_timestamp DESC, coin_id
-    """
+    duckdb_con.execute(f"CREATE VIEW silver AS {silver_scan_sql(silver_files)}")
 
     try:
+        if BAR_SECONDS:
+            print(f"🕯️ Building {BAR_SECONDS}s bars from the {_create_bar_source(duckdb_con)}.")
+
+        manifest = load_summary_manifest()
+        gold_files = [str(path) for path in list_gold_files()]
+        incremental = False
+        if not full_rebuild and gold_files and STATE_FILE.exists():
+            duckdb_con.execute(f"CREATE VIEW current_summary AS SELECT * FROM read_parquet({gold_files})")
+            duckdb_con.read_parquet(str(STATE_FILE)).create_view("rolling_state")
+            watermark = duckdb_con.execute("SELECT MAX(extraction_timestamp) FROM rolling_state").fetchone()[0]
+            if BAR_SECONDS:
+                # The state ends at the last closed bar: the rows of the open one are read again
+                next_bar = datetime.strptime(watermark, TIMESTAMP_FORMAT) + timedelta(seconds=BAR_SECONDS)
+                duckdb_con.execute(f"""
+                    CREATE TEMP TABLE new_rows AS
+                    SELECT * FROM bar_source WHERE extraction_timestamp >= '{next_bar.strftime(TIMESTAMP_FORMAT)}'
+                """)
+                duckdb_con.execute(f"CREATE TEMP TABLE new_input AS {bars_query('new_rows', BAR_SECONDS)}")
+            else:
+                # The date filter prunes every older partition before any file is opened
+                watermark_date = datetime.strptime(watermark, TIMESTAMP_FORMAT).date()
+                duckdb_con.execute(f"""
+                    CREATE TEMP TABLE new_rows AS
+                    SELECT * EXCLUDE (date) FROM silver
+                    WHERE date >= DATE '{watermark_date}' AND extraction_timestamp > '{watermark}'
+                """)
+                duckdb_con.execute("CREATE TEMP VIEW new_input AS SELECT * FROM new_rows")
+            incremental = _can_run_incremental(duckdb_con)
+
+            if not incremental:
+                print("⚠️ Silver history or indicator set changed since the last run. Running a full recompute.")
+
+        if incremental:
+            # 3a. Incremental: seed the windows with the rolling state, keep only the new rows
+            new_count = duckdb_con.execute("SELECT COUNT(*) FROM new_input").fetchone()[0]
+
+            if new_count == 0:
+                if not LATEST_FILE.exists():
+                    _save_latest_snapshot(duckdb_con, "current_summary")
+                print("✅ Gold layer is up to date. No new Silver rows (or closed bars).")
+                return SUMMARY_MANIFEST_FILE
+
+            print(f"⚡ Incremental mode: analyzing {new_count} new rows after {watermark}.")
+            duckdb_con.execute("""
+                CREATE TEMP VIEW window_input AS
+                SELECT *, true as is_seed FROM rolling_state
+                UNION ALL BY NAME
+                SELECT *, false as is_seed FROM new_input
+            """)
+        elif BAR_SECONDS:
+            # 3b. Full recompute over the entire history, aggregated once into bars
+            duckdb_con.execute(f"""
+                CREATE TEMP TABLE window_input AS
+                SELECT *, false as is_seed FROM ({bars_query('bar_source', BAR_SECONDS)})
+            """)
+        else:
+            # 3b. Full recompute over the entire Silver history
+            duckdb_con.execute("CREATE TEMP VIEW window_input AS SELECT * EXCLUDE (date), false as is_seed FROM silver")
+
+        # 4. Every indicator in one sorted pass over the window input
+        silver_columns = _analyze(duckdb_con, seeded=incremental)
+        analyzed = f"""
+            SELECT {silver_columns}, {", ".join(f"metrics.{column}" for column in output_columns(INDICATORS))}
+            FROM window_input JOIN metrics USING (coin_id, extraction_timestamp)
+            WHERE NOT window_input.is_seed
+        """
+        query = f"{analyzed} ORDER BY coin_id, extraction_timestamp"
+        latest_source = "gold_summary"
+        if incremental:
+            # Coins without new rows keep their latest row
+            previous_latest = f"'{LATEST_FILE}'" if LATEST_FILE.exists() else "current_summary"
+            latest_source = f"(SELECT * FROM gold_summary UNION ALL BY NAME SELECT * FROM {previous_latest})"
+
+            if len(manifest["parts"]) >= MAX_SUMMARY_PARTS:
+                # Fold the parts into a new base (the only full rewrite between full recomputes)
+                print(f"🧹 Folding {len(manifest['parts'])} summary parts into the base file.")
+                query = f"""
+                    SELECT * FROM ({analyzed} UNION ALL BY NAME SELECT * FROM current_summary)
+                    ORDER BY coin_id, extraction_timestamp
+                """
+                incremental = False
+
         # Execute query
         df = duckdb_con.execute(query).df()
 
         # Report Preview
-        print("\n📊 Market Analysis Preview:")
-        print(df.head(10))
+        print("\n📊 Market Analysis Preview (latest row per coin):")
+        print(df.groupby("coin_id").tail(1))
 
-        # Save to disk
-        print(f"\n💾 Saving analytics to {GOLD_FILE}.")
-        df.to_parquet(GOLD_FILE, index=False)
+        # Save to disk. The manifest decides what the summary is; the state goes last, so an
+        # interrupted run leaves the summary and the state at different watermarks, which the
+        # next run detects (full recompute)
+        print(f"\n💾 Saving analytics to {SUMMARY_MANIFEST_FILE}.")
+        _publish_summary(df, incremental, manifest)
+        duckdb_con.register("gold_summary", df)
+        _save_latest_snapshot(duckdb_con, latest_source)
+        _save_rolling_state(duckdb_con, silver_columns)
         print("✅ Saving complete.")
 
-        return GOLD_FILE
+        return SUMMARY_MANIFEST_FILE
 
     except Exception as error:
         print(f"❌ Error during analysis: {error}")
@@ -99,4 +379,12 @@ def process_data_analytics() -> Path:
 
 # Entry point for running the gold layer (data analytics) locally
 if __name__ == "__main__":
-    process_data_analytics()
+    parser = argparse.ArgumentParser(description="Gold Layer - Data Analysis")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Recompute the metrics over the entire Silver history."
+    )
+    args = parser.parse_args()
+
+    process_data_analytics(full_rebuild=args.full_rebuild)
@@ -0,0 +1,321 @@
+import argparse
+import math
+import os
+import sys
+import duckdb
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+
+# --- SETUP ---
+BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
+sys.path.append(str(BASE_DIR))
+
+# --- IMPORTS ---
+from src.pipeline.silver.clean import list_silver_files, silver_scan_sql
+from src.pipeline.gold import analyze
+from src.pipeline.gold.indicators import WINDOW_SIZE
+
+# --- CONSTANTS ---
+# Default grid: Gold's signal (WINDOW_SIZE rows, no threshold) and its neighbours
+DEFAULT_WINDOWS = "3,5,7,10,14,20,30,50,90"
+DEFAULT_THRESHOLDS = "0,0.0025,0.005,0.01,0.02"
+# Thresholds evaluated per task: a task computes its window's SMA once and reuses it
+THRESHOLDS_PER_TASK = 8
+RESULT_COLUMNS = [
+    "window", "threshold", "coin_id", "total_return", "buy_hold_return", "trades", "hit_rate", "max_drawdown", "exposure"
+]
+
+# Price series shared by the tasks of a process (set once per worker, see _init_worker)
+_SERIES = {}
+
+def parse_grid(spec: str, cast, minimum) -> list:
+    """
+    Parses "3,7, 14" into unique sorted values (windows with cast=int, thresholds with float).
+
+    Raises:
+        ValueError: On a value that can't be parsed or is below 'minimum'.
+    """
+    values = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            value = cast(item)
+        except ValueError:
+            raise ValueError(f"Invalid grid value '{item}'.") from None
+        if value < minimum:
+            raise ValueError(f"Invalid grid value '{item}': expected at least {minimum}.")
+        values.append(value)
+    return sorted(set(values))
+
+def prepare_series(history: pd.DataFrame) -> dict:
+    """
+    Turns price rows (coin_id, extraction_timestamp, price_usd) into the arrays every backtest
+    runs on: the prices of all coins back to back (sorted by coin and time), where each coin
+    starts, and the log returns from one row to the next (0 at a coin's first row; a NULL
+    price carries the previous one).
+    """
+    frame = history.sort_values(["coin_id", "extraction_timestamp"], kind="stable").reset_index(drop=True)
+    prices = frame["price_usd"].to_numpy(dtype=np.float64, na_value=np.nan)
+    coin_ids = frame["coin_id"].to_numpy()
+    starts = np.concatenate([[0], np.flatnonzero(coin_ids[1:] != coin_ids[:-1]) + 1]) if len(frame) else np.array([], dtype=np.int64)
+    coin_index = np.zeros(len(frame), dtype=np.int64)
+    coin_index[starts[1:]] = 1
+    coin_index = np.cumsum(coin_index)
+
+    log_prices = np.log(frame.groupby("coin_id", sort=False)["price_usd"].ffill().to_numpy(dtype=np.float64, na_value=np.nan))
+    returns = np.diff(log_prices, prepend=np.nan)
+    returns[starts] = 0.0
+    return {
+        "coin_ids": coin_ids[starts],
+        "prices": prices,
+        "starts": starts,
+        "coin_index": coin_index,
+        "returns": np.nan_to_num(returns),
+    }
+
+def rolling_mean(series: dict, window: int) -> np.ndarray:
+    """
+    Returns the mean of each row's trailing 'window' prices within its coin, like Gold's
+    sma_7d ('ROWS BETWEEN window - 1 PRECEDING', fewer rows at a coin's start, NULLs ignored).
+
+    Running sums over all coins at once (shifted by each coin's first price to keep them
+    small), so the cost doesn't depend on the window length.
+    """
+    prices, starts, coin_index = series["prices"], series["starts"], series["coin_index"]
+    valid = ~np.isnan(prices)
+    first = pd.Series(prices).groupby(coin_index).transform("first").to_numpy()
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, prices - first, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+
+    rows = np.arange(len(prices))
+    window_starts = np.maximum(rows - window + 1, starts[coin_index])
+    count = counts[rows + 1] - counts[window_starts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, (sums[rows + 1] - sums[window_starts]) / count + first, np.nan)
+
+def signals(series: dict, sma: np.ndarray, threshold: float) -> tuple:
+    """
+    Returns the BUY and SELL flags of Gold's rule with a threshold band: BUY below
+    sma * (1 - threshold), SELL above sma * (1 + threshold), WAIT in between. With
+    threshold=0 and WINDOW_SIZE rows it is the Gold 'signal' column (a price below its SMA
+    implies a non-zero volatility).
+    """
+    prices = series["prices"]
+    with np.errstate(invalid="ignore"):
+        return prices < sma * (1.0 - threshold), prices > sma * (1.0 + threshold)
+
+def _segment_cummax(values: np.ndarray, series: dict) -> np.ndarray:
+    """
+    Running maximum restarted at each coin: every coin is lifted above the previous ones, so
+    a single np.maximum.accumulate never carries a maximum across coins.
+    """
+    if not len(values):
+        return values
+    lift = (values.max() - values.min() + 1.0) * series["coin_index"]
+    return np.maximum.accumulate(values + lift) - lift
+
+def evaluate(series: dict, buy: np.ndarray, sell: np.ndarray) -> dict:
+    """
+    Trades the signals of every coin: long after a BUY until the next SELL, flat otherwise.
+    A position is taken at the close of the signal's row and earns the next rows' returns
+    (no look-ahead). Vectorized over all coins; no loop over rows or trades.
+
+    Returns:
+        dict: Per coin (arrays in series["coin_ids"] order): total_return (compounded),
+            buy_hold_return, trades (entries), hit_rate (share of trades with a positive
+            return; the open trade is marked to market), max_drawdown (fraction of the
+            equity peak) and exposure (share of rows spent long).
+    """
+    starts, coin_index, returns = series["starts"], series["coin_index"], series["returns"]
+    coin_count, row_count = len(starts), len(returns)
+
+    # Position: the last BUY/SELL so far (WAIT keeps it), flat at each coin's start
+    rows = np.arange(row_count)
+    decided = buy | sell
+    decided_rows = np.where(decided, rows, -1)
+    decided_rows[starts] = starts
+    last_decision = np.maximum.accumulate(decided_rows)
+    position = np.where(decided[last_decision], buy[last_decision], False)
+
+    # Each row earns its return if the position was long at the previous close
+    held = np.zeros(row_count, dtype=bool)
+    held[1:] = position[:-1]
+    held[starts] = False
+    strategy = np.where(held, returns, 0.0)
+
+    log_return = np.bincount(coin_index, weights=strategy, minlength=coin_count)
+    buy_hold = np.bincount(coin_index, weights=returns, minlength=coin_count)
+
+    # Drawdown on the log equity curve (starting at 0)
+    equity = np.cumsum(strategy)
+    equity -= np.concatenate([[0.0], equity])[starts][coin_index]
+    peak = np.maximum(_segment_cummax(equity, series), 0.0)
+    drawdown = np.zeros(coin_count)
+    np.maximum.at(drawdown, coin_index, peak - equity)
+
+    # Trades: entries (flat -> long); the rows a trade earns belong to the last entry
+    entries = position & ~held
+    trade_ids = np.cumsum(entries) - 1
+    # A held row earns for the trade open at the previous close
+    earning_trades = np.concatenate([[0], trade_ids[:-1]])[held]
+    trade_returns = np.bincount(earning_trades, weights=strategy[held], minlength=int(entries.sum()))
+    trade_coins = coin_index[entries]
+    trades = np.bincount(trade_coins, minlength=coin_count)
+    wins = np.bincount(trade_coins, weights=trade_returns > 0, minlength=coin_count)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "total_return": np.expm1(log_return),
+            "buy_hold_return": np.expm1(buy_hold),
+            "trades": trades,
+            "hit_rate": np.where(trades > 0, wins / trades, np.nan),
+            "max_drawdown": -np.expm1(-drawdown),
+            "exposure": np.bincount(coin_index, weights=position, minlength=coin_count) / np.diff(np.append(starts, row_count)),
+        }
+
+def _init_worker(series: dict) -> None:
+    """
+    Receives the price series once per worker process (not once per task).
+    """
+    _SERIES.update(series)
+
+def _run_task(task: tuple) -> pd.DataFrame:
+    """
+    Backtests one window against a chunk of thresholds (the SMA is computed once).
+    """
+    window, thresholds = task
+    sma = rolling_mean(_SERIES, window)
+    frames = []
+    for threshold in thresholds:
+        metrics = evaluate(_SERIES, *signals(_SERIES, sma, threshold))
+        frames.append(pd.DataFrame({"window": window, "threshold": threshold, "coin_id": _SERIES["coin_ids"], **metrics}))
+    return pd.concat(frames, ignore_index=True)
+
+def backtest(history: pd.DataFrame, windows: list, thresholds: list, workers: int = 1) -> pd.DataFrame:
+    """
+    Runs the signal rule for every (window, threshold) pair of the grid and every coin.
+
+    Args:
+        history (pd.DataFrame): coin_id, extraction_timestamp, price_usd (Silver or Gold rows).
+        windows (list): SMA windows, in rows (snapshots, or bars for a bar-mode Gold).
+        thresholds (list): Band around the SMA, as a fraction of it (0 = Gold's rule).
+        workers (int): Number of processes (1 = in-process, 0 = one per CPU core). Tasks are
+            (window, chunk of thresholds) pairs; each worker receives the prices once.
+
+    Returns:
+        pd.DataFrame: One row per (window, threshold, coin_id), see RESULT_COLUMNS.
+    """
+    series = prepare_series(history)
+    tasks = [
+        (window, thresholds[start:start + THRESHOLDS_PER_TASK])
+        for window, start in product(windows, range(0, len(thresholds), THRESHOLDS_PER_TASK))
+    ]
+
+    workers = workers or os.cpu_count()
+    if workers > 1 and len(tasks) > 1:
+        chunksize = max(1, math.ceil(len(tasks) / (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(series,)) as executor:
+            frames = list(executor.map(_run_task, tasks, chunksize=chunksize))
+    else:
+        _init_worker(series)
+        frames = [_run_task(task) for task in tasks]
+
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[RESULT_COLUMNS]
+
+def load_history(source: str) -> pd.DataFrame:
+    """
+    Loads the price rows to backtest on: the Silver snapshots, or the Gold summary (one row
+    per snapshot, or per bar with GOLD_BAR_INTERVAL).
+
+    Raises:
+        FileNotFoundError: If the requested layer has not been built.
+    """
+    if source == "silver":
+        silver_files = list_silver_files()
+        if not silver_files:
+            raise FileNotFoundError("❌ No Silver parquet files found. Please run 'clean.py' first.")
+        relation = f"({silver_scan_sql(silver_files)})"
+    else:
+        gold_files = [str(path) for path in analyze.list_gold_files()]
+        if not gold_files:
+            raise FileNotFoundError("❌ No Gold summary found. Please run 'analyze.py' first.")
+        relation = f"read_parquet({gold_files})"
+
+    return duckdb.execute(f"""
+        SELECT coin_id, extraction_timestamp, price_usd FROM {relation}
+        ORDER BY coin_id, extraction_timestamp
+    """).df()
+
+def process_data_backtest(
+    source: str = "gold", windows: str = DEFAULT_WINDOWS, thresholds: str = DEFAULT_THRESHOLDS, workers: int = 1
+) -> Path:
+    """
+    Measures how the Gold BUY/SELL signal would have traded, across a grid of SMA windows
+    and thresholds.
+
+    Process:
+    1. Loads the price history of every coin (Silver or Gold) in one DuckDB query.
+    2. Per (window, threshold): SMA, signals, positions, returns and trades for all coins at
+       once (NumPy arrays, no per-row loop), in parallel across the grid.
+    3. Saves the per-coin metrics to 'data/gold/backtest_results.parquet' and prints the
+       best parameter sets (mean return across coins).
+
+    Args:
+        source (str): "gold" or "silver".
+        windows (str): Comma-separated SMA windows, in rows (at least 2).
+        thresholds (str): Comma-separated thresholds (fractions of the SMA, at least 0).
+        workers (int): Number of processes (1 = in-process, 0 = one per CPU core).
+
+    Returns:
+        Path: The absolute path to the results file.
+
+    Raises:
+        ValueError: On an invalid grid.
+        FileNotFoundError: If the source layer is missing.
+    """
+    print("🚀 Starting Gold Layer - Signal Backtest")
+
+    window_grid = parse_grid(windows, int, 2)
+    threshold_grid = parse_grid(thresholds, float, 0.0)
+    if not window_grid or not threshold_grid:
+        raise ValueError("❌ The backtest grid needs at least one window and one threshold.")
+
+    history = load_history(source)
+    print(
+        f"📦 {len(history):,} {source} rows, {history['coin_id'].nunique()} coins, "
+        f"{len(window_grid) * len(threshold_grid)} parameter sets."
+    )
+
+    results = backtest(history, window_grid, threshold_grid, workers)
+
+    results_file = analyze.GOLD_DIR / "backtest_results.parquet"
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    results.to_parquet(results_file, index=False)
+
+    summary = (
+        results.groupby(["window", "threshold"])
+        .agg(mean_return=("total_return", "mean"), hit_rate=("hit_rate", "mean"), max_drawdown=("max_drawdown", "max"))
+        .sort_values("mean_return", ascending=False)
+    )
+    print(f"🏆 Best parameter sets (Gold's signal: window={WINDOW_SIZE}, threshold=0):")
+    print(summary.head(5).to_string())
+    print(f"💾 Saved {len(results):,} results to: {results_file}")
+    return results_file
+
+# Entry point for running the backtest locally
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gold Layer - Signal Backtest")
+    parser.add_argument("--source", choices=["gold", "silver"], default="gold", help="Price history to trade on.")
+    parser.add_argument("--windows", default=DEFAULT_WINDOWS, help="Comma-separated SMA windows (rows).")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help="Comma-separated thresholds (fractions of the SMA).")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes (0 = one per CPU core).")
+    args = parser.parse_args()
+
+    process_data_backtest(args.source, args.windows, args.thresholds, args.workers)
@@ -0,0 +1,315 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# --- CONSTANTS ---
+# Always computed: the BUY/SELL/WAIT signal is based on them
+WINDOW_SIZE = 7
+# Extra indicators, as "<kind>:<window>" (kinds: sma, ema, rsi, bollinger)
+DEFAULT_INDICATORS = "sma:30,sma:90,ema:12,ema:26,rsi:14,bollinger:20"
+INDICATOR_KINDS = ("sma", "ema", "rsi", "bollinger")
+BOLLINGER_WIDTH = 2.0
+# Rolling statistics are evaluated this many rows at a time (bounds the rows x window temporaries)
+ROLLING_CHUNK_ROWS = 65_536
+# "rows": a window of N is the last N rows (snapshots or bars);
+# "time": a window of N spans N days, (t - N days, t], whatever the ingestion cadence
+WINDOW_MODES = ("rows", "time")
+# Local Silver timestamps are strings (see silver/clean.py)
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+DAY_NS = 86_400 * 10 ** 9
+
+def parse_indicators(spec: str) -> list:
+    """
+    Parses "sma:30, ema:12,rsi:14" into unique (kind, window) pairs (order preserved).
+
+    Raises:
+        ValueError: On an unknown kind or a window below 2.
+    """
+    indicators = []
+    for item in spec.split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        kind, _, window = item.partition(":")
+        if kind not in INDICATOR_KINDS or not window.isdigit() or int(window) < 2:
+            raise ValueError(f"Invalid indicator '{item}': expected <kind>:<window>, kind in {INDICATOR_KINDS}.")
+        indicators.append((kind, int(window)))
+    return list(dict.fromkeys(indicators))
+
+def parse_window_mode(mode: str) -> str:
+    """
+    Validates a window mode ("rows" or "time").
+
+    Raises:
+        ValueError: On an unknown mode.
+    """
+    mode = mode.strip().lower()
+    if mode not in WINDOW_MODES:
+        raise ValueError(f"Invalid window mode '{mode}': expected one of {WINDOW_MODES}.")
+    return mode
+
+INDICATORS = parse_indicators(os.getenv("GOLD_INDICATORS", DEFAULT_INDICATORS))
+WINDOW_MODE = parse_window_mode(os.getenv("GOLD_WINDOW_MODE", "rows"))
+
+def output_columns(indicators: list) -> list:
+    """
+    Returns the Gold columns produced for the given indicators (after the Silver columns).
+    """
+    columns = ["sma_7d", "volatility_7d", "signal"]
+    for kind, window in indicators:
+        if kind == "bollinger":
+            columns += [f"bollinger_upper_{window}", f"bollinger_lower_{window}"]
+        else:
+            columns.append(f"{kind}_{window}")
+    return columns
+
+def carry_columns(indicators: list) -> list:
+    """
+    Returns the columns that recursive indicators continue from (kept in the rolling state).
+    """
+    columns = []
+    for kind, window in indicators:
+        if kind == "ema":
+            columns.append(f"ema_{window}")
+        elif kind == "rsi":
+            columns += [f"rsi_{window}_avg_gain", f"rsi_{window}_avg_loss"]
+    return columns
+
+def rolling_windows(indicators: list) -> set:
+    """
+    Returns the distinct rolling windows (SMA, volatility, Bollinger) of the given indicators.
+    """
+    return {WINDOW_SIZE} | {window for kind, window in indicators if kind in ("sma", "bollinger")}
+
+def history_rows(indicators: list) -> int:
+    """
+    Returns how many trailing rows per coin the next run needs to continue every indicator
+    in "rows" mode: rolling windows need (window - 1) rows, RSI needs the previous price.
+    """
+    return max(rolling_windows(indicators) | {2}) - 1
+
+def history_start(last_time: int, indicators: list) -> int:
+    """
+    Returns the earliest time (epoch ns) the next run needs to continue every indicator in
+    "time" mode, for a coin whose last row is at 'last_time': the start of the block before
+    the one holding 'last_time', for every rolling window (see _time_rolling).
+    """
+    return min((last_time // (window * DAY_NS) - 1) * window * DAY_NS for window in rolling_windows(indicators))
+
+def _epoch_ns(timestamps: pd.Series) -> np.ndarray:
+    """
+    Converts timestamps (datetimes or TIMESTAMP_FORMAT strings) to epoch nanoseconds.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, format=TIMESTAMP_FORMAT)
+    return timestamps.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+def _rolling(values: np.ndarray, window: int, statistic) -> np.ndarray:
+    """
+    Applies 'statistic' (np.nanmean, np.nanstd) to the trailing 'window' values of every
+    position, like SQL's 'ROWS BETWEEN window - 1 PRECEDING': fewer values at the start,
+    NULL (NaN) prices ignored.
+
+    Every window is reduced from its own values, so a row's result doesn't depend on how
+    much history precedes it (incremental runs match full recomputes exactly).
+    """
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    windows = sliding_window_view(padded, window)
+    result = np.empty(len(values))
+    with warnings.catch_warnings():
+        # Windows with fewer than 2 prices: NaN, like SQL's NULL
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for start in range(0, len(values), ROLLING_CHUNK_ROWS):
+            result[start:start + ROLLING_CHUNK_ROWS] = statistic(windows[start:start + ROLLING_CHUNK_ROWS], axis=1)
+    return result
+
+def _time_rolling(values: np.ndarray, times: np.ndarray, window_ns: int) -> tuple:
+    """
+    Returns the mean and the sample standard deviation over the trailing time window
+    (t - window, t] of every position (like pandas' rolling("7D")), NaN prices ignored.
+
+    Time is cut into blocks of the window's length (aligned on the Unix epoch), so every
+    window is the tail of the previous block plus the head of the current one. Both come from
+    running sums restarted at each block (shifted by the block's first price, merged with
+    Chan's formula): O(rows) whatever the window length, and a row's result only depends on its
+    two blocks, so incremental runs seeded with them match full recomputes exactly.
+    """
+    blocks = times // window_ns
+    valid = ~np.isnan(values)
+    shift = pd.Series(values).groupby(blocks).transform("first").to_numpy()
+    shifted = np.where(valid, values - shift, 0.0)
+
+    def running(data: np.ndarray, reverse: bool) -> np.ndarray:
+        # Cumulative sums restarted at every block (from its first row, or from its last one)
+        order = slice(None, None, -1) if reverse else slice(None)
+        return pd.Series(data[order]).groupby(blocks[order]).cumsum().to_numpy()[order]
+
+    def stats(count, total, squares, offset):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return count, offset + total / count, np.maximum(squares - total * total / count, 0.0)
+
+    # Head: from the start of the row's block to the row
+    head_count, head_mean, head_m2 = stats(
+        running(valid.astype(np.float64), False), running(shifted, False), running(shifted ** 2, False), shift
+    )
+    # Tail: from the window start to the end of the previous block (empty if the window
+    # starts in the row's own block)
+    starts = np.searchsorted(times, times - window_ns, side="right")
+    in_previous = blocks[starts] != blocks
+    tail_count, tail_mean, tail_m2 = stats(
+        running(valid.astype(np.float64), True), running(shifted, True), running(shifted ** 2, True), shift
+    )
+    tail_count = np.where(in_previous, tail_count[starts], 0.0)
+    tail_mean, tail_m2 = tail_mean[starts], tail_m2[starts]
+
+    count = head_count + tail_count
+    with np.errstate(divide="ignore", invalid="ignore"):
+        both = (head_count > 0) & (tail_count > 0)
+        mean = np.where(tail_count == 0, head_mean, np.where(head_count == 0, tail_mean,
+                        (tail_count * tail_mean + head_count * head_mean) / count))
+        delta = head_mean - tail_mean
+        m2 = np.where(tail_count == 0, head_m2, np.where(head_count == 0, tail_m2,
+                      tail_m2 + head_m2 + np.where(both, delta * delta * tail_count * head_count / count, 0.0)))
+        std = np.where(count >= 2, np.sqrt(m2 / (count - 1)), np.nan)
+    return np.where(count > 0, mean, np.nan), std
+
+def _ewm(values: np.ndarray, seed: float, alpha: float) -> np.ndarray:
+    """
+    Exponentially weighted mean (y = alpha * x + (1 - alpha) * y_prev), continued from 'seed'
+    (NaN: start from the first value). NaN values keep the previous mean.
+    """
+    series = pd.Series(np.concatenate([[seed], values]))
+    return series.ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy()[1:]
+
+def _coin_indicators(
+    prices: np.ndarray, times: np.ndarray, seed_count: int, seeds: dict, indicators: list, window_mode: str
+) -> dict:
+    """
+    Computes every indicator for one coin's contiguous, time-sorted prices.
+
+    The first 'seed_count' prices come from the rolling state; 'seeds' holds the carry
+    columns of the last of them (recursive indicators continue from there). 'times' (epoch ns)
+    is only used in "time" mode.
+    """
+    columns = {}
+    # Rolling statistics: evaluated once per distinct window, shared by every indicator
+    means = {}
+    stds = {}
+    std_windows = {WINDOW_SIZE} | {window for kind, window in indicators if kind == "bollinger"}
+    for window in rolling_windows(indicators):
+        if window_mode == "time":
+            means[window], stds[window] = _time_rolling(prices, times, window * DAY_NS)
+            continue
+        means[window] = _rolling(prices, window, np.nanmean)
+        if window in std_windows:
+            stds[window] = _rolling(prices, window, lambda windows, axis: np.nanstd(windows, axis=axis, ddof=1))
+
+    columns["sma_7d"] = means[WINDOW_SIZE]
+    columns["volatility_7d"] = stds[WINDOW_SIZE]
+
+    # Recursive indicators only run over the new prices, continued from the state
+    new_prices = prices[seed_count:]
+    # Price changes of the new rows (the previous price comes from the state)
+    deltas = np.diff(prices)[max(seed_count - 1, 0):] if seed_count else np.concatenate([[np.nan], np.diff(prices)])
+    history = np.full(seed_count, np.nan)
+
+    for kind, window in indicators:
+        if kind == "sma":
+            columns[f"sma_{window}"] = means[window]
+        elif kind == "bollinger":
+            columns[f"bollinger_upper_{window}"] = means[window] + BOLLINGER_WIDTH * stds[window]
+            columns[f"bollinger_lower_{window}"] = means[window] - BOLLINGER_WIDTH * stds[window]
+        elif kind == "ema":
+            ema = _ewm(new_prices, seeds.get(f"ema_{window}", np.nan), 2.0 / (window + 1))
+            columns[f"ema_{window}"] = np.concatenate([history, ema])
+        elif kind == "rsi":
+            # Wilder's smoothing of the average gain and loss
+            avg_gain = _ewm(np.where(np.isnan(deltas), np.nan, np.maximum(deltas, 0.0)),
+                            seeds.get(f"rsi_{window}_avg_gain", np.nan), 1.0 / window)
+            avg_loss = _ewm(np.where(np.isnan(deltas), np.nan, np.maximum(-deltas, 0.0)),
+                            seeds.get(f"rsi_{window}_avg_loss", np.nan), 1.0 / window)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+            columns[f"rsi_{window}"] = np.concatenate([history, rsi])
+            columns[f"rsi_{window}_avg_gain"] = np.concatenate([history, avg_gain])
+            columns[f"rsi_{window}_avg_loss"] = np.concatenate([history, avg_loss])
+
+    return columns
+
+def compute_indicators(
+    window_input: pd.DataFrame, indicators: list = INDICATORS, window_mode: str = WINDOW_MODE
+) -> pd.DataFrame:
+    """
+    Computes the Gold indicators for every coin in one sorted pass.
+
+    Process:
+    1. Sorts the rows once by (coin_id, extraction_timestamp); every coin becomes one
+       contiguous price array.
+    2. Per coin, each distinct rolling window is evaluated once and shared by the indicators
+       that need it (SMA, volatility, Bollinger bands): a sliding NumPy view over the last N
+       rows, or running sums over the last N days (window_mode="time"). EMA and RSI are
+       exponentially weighted means over the same array (one step per row).
+    3. Derives the signal (price vs. SMA, as before).
+    4. Flags the rows the next run needs as its rolling state ('in_state').
+
+    Args:
+        window_input (pd.DataFrame): coin_id, extraction_timestamp, price_usd and 'is_seed'.
+            Seed rows are the rolling state of the previous run: they provide the window
+            history and, through the carry columns, the values the recursive indicators
+            continue from. They are not analyzed again.
+        indicators (list): (kind, window) pairs (see parse_indicators).
+        window_mode (str): "rows" or "time" (see WINDOW_MODES).
+
+    Returns:
+        pd.DataFrame: coin_id, extraction_timestamp, is_seed, the output columns, the carry
+            columns and 'in_state', for every input row (seed rows get NaN indicators except
+            their carries).
+    """
+    frame = window_input.sort_values(["coin_id", "extraction_timestamp"], kind="stable").reset_index(drop=True)
+    prices = frame["price_usd"].to_numpy(dtype=np.float64, na_value=np.nan)
+    seeded = frame["is_seed"].to_numpy(dtype=bool)
+    times = _epoch_ns(frame["extraction_timestamp"]) if window_mode == "time" else None
+    carries = carry_columns(indicators)
+    in_state = np.zeros(len(frame), dtype=bool)
+
+    numeric_columns = [column for column in output_columns(indicators) if column != "signal"] + carries
+    results = {column: np.full(len(frame), np.nan) for column in dict.fromkeys(numeric_columns)}
+
+    # Contiguous coin ranges of the sorted frame
+    coin_ids = frame["coin_id"].to_numpy()
+    boundaries = np.flatnonzero(coin_ids[1:] != coin_ids[:-1]) + 1
+    for start, end in zip(np.concatenate([[0], boundaries]), np.concatenate([boundaries, [len(frame)]])):
+        seed_count = int(seeded[start:end].sum())
+        seeds = {}
+        if seed_count:
+            last_seed = start + seed_count - 1
+            seeds = {column: frame[column].iat[last_seed] for column in carries if column in frame}
+
+        coin_times = times[start:end] if times is not None else None
+        coin_results = _coin_indicators(prices[start:end], coin_times, seed_count, seeds, indicators, window_mode)
+        for column, values in coin_results.items():
+            results[column][start:end] = values
+
+        if window_mode == "time":
+            in_state[start:end] = coin_times >= history_start(coin_times[-1], indicators)
+        else:
+            in_state[max(start, end - history_rows(indicators)):end] = True
+
+    metrics = frame[["coin_id", "extraction_timestamp", "is_seed"]].copy()
+    for column, values in results.items():
+        metrics[column] = values
+    # Seed rows keep the carries they were stored with
+    for column in carries:
+        if column in frame:
+            metrics.loc[seeded, column] = frame.loc[seeded, column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    sma, volatility = metrics["sma_7d"].to_numpy(), metrics["volatility_7d"].to_numpy()
+    metrics["signal"] = np.select(
+        [(prices < sma) & (volatility > 0), prices > sma], ["BUY", "SELL"], default="WAIT"
+    )
+    metrics["in_state"] = in_state
+    return metrics[
+        ["coin_id", "extraction_timestamp", "is_seed"] + list(dict.fromkeys(output_columns(indicators) + carries)) + ["in_state"]
+    ]
@@ -1,41 +1,401 @@
+import argparse
+import hashlib
+import json
+import os
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
+import pyarrow.parquet as pq
 
 # --- SETUP ---
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
 # --- IMPORTS ---
-from src.pipeline.bronze.ingest import process_data_ingestion
-from src.pipeline.silver.clean import process_data_cleaning
-from src.pipeline.gold.analyze import process_data_analytics
+from src.pipeline.bronze import fetch, ingest
+from src.pipeline.silver import clean, rollup
+from src.pipeline.gold import analyze, backtest
 
-def run_pipeline():
+# --- CONSTANTS ---
+# One JSON report per run (run_<timestamp>.json) + the input fingerprints of the last
+# successful run of every task
+RUNS_DIR = PROJECT_ROOT / "data" / "runs"
+FINGERPRINTS_FILE = RUNS_DIR / "_fingerprints.json"
+# Tasks running at once (fetch batches, rollup resolutions, Gold jobs)
+MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", fetch.MAX_CONCURRENCY))
+
+class Task:
+    """
+    One node of the pipeline DAG.
+
+    'function' may return {"rows": ..., "bytes": ...}; whatever it leaves out is measured on
+    the files it wrote under 'outputs' (Parquet row counts come from the footers).
+    'fingerprint' returns a digest of the task's inputs, taken when the task is due: if it
+    matches the last successful run and the outputs exist, the task is skipped.
+    """
+
+    def __init__(self, name: str, function, deps: tuple = (), fingerprint=None, outputs: tuple = ()):
+        self.name = name
+        self.function = function
+        self.deps = tuple(deps)
+        self.fingerprint = fingerprint
+        self.outputs = tuple(outputs)
+
+    @property
+    def stage(self) -> str:
+        return self.name.split(".", 1)[0]
+
+def fingerprint(*parts) -> str:
+    """
+    Digest of any JSON-serializable values (file stats, manifest digests, settings).
+    """
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+def file_stats(paths) -> list:
+    """
+    (name, size, mtime_ns) of the existing files, sorted: changes when any file is added,
+    removed or rewritten, without reading them.
+    """
+    stats = []
+    for path in sorted(paths):
+        if path.is_file():
+            file_stat = path.stat()
+            stats.append((path.name, file_stat.st_size, file_stat.st_mtime_ns))
+    return stats
+
+def file_digest(path: Path) -> str:
+    """
+    SHA-256 of a (small) file, e.g. a manifest, or "" if it does not exist.
+    """
+    return hashlib.sha256(path.read_bytes()).hexdigest() if path.exists() else ""
+
+def load_fingerprints() -> dict:
+    if not FINGERPRINTS_FILE.exists():
+        return {}
+
+    with open(FINGERPRINTS_FILE, "r") as fingerprints_file:
+        return json.load(fingerprints_file)
+
+def _save_json(data: dict, path: Path) -> None:
     """
-    Orchestrates the local data pipeline: Bronze -> Silver -> Gold.
+    Writes a JSON file atomically (temp file + rename).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = path.with_suffix(".json.tmp")
+    with open(temp_file, "w") as json_file:
+        json.dump(data, json_file, indent=4)
+    os.replace(temp_file, path)
+
+def _output_files(outputs: tuple) -> dict:
+    """
+    {path: (size, mtime_ns)} of every file under the outputs (files or folders).
+    """
+    files = {}
+    for output in map(Path, outputs):
+        candidates = output.rglob("*") if output.is_dir() else [output]
+        for path in candidates:
+            if path.is_file():
+                file_stat = path.stat()
+                files[path] = (file_stat.st_size, file_stat.st_mtime_ns)
+    return files
+
+def _written(before: dict, after: dict) -> tuple:
+    """
+    Rows (Parquet footers) and bytes of the files that are new or changed.
+    """
+    written = [path for path, file_stat in after.items() if before.get(path) != file_stat]
+    rows = sum(pq.read_metadata(path).num_rows for path in written if path.suffix == ".parquet")
+    return rows, sum(after[path][0] for path in written)
+
+def _run_task(task: Task, fingerprints: dict, run_started: float) -> dict:
+    """
+    Runs (or skips) one task and returns its report entry. Exceptions are recorded, not raised.
+    """
+    started = time.perf_counter()
+    result = {"stage": task.stage, "deps": list(task.deps), "rows": 0, "bytes": 0}
+    try:
+        digest = task.fingerprint() if task.fingerprint else None
+        result["fingerprint"] = digest
+        if digest is not None and fingerprints.get(task.name) == digest and all(Path(output).exists() for output in task.outputs):
+            result["status"] = "skipped"
+            print(f"⏭️ [{task.name}] Inputs unchanged since the last run. Skipped.")
+        else:
+            before = _output_files(task.outputs)
+            metrics = task.function()
+            # Layer functions return their output path: the metrics are measured instead
+            metrics = metrics if isinstance(metrics, dict) else {}
+            rows, written_bytes = _written(before, _output_files(task.outputs))
+            result.update(status="success", rows=metrics.get("rows", rows), bytes=metrics.get("bytes", written_bytes))
+            if digest is not None:
+                fingerprints[task.name] = digest
+    except Exception as error:
+        result.update(status="failed", error=f"{error.__class__.__name__}: {error}")
+        print(f"❌ [{task.name}] Failed: {error}")
+
+    finished = time.perf_counter()
+    result.update(
+        start_s=round(started - run_started, 4),
+        end_s=round(finished - run_started, 4),
+        wall_time_s=round(finished - started, 4)
+    )
+    if result["status"] == "success":
+        print(f"✅ [{task.name}] {result['wall_time_s']:.2f} s, {result['rows']:,} rows, {result['bytes']:,} bytes.")
+    return result
+
+def run_dag(tasks: list, max_workers: int = MAX_WORKERS, fingerprints: dict = None) -> dict:
+    """
+    Runs the tasks on a thread pool, each one as soon as all its dependencies succeeded or
+    were skipped. Independent tasks run concurrently (the pipeline's work is DuckDB, Arrow,
+    NumPy and HTTP calls, which release the GIL).
+
+    A failed task does not stop the run: the tasks that depend on it are marked
+    'upstream_failed' and every independent branch still runs.
+
+    Args:
+        tasks (list): The Task nodes (names must be unique; deps refer to names).
+        max_workers (int): Tasks running at once.
+        fingerprints (dict): {task name: input fingerprint} of the last successful runs;
+            updated in place for the tasks that succeed.
+
+    Returns:
+        dict: {task name: report entry}, in the order the tasks were given.
+
+    Raises:
+        ValueError: On an unknown dependency or a cycle.
+    """
+    fingerprints = {} if fingerprints is None else fingerprints
+    by_name = {task.name: task for task in tasks}
+    for task in tasks:
+        unknown = set(task.deps) - set(by_name)
+        if unknown:
+            raise ValueError(f"Task '{task.name}' depends on unknown tasks: {sorted(unknown)}")
+
+    run_started = time.perf_counter()
+    results = {}
+    waiting = list(tasks)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while waiting or running:
+            # Schedule every task whose dependencies are settled (repeated: an upstream
+            # failure propagates down whole branches at once)
+            progress = True
+            while progress:
+                progress = False
+                for task in list(waiting):
+                    statuses = [results[dep]["status"] for dep in task.deps if dep in results]
+                    if any(status in ("failed", "upstream_failed") for status in statuses):
+                        results[task.name] = {"stage": task.stage, "deps": list(task.deps), "status": "upstream_failed", "rows": 0, "bytes": 0}
+                        print(f"⛔ [{task.name}] Not run: a dependency failed.")
+                    elif len(statuses) == len(task.deps):
+                        running[executor.submit(_run_task, task, fingerprints, run_started)] = task.name
+                    else:
+                        continue
+                    waiting.remove(task)
+                    progress = True
+
+            if not running:
+                if waiting:
+                    raise ValueError(f"Dependency cycle between: {sorted(task.name for task in waiting)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+
+    return {task.name: results[task.name] for task in tasks}
+
+def summarize_stages(results: dict) -> dict:
+    """
+    Per stage (bronze, silver, gold): wall time from its first task's start to its last
+    task's end, the rows and bytes of its tasks added up (fetched + stored for Bronze), and
+    the task statuses.
+    """
+    stages = {}
+    for name, result in results.items():
+        stage = stages.setdefault(result["stage"], {"tasks": {}, "rows": 0, "bytes": 0, "start_s": None, "end_s": None})
+        stage["tasks"][name] = result["status"]
+        stage["rows"] += result["rows"]
+        stage["bytes"] += result["bytes"]
+        if "start_s" in result:
+            stage["start_s"] = result["start_s"] if stage["start_s"] is None else min(stage["start_s"], result["start_s"])
+            stage["end_s"] = result["end_s"] if stage["end_s"] is None else max(stage["end_s"], result["end_s"])
+
+    for stage in stages.values():
+        statuses = set(stage["tasks"].values())
+        stage["status"] = next(
+            (status for status in ("failed", "upstream_failed") if status in statuses),
+            "skipped" if statuses == {"skipped"} else "success"
+        )
+        stage["wall_time_s"] = round(stage["end_s"] - stage["start_s"], 4) if stage["start_s"] is not None else 0.0
+    return stages
+
+def build_pipeline_dag(session, metrics: fetch.FetchMetrics, silver_workers: int = 1) -> list:
+    """
+    The local pipeline as a DAG:
+
+        bronze.fetch.batch-N (one per coin batch) -> bronze.store -> silver.clean
+        silver.clean -> silver.rollup.<resolution> (one per resolution) -> gold.analyze
+        silver.clean -> gold.backtest
+
+    The indicator engine stays one task: it computes every indicator in one sorted pass per
+    coin (shared rolling windows, one rolling state), which a split per indicator would
+    repeat. It runs concurrently with the signal backtest instead.
+    """
+    coin_batches = fetch.split_batches(fetch.parse_coin_list(ingest.TARGET_COINS))
+    fetched = {}
+
+    def fetch_batch(index: int, coin_ids: list) -> dict:
+        fetched[index] = fetch.fetch_prices(coin_ids, session=session, api_url=ingest.COINGECKO_API_URL, metrics=metrics)
+        return {"rows": len(fetched[index]), "bytes": len(json.dumps(fetched[index]))}
+
+    def store() -> dict:
+        # Batches are merged in coin-list order, whatever order they finished in
+        snapshot = {}
+        for index in range(len(coin_batches)):
+            snapshot.update(fetched[index])
+        extracted_at = datetime.now()
+        new_path = ingest.DATA_DIR / f"raw_prices_{extracted_at.strftime('%Y%m%d_%H%M%S')}.json"
+        existed = new_path.exists()
+        file_path = ingest.store_snapshot(snapshot, extracted_at)
+        if file_path != new_path or existed:
+            return {"rows": 0, "bytes": 0} # Identical to a stored snapshot
+        return {"rows": len(snapshot), "bytes": file_path.stat().st_size}
+
+    def clean_silver() -> dict:
+        before = clean.load_manifest()
+        clean.process_data_cleaning(workers=silver_workers)
+        after = clean.load_manifest()
+        new_files = set(after["bronze_files"]) - set(before["bronze_files"])
+        new_parts = set(after["parts"]) - set(before["parts"])
+        return {
+            "rows": sum(after["bronze_files"][file_name]["rows"] for file_name in new_files),
+            "bytes": sum((clean.SILVER_DATASET_DIR / part).stat().st_size for part in new_parts)
+        }
+
+    def analyze_gold() -> dict:
+        # Only the summary files this run added (a new part, or a new base)
+        before = set(analyze.list_gold_files())
+        analyze.process_data_analytics()
+        written = [path for path in analyze.list_gold_files() if path not in before]
+        return {
+            "rows": sum(pq.read_metadata(path).num_rows for path in written),
+            "bytes": sum(path.stat().st_size for path in written)
+        }
+
+    bronze_fetch = [
+        Task(f"bronze.fetch.batch-{index + 1}", lambda index=index, coin_ids=coin_ids: fetch_batch(index, coin_ids))
+        for index, coin_ids in enumerate(coin_batches)
+    ]
+    tasks = bronze_fetch + [
+        Task("bronze.store", store, deps=[task.name for task in bronze_fetch]),
+        Task(
+            "silver.clean", clean_silver, deps=["bronze.store"],
+            fingerprint=lambda: fingerprint(file_stats(clean.BRONZE_DIR.glob("*.json")), file_digest(clean.QUARANTINE_INDEX_FILE)),
+            outputs=[clean.MANIFEST_FILE]
+        ),
+    ]
+
+    rollups = [
+        Task(
+            f"silver.rollup.{resolution}",
+            lambda resolution=resolution: rollup.process_data_rollup(resolutions=[resolution]),
+            deps=["silver.clean"],
+            fingerprint=lambda: fingerprint(file_digest(clean.MANIFEST_FILE)),
+            outputs=[rollup.BARS_DIR / f"resolution={resolution}"]
+        )
+        for resolution in rollup.RESOLUTIONS
+    ]
+    tasks += rollups + [
+        Task(
+            "gold.analyze", analyze_gold, deps=[task.name for task in rollups],
+            fingerprint=lambda: fingerprint(
+                file_digest(clean.MANIFEST_FILE), file_digest(rollup.BARS_MANIFEST_FILE),
+                analyze.INDICATORS, analyze.WINDOW_MODE, analyze.BAR_SECONDS
+            ),
+            outputs=[analyze.SUMMARY_MANIFEST_FILE]
+        ),
+        Task(
+            "gold.backtest", lambda: backtest.process_data_backtest(source="silver"), deps=["silver.clean"],
+            fingerprint=lambda: fingerprint(
+                file_digest(clean.MANIFEST_FILE), backtest.DEFAULT_WINDOWS, backtest.DEFAULT_THRESHOLDS
+            ),
+            outputs=[analyze.GOLD_DIR / "backtest_results.parquet"]
+        ),
+    ]
+    return tasks
+
+def run_pipeline(max_workers: int = MAX_WORKERS, silver_workers: int = 1, report_file: Path = None) -> dict:
+    """
+    Orchestrates the local data pipeline: Bronze -> Silver -> Gold, as a DAG.
+
+    Process:
+    1. Fetches the coin batches concurrently and stores the merged snapshot (Bronze).
+    2. Cleans the new snapshots (Silver), then rolls up every bar resolution concurrently.
+    3. Runs the indicator analysis and the signal backtest concurrently (Gold).
+    4. Writes a run report to 'data/runs/run_<timestamp>.json': status, wall time, rows and
+       bytes written per task and per stage.
+
+    Tasks whose input fingerprint (Bronze listing, Silver/bars manifests, settings) matches
+    their last successful run are skipped. A failed task only stops its dependents.
+
+    Args:
+        max_workers (int): Tasks running at once.
+        silver_workers (int): Processes parsing the Bronze files (0 = one per CPU core).
+        report_file (Path): Where to write the report (default: RUNS_DIR/run_<timestamp>.json).
+
+    Returns:
+        dict: The run report.
     """
     print(f"🚀 Initializing Crypto Data Pipeline from: {PROJECT_ROOT}\n")
 
+    run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    fingerprints = load_fingerprints()
+    metrics = fetch.FetchMetrics()
+    session = fetch.create_session()
+    started = time.perf_counter()
+
     try:
-        # --- STEP 1: BRONZE (Data Ingest) ---
-        raw_file = process_data_ingestion()
-        print(f"✅ [Bronze] Ingestion Complete. Raw file: {raw_file.name}\n")
+        results = run_dag(build_pipeline_dag(session, metrics, silver_workers), max_workers, fingerprints)
+    finally:
+        session.close()
 
-        # --- STEP 2: SILVER (Data Clean) ---
-        clean_file = process_data_cleaning()
-        print(f"✅ [Silver] Transformation Complete. Parquet file: {clean_file.name}\n")
+    stages = summarize_stages(results)
+    failed = [name for name, result in results.items() if result["status"] == "failed"]
+    report = {
+        "run_id": run_id,
+        "status": "failed" if failed else "success",
+        "wall_time_s": round(time.perf_counter() - started, 4),
+        "max_workers": max_workers,
+        "stages": stages,
+        "tasks": results,
+        "fetch_metrics": metrics.summary(),
+    }
 
-        # --- STEP 3: GOLD (Data Analyze) ---
-        final_report = process_data_analytics()
-        print(f"✅ [Gold] Analysis Complete. Report: {final_report.name}\n")
+    _save_json(fingerprints, FINGERPRINTS_FILE)
+    report_file = Path(report_file) if report_file else RUNS_DIR / f"run_{run_id}.json"
+    _save_json(report, report_file)
 
-        print("🎉 Pipeline Finished Successfully. Data is ready for the Dashboard Visualization.")
+    print("\n⏱️ Stages:")
+    for stage_name, stage in stages.items():
+        print(f"   {stage_name:<7} {stage['status']:<16} {stage['wall_time_s']:8.2f} s {stage['rows']:>10,} rows {stage['bytes']:>12,} bytes")
+    print(f"📝 Run report: {report_file}")
 
-    except Exception as error:
-        # This catches any 'errors' from the steps above
-        print(f"\n❌ Pipeline Failed during execution: {error}")
-        sys.exit(1)
+    if failed:
+        print(f"\n❌ Pipeline Failed during execution: {', '.join(failed)}")
+    else:
+        print("🎉 Pipeline Finished Successfully. Data is ready for the Dashboard Visualization.")
+    return report
 
 if __name__ == "__main__":
-    run_pipeline()
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Local data pipeline (Bronze -> Silver -> Gold) as a DAG")
+    parser.add_argument("--max-workers", type=int, default=MAX_WORKERS, help="Tasks running at once.")
+    parser.add_argument("--silver-workers", type=int, default=1, help="Processes parsing Bronze files (0 = one per CPU core).")
+    parser.add_argument("--report", type=Path, default=None, help="Report path (default: data/runs/run_<timestamp>.json).")
+    args = parser.parse_args()
+
+    report = run_pipeline(args.max_workers, args.silver_workers, args.report)
+    if report["status"] == "failed":
+        sys.exit(1)
@@ -1,5 +1,15 @@
+import argparse
+import hashlib
 import json
-import pandas as pd
+import math
+import os
+import re
+import shutil
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 
@@ -8,18 +18,335 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
 BRONZE_DIR = BASE_DIR / "data" / "bronze"
 SILVER_DIR = BASE_DIR / "data" / "silver"
 
-def process_data_cleaning() -> Path:
+# --- CONSTANTS ---
+# Silver is an append-only, Hive-partitioned dataset: date=YYYY-MM-DD/coin_id=<coin>/part-*.parquet
+# (same layout as the cloud 'processed/' prefix). Every run adds one part per touched partition.
+SILVER_DATASET_DIR = SILVER_DIR / "cleaned_crypto_prices"
+PARTITION_COLUMNS = ["date", "coin_id"]
+# A full rebuild writes its parts here first: the live dataset is only touched once they are
+# all written, so a failed rebuild leaves the previous Silver and its manifest intact
+SILVER_STAGING_DIR = SILVER_DIR / "_rebuild"
+# Column order of a Silver row (coin_id comes from the partition path)
+SILVER_COLUMNS = ["coin_id", "price_usd", "volume_24h", "extraction_timestamp", "source_file"]
+# Shape of a Bronze snapshot: {"<coin_id>": {"usd": ..., "usd_24h_vol": ...}, ...}
+BRONZE_JSON_TYPE = "MAP(VARCHAR, STRUCT(usd DOUBLE, usd_24h_vol DOUBLE))"
+# Parallel parsing: each worker gets several shards so a slow shard does not stall the pool
+SHARDS_PER_WORKER = 4
+# Records which Bronze files were ingested (size + mtime) and which part files are live
+MANIFEST_FILE = SILVER_DIR / "_manifest.json"
+# Dead letters: corrupt or schema-violating Bronze files are moved here and listed in the
+# index with the reason, so later runs never parse them again (see reprocess_quarantine)
+QUARANTINE_DIR = BASE_DIR / "data" / "quarantine"
+QUARANTINE_INDEX_FILE = QUARANTINE_DIR / "_index.json"
+# Coin metrics must be JSON numbers (or null): anything else is a schema violation
+NUMERIC_JSON_TYPES = ("BIGINT", "UBIGINT", "DOUBLE", "NULL")
+# Bronze file names carry the snapshot timestamp: raw_prices_YYYYMMDD_HHMMSS.json
+SNAPSHOT_PATTERN = re.compile(r"raw_prices_(\d{8}_\d{6})")
+
+def load_manifest() -> dict:
+    """
+    Loads the Silver manifest, or returns an empty one if this is the first run.
+    """
+    if not MANIFEST_FILE.exists():
+        return {"bronze_files": {}, "parts": []}
+
+    with open(MANIFEST_FILE, "r") as manifest_file:
+        return json.load(manifest_file)
+
+def save_manifest(manifest: dict) -> None:
+    """
+    Writes the manifest atomically (temp file + rename) so a crash never leaves it half-written.
+    """
+    temp_file = MANIFEST_FILE.with_suffix(".json.tmp")
+    with open(temp_file, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    os.replace(temp_file, MANIFEST_FILE)
+
+def load_quarantine_index() -> dict:
+    """
+    Loads the quarantine index, or returns an empty one if nothing was quarantined yet.
+    """
+    if not QUARANTINE_INDEX_FILE.exists():
+        return {"files": {}}
+
+    with open(QUARANTINE_INDEX_FILE, "r") as index_file:
+        return json.load(index_file)
+
+def save_quarantine_index(index: dict) -> None:
+    """
+    Writes the quarantine index atomically (temp file + rename).
+    """
+    temp_file = QUARANTINE_INDEX_FILE.with_suffix(".json.tmp")
+    with open(temp_file, "w") as index_file:
+        json.dump(index, index_file, indent=4)
+    os.replace(temp_file, QUARANTINE_INDEX_FILE)
+
+def _quarantine_files(corrupt_files: list) -> None:
+    """
+    Moves the given Bronze files (name, reason) to the quarantine folder and records them in
+    the index. The index is written after the moves; reprocess_quarantine also scans the
+    folder, so a file moved by an interrupted run can still be reprocessed.
+    """
+    QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
+    index = load_quarantine_index()
+    for file_name, reason in corrupt_files:
+        source = BRONZE_DIR / file_name
+        if source.exists():
+            os.replace(source, QUARANTINE_DIR / file_name)
+        index["files"][file_name] = {
+            "reason": reason,
+            "quarantined_at": datetime.now().isoformat(timespec="seconds"),
+        }
+    save_quarantine_index(index)
+
+def reprocess_quarantine(file_names: list = None) -> list:
+    """
+    Moves quarantined files back to Bronze (all of them, or the given names) and removes them
+    from the index, so the next cleaning run parses them again (e.g. after fixing them or the
+    parser). Files that are still corrupt are quarantined again.
+
+    Returns:
+        list: The names of the files moved back to Bronze.
     """
-    Normalizes raw JSON data from the Bronze layer and converts it to a flattened Parquet file.
+    index = load_quarantine_index()
+    quarantined = sorted(set(index["files"]) | {path.name for path in QUARANTINE_DIR.glob("*.json")})
+    selected = quarantined if file_names is None else [name for name in quarantined if name in set(file_names)]
+
+    restored = []
+    for file_name in selected:
+        quarantined_file = QUARANTINE_DIR / file_name
+        if quarantined_file.exists():
+            os.replace(quarantined_file, BRONZE_DIR / file_name)
+            restored.append(file_name)
+        index["files"].pop(file_name, None)
+
+    if selected:
+        save_quarantine_index(index)
+    return restored
+
+def list_silver_files() -> list:
+    """
+    Returns the live Silver part files recorded in the manifest (used by the Gold layer).
+    """
+    manifest = load_manifest()
+    return [SILVER_DATASET_DIR / part_name for part_name in manifest["parts"]]
+
+def silver_scan_sql(silver_files: list) -> str:
+    """
+    Returns a query over the given Silver files with the Hive partition columns typed.
+
+    Filters on 'date' and 'coin_id' prune whole files before DuckDB opens them.
+    """
+    file_list = ", ".join(f"'{path}'" for path in silver_files)
+    return f"""
+        SELECT {", ".join(SILVER_COLUMNS)}, date
+        FROM read_parquet(
+            [{file_list}],
+            hive_partitioning = true,
+            hive_types = {{'date': DATE, 'coin_id': VARCHAR}}
+        )
+    """
+
+def _snapshot_timestamp(file_path: Path):
+    """
+    Extracts the snapshot timestamp from a Bronze file name (raw_prices_YYYYMMDD_HHMMSS.json),
+    or returns None if the name holds no valid one (the file is then quarantined).
+    """
+    match = SNAPSHOT_PATTERN.search(file_path.name)
+    if not match:
+        return None
+    try:
+        datetime.strptime(match.group(1), "%Y%m%d_%H%M%S")
+    except ValueError:
+        return None
+    return match.group(1)
+
+def _read_bronze_text(file_path: Path):
+    """
+    Returns the raw text of a Bronze file, or None if it is not valid UTF-8.
+    """
+    try:
+        return file_path.read_bytes().decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+def _parse_bronze_files(file_paths: list, threads: int = None) -> tuple:
+    """
+    Flattens Bronze JSON snapshots into one columnar Silver table (one row per coin and file).
+
+    The raw file contents are handed to DuckDB as a single Arrow column, which parses and
+    unnests every snapshot in one vectorized query, so no Python object is created per row.
+    Files that are not a JSON object of coin metrics are skipped and reported.
+
+    Returns:
+        tuple: (pyarrow.Table with the Silver columns + 'date', {file name: row count},
+                [(corrupt file name, reason)])
+    """
+    # Everything Python touches here is per file, not per row
+    snapshots = pa.table({
+        "source_file": [file_path.name for file_path in file_paths],
+        "extraction_timestamp": pa.array([_snapshot_timestamp(file_path) for file_path in file_paths], pa.string()),
+        "content": pa.array([_read_bronze_text(file_path) for file_path in file_paths], pa.string()),
+    })
+
+    duckdb_con = duckdb.connect(database=':memory:')
+    try:
+        if threads:
+            duckdb_con.execute(f"SET threads = {threads}")
+        duckdb_con.register("raw_snapshots", snapshots)
+        duckdb_con.execute(f"""
+            CREATE TABLE parsed AS
+            WITH typed AS (
+                SELECT
+                    source_file,
+                    extraction_timestamp,
+                    content,
+                    CASE WHEN json_valid(content) THEN json_type(content) END as json_type
+                FROM raw_snapshots
+            )
+            SELECT
+                source_file,
+                extraction_timestamp,
+                json_type,
+                CASE WHEN json_type = 'OBJECT' THEN json_type(content, '$.*') END as metric_types,
+                CASE WHEN json_type = 'OBJECT' THEN list_concat(
+                    json_type(content, '$.*.usd'), json_type(content, '$.*.usd_24h_vol')
+                ) END as value_types,
+                CASE WHEN json_type = 'OBJECT' THEN json_transform(content, '"{BRONZE_JSON_TYPE}"') END as coins
+            FROM typed
+        """)
+
+        # A file is corrupt if its name holds no snapshot timestamp, it is not valid JSON, not
+        # an object, has non-object metrics or non-numeric prices/volumes (they would silently
+        # become 0)
+        corrupt_files = duckdb_con.execute(f"""
+            SELECT source_file, reason
+            FROM (
+                SELECT
+                    source_file,
+                    CASE
+                        WHEN extraction_timestamp IS NULL THEN 'invalid snapshot file name'
+                        WHEN json_type IS NULL THEN 'malformed JSON'
+                        WHEN json_type != 'OBJECT'
+                          OR list_filter(metric_types, metric_type -> metric_type != 'OBJECT') != []
+                            THEN 'expected an object of coin metrics'
+                        WHEN list_filter(value_types, value_type -> value_type NOT IN {NUMERIC_JSON_TYPES}) != []
+                            THEN 'non-numeric coin metrics'
+                    END as reason
+                FROM parsed
+            )
+            WHERE reason IS NOT NULL
+            ORDER BY source_file
+        """).fetchall()
+        duckdb_con.execute(
+            "DELETE FROM parsed WHERE source_file IN (SELECT unnest($corrupt))",
+            {"corrupt": [source_file for source_file, _ in corrupt_files]}
+        )
+
+        table = duckdb_con.execute("""
+            SELECT
+                entry.key as coin_id,
+                COALESCE(entry.value.usd, 0) as price_usd,
+                COALESCE(entry.value.usd_24h_vol, 0) as volume_24h,
+                extraction_timestamp,
+                source_file,
+                -- Hive partition key derived from the snapshot timestamp
+                strftime(strptime(extraction_timestamp, '%Y%m%d_%H%M%S'), '%Y-%m-%d') as date
+            FROM (
+                SELECT source_file, extraction_timestamp, unnest(map_entries(coins)) as entry
+                FROM parsed
+            )
+            ORDER BY source_file
+        """).arrow().read_all()
+
+        row_counts = dict(duckdb_con.execute("SELECT source_file, cardinality(coins) FROM parsed").fetchall())
+    finally:
+        duckdb_con.close()
+
+    return table, row_counts, corrupt_files
+
+def _parse_bronze_files_parallel(file_paths: list, workers: int) -> tuple:
+    """
+    Shards the Bronze files across a process pool and merges the workers' Arrow tables.
+
+    Shards are contiguous slices of the sorted file list and are merged in order, so the
+    output is the same as a single '_parse_bronze_files' call. Each worker runs DuckDB on a
+    single thread: the parallelism comes from the pool, not from oversubscribed cores.
+    """
+    shard_size = max(1, math.ceil(len(file_paths) / (workers * SHARDS_PER_WORKER)))
+    shards = [file_paths[start:start + shard_size] for start in range(0, len(file_paths), shard_size)]
+
+    tables, row_counts, corrupt_files = [], {}, []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for table, shard_row_counts, shard_corrupt_files in executor.map(partial(_parse_bronze_files, threads=1), shards):
+            tables.append(table)
+            row_counts.update(shard_row_counts)
+            corrupt_files.extend(shard_corrupt_files)
+
+    return pa.concat_tables(tables), row_counts, corrupt_files
+
+def _split_duplicates(new_files: list, ingested: dict) -> tuple:
+    """
+    Separates the new Bronze files (path, stat) whose content hash matches an ingested
+    snapshot, or an earlier file of the same run, from the ones to parse.
+
+    Returns:
+        tuple: ([(path, stat, hash) to parse], [(path, stat, hash, original file name)])
+    """
+    known_hashes = {
+        entry["content_hash"]: file_name
+        for file_name, entry in ingested.items() if "content_hash" in entry and "duplicate_of" not in entry
+    }
+    unique_files, duplicates = [], []
+    for file_path, file_stat in new_files:
+        digest = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        if digest in known_hashes:
+            duplicates.append((file_path, file_stat, digest, known_hashes[digest]))
+        else:
+            known_hashes[digest] = file_path.name
+            unique_files.append((file_path, file_stat, digest))
+    return unique_files, duplicates
+
+def _publish_rebuild(written_files: list, manifest: dict) -> None:
+    """
+    Swaps a full rebuild in: moves its staged parts into the dataset, saves the manifest that
+    lists only them, then deletes the previous parts. Part names are unique per run, so the
+    manifest on disk lists existing files at every step.
+    """
+    for written_file in written_files:
+        target = SILVER_DATASET_DIR / Path(written_file).relative_to(SILVER_STAGING_DIR)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(written_file, target)
+    save_manifest(manifest)
+
+    live_parts = {SILVER_DATASET_DIR / part_name for part_name in manifest["parts"]}
+    for part_file in SILVER_DATASET_DIR.rglob("*.parquet"):
+        if part_file not in live_parts:
+            part_file.unlink()
+    shutil.rmtree(SILVER_STAGING_DIR)
+
+def process_data_cleaning(full_rebuild: bool = False, workers: int = 1) -> Path:
+    """
+    Normalizes raw JSON data from the Bronze layer into the Silver Parquet dataset.
 
     Process:
-    1. Reads all JSON files in 'data/bronze'.
-    2. Extracts coin_id, price_usd, volume_24h, and timestamp.
+    1. Lists all JSON files in 'data/bronze' and compares them against the manifest.
+        - Only files that were never ingested are parsed (incremental mode).
+        - A modified Bronze file (size/mtime changed) triggers a full rebuild.
+    2. Skips files whose content hash matches an ingested snapshot (recorded as duplicates).
+    3. Extracts coin_id, price_usd, volume_24h, and timestamp.
         - Flattens data into a tabular format.
-    3. Saves as a single Parquet file in 'data/silver'.
+    4. Appends the new rows as new part files in 'data/silver/cleaned_crypto_prices/',
+       Hive-partitioned by date and coin_id.
+    5. Records the ingested files (with their content hash) and the new parts in the manifest.
+
+    Args:
+        full_rebuild (bool): Ignores the manifest and rebuilds Silver from every Bronze file.
+        workers (int): Number of parsing processes (1 = in-process, 0 = one per CPU core).
+            Useful when replaying a large Bronze archive.
 
     Returns:
-        Path: The absolute path to the generated Parquet file.
+        Path: The absolute path to the Silver dataset directory.
 
     Raises:
         ValueError: If no data is found in Bronze.
@@ -27,64 +354,158 @@ def process_data_cleaning() -> Path:
     print("🚀 Starting Silver Layer - Data Cleaning")
 
     # Ensure data/silver directory exists
-    SILVER_DIR.mkdir(parents=True, exist_ok=True)
+    SILVER_DATASET_DIR.mkdir(parents=True, exist_ok=True)
 
-    # 1. Reads all JSON files
-    json_files = list(BRONZE_DIR.glob("*.json"))
+    # 1. Reads all JSON files (quarantined ones are never parsed again, even if they reappear)
+    quarantined = load_quarantine_index()["files"]
+    json_files = [file_path for file_path in sorted(BRONZE_DIR.glob("*.json")) if file_path.name not in quarantined]
 
     if not json_files:
         raise ValueError("❌ No JSON file found. Please run 'ingest.py' first.")
 
-    print(f"📦 Found {len(json_files)} raw files to process.")
+    manifest = load_manifest()
+    ingested = manifest["bronze_files"]
 
-    data_list = []
-
-    # 2. Extracts data
+    new_files = []
     for file_path in json_files:
-        try:
-            with open(file_path, "r") as json_file:
-                json_data = json.load(json_file)
-
-                # Metadata extraction (Lineage)
-                filename_parts = file_path.stem.split("_")
-                # Fallback if filename format is unexpected
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                if len(filename_parts) >= 3:
-                     timestamp_str = f"{filename_parts[2]}_{filename_parts[3]}"
-
-                # Flattens data
-                for coin_id, metrics in json_data.items():
-                    row = {
-                        "coin_id": coin_id,
-                        "price_usd": float(metrics.get("usd", 0)),
-                        "volume_24h": float(metrics.get("usd_24h_vol", 0)),
-                        "extraction_timestamp": timestamp_str,
-                        "source_file": file_path.name
-                    }
-                    data_list.append(row)
-
-        except Exception as error:
-            print(f"⚠️ Warning: Skipping corrupt file {file_path.name}: {error}")
-            continue
-
-    # 3. SAVE DATA
-    if data_list:
-        df = pd.DataFrame(data_list)
-
-        # Enforce types to floating point
-        df["price_usd"] = df["price_usd"].astype(float)
-
-        output_file = SILVER_DIR / "cleaned_crypto_prices.parquet"
-        df.to_parquet(output_file, index=False)
-
-        print(f"✅ Processed {len(df)} rows.")
-        print(f"💾 Saved to: {output_file}")
-
-        return output_file # Return the path
+        file_stat = file_path.stat()
+        entry = ingested.get(file_path.name)
+
+        if entry is None:
+            new_files.append((file_path, file_stat))
+        elif entry["size"] != file_stat.st_size or entry["mtime_ns"] != file_stat.st_mtime_ns:
+            print(f"⚠️ Bronze file {file_path.name} changed since it was ingested. Rebuilding Silver.")
+            full_rebuild = True
+            break
+
+    if full_rebuild:
+        print("♻️ Full rebuild requested. Replacing existing Silver parts.")
+        # Leftovers of an interrupted rebuild were never live
+        shutil.rmtree(SILVER_STAGING_DIR, ignore_errors=True)
+        SILVER_STAGING_DIR.mkdir(parents=True)
+        manifest = {"bronze_files": {}, "parts": []}
+        ingested = manifest["bronze_files"]
+        new_files = [(file_path, file_path.stat()) for file_path in json_files]
+
+    if not new_files:
+        print("✅ Silver layer is up to date. No new Bronze files.")
+        return SILVER_DATASET_DIR
+
+    print(f"📦 Found {len(new_files)} new raw files to process ({len(json_files)} in total).")
+
+    # 2. Skips snapshots whose content was already ingested (same dedup key as Bronze: the
+    # SHA-256 of the file), so replayed or repeated payloads never add rows
+    new_files, duplicates = _split_duplicates(new_files, ingested)
+    for file_path, file_stat, digest, original in duplicates:
+        ingested[file_path.name] = {
+            "size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns,
+            "rows": 0,
+            "content_hash": digest,
+            "duplicate_of": original
+        }
+    if duplicates:
+        print(f"♻️ Skipping {len(duplicates)} snapshots identical to ingested ones.")
+    if not new_files:
+        save_manifest(manifest)
+        return SILVER_DATASET_DIR
+
+    # 3. Extracts data (columnar, corrupt files are skipped with a warning)
+    workers = workers or os.cpu_count()
+    file_paths = [file_path for file_path, _, _ in new_files]
+    if workers > 1 and len(file_paths) > 1:
+        print(f"⚡ Parsing with {workers} worker processes.")
+        table, row_counts, corrupt_files = _parse_bronze_files_parallel(file_paths, workers)
+    else:
+        table, row_counts, corrupt_files = _parse_bronze_files(file_paths)
+
+    for source_file, reason in corrupt_files:
+        print(f"⚠️ Warning: Skipping corrupt file {source_file}: {reason}")
+    if corrupt_files:
+        _quarantine_files(corrupt_files)
+        print(f"🚧 Moved {len(corrupt_files)} corrupt files to: {QUARANTINE_DIR}")
+
+    parsed_files = [
+        (file_path, file_stat, digest, row_counts[file_path.name])
+        for file_path, file_stat, digest in new_files if file_path.name in row_counts
+    ]
+
+    # 4. SAVE DATA
+    if table.num_rows:
+        batch_name = f"part-{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        output_dir = SILVER_STAGING_DIR if full_rebuild else SILVER_DATASET_DIR
+        written_files = []
+        pq.write_to_dataset(
+            table,
+            root_path=output_dir,
+            partition_cols=PARTITION_COLUMNS,
+            basename_template=f"{batch_name}-{{i}}.parquet",
+            file_visitor=lambda written_file: written_files.append(written_file.path)
+        )
+
+        # 5. Update manifest only after the parts are fully written
+        for file_path, file_stat, digest, row_count in parsed_files:
+            ingested[file_path.name] = {
+                "size": file_stat.st_size,
+                "mtime_ns": file_stat.st_mtime_ns,
+                "rows": row_count,
+                "batch": batch_name,
+                "content_hash": digest
+            }
+        manifest["parts"].extend(
+            Path(written_file).relative_to(output_dir).as_posix() for written_file in sorted(written_files)
+        )
+        if full_rebuild:
+            _publish_rebuild(written_files, manifest)
+        else:
+            save_manifest(manifest)
+
+        print(f"✅ Processed {table.num_rows} new rows.")
+        print(f"💾 Saved {len(written_files)} partition files to: {SILVER_DATASET_DIR}")
+
+        return SILVER_DATASET_DIR # Return the path
+
+    elif manifest["parts"]:
+        print("⚠️ No valid data in the new files. Silver layer left unchanged.")
+        # Empty snapshots ({}) are recorded too, or every run would parse them again
+        for file_path, file_stat, digest, row_count in parsed_files:
+            ingested[file_path.name] = {
+                "size": file_stat.st_size,
+                "mtime_ns": file_stat.st_mtime_ns,
+                "rows": row_count,
+                "content_hash": digest
+            }
+        if duplicates or parsed_files:
+            save_manifest(manifest)
+        return SILVER_DATASET_DIR
 
     else:
         raise ValueError("❌ No valid data could be extracted from the files.")
 
 # Entry point for running the silver layer (data cleaning) locally
 if __name__ == "__main__":
-    process_data_cleaning()
+    parser = argparse.ArgumentParser(description="Silver Layer - Data Cleaning")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignore the manifest and rebuild Silver from every Bronze file."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of parsing processes for large backfills (0 = one per CPU core)."
+    )
+    parser.add_argument(
+        "--reprocess-quarantine",
+        nargs="*",
+        metavar="FILE",
+        help="Move quarantined Bronze files (all, or the given names) back and parse them again."
+    )
+    args = parser.parse_args()
+
+    if args.reprocess_quarantine is not None:
+        restored = reprocess_quarantine(args.reprocess_quarantine or None)
+        print(f"♻️ Moved {len(restored)} quarantined files back to: {BRONZE_DIR}")
+
+    process_data_cleaning(full_rebuild=args.full_rebuild, workers=args.workers)
@@ -0,0 +1,94 @@
+import sys
+import duckdb
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.silver import clean
+
+# --- CONSTANTS ---
+# Rows per Parquet row group in the compacted files (DuckDB's default vector-aligned size)
+ROW_GROUP_SIZE = 122_880
+COMPACTED_PREFIX = "compacted-"
+
+def process_data_compaction() -> Path:
+    """
+    Merges the small Silver part files into one Parquet file per Hive partition.
+
+    Process:
+    1. Reads the live parts from the Silver manifest and groups the small ones by their
+       partition folder (date=YYYY-MM-DD/coin_id=<coin>).
+    2. Rewrites each touched partition (its previous compacted file + the new parts) as a
+       single file sorted by timestamp (e.g. 'compacted-00003.parquet') with large row groups.
+    3. Swaps the manifest atomically, then deletes the replaced files.
+        - Readers always go through the manifest, so they never see duplicated or missing rows.
+
+    Returns:
+        Path: The absolute path to the Silver dataset directory.
+    """
+    print("🚀 Starting Silver Layer - Compaction")
+
+    manifest = clean.load_manifest()
+
+    # 1. Group the small parts by partition folder
+    touched_partitions = {}
+    for part_name in manifest["parts"]:
+        partition, file_name = part_name.rsplit("/", 1)
+        if not file_name.startswith(COMPACTED_PREFIX):
+            touched_partitions.setdefault(partition, []).append(part_name)
+
+    if not touched_partitions:
+        print("✅ Nothing to compact.")
+        return clean.SILVER_DATASET_DIR
+
+    generation = manifest.get("compaction_generation", 0) + 1
+    duckdb_con = duckdb.connect(database=':memory:')
+
+    try:
+        replaced_parts = []
+        new_parts = []
+
+        # 2. Rewrite each touched partition (previous compacted file + new parts)
+        for partition, small_parts in sorted(touched_partitions.items()):
+            existing = [
+                name for name in manifest["parts"]
+                if name.startswith(f"{partition}/{COMPACTED_PREFIX}")
+            ]
+            sources = [str(clean.SILVER_DATASET_DIR / name) for name in existing + small_parts]
+            part_name = f"{partition}/{COMPACTED_PREFIX}{generation:05d}.parquet"
+
+            # The partition columns live in the folder names, not in the files
+            duckdb_con.execute(f"""
+                COPY (
+                    SELECT * FROM read_parquet({sources}, hive_partitioning = false)
+                    ORDER BY extraction_timestamp
+                ) TO '{clean.SILVER_DATASET_DIR / part_name}' (FORMAT PARQUET, ROW_GROUP_SIZE {ROW_GROUP_SIZE})
+            """)
+
+            replaced_parts.extend(existing + small_parts)
+            new_parts.append(part_name)
+
+        # 3. Atomic swap: the manifest is the single source of truth for readers
+        replaced = set(replaced_parts)
+        manifest["parts"] = [name for name in manifest["parts"] if name not in replaced] + new_parts
+        manifest["compaction_generation"] = generation
+        clean.save_manifest(manifest)
+
+        for name in replaced_parts:
+            (clean.SILVER_DATASET_DIR / name).unlink(missing_ok=True)
+
+        print(f"✅ Compacted {len(replaced_parts)} files into {len(new_parts)} partitions.")
+        return clean.SILVER_DATASET_DIR
+
+    except Exception as error:
+        print(f"❌ Error during compaction: {error}")
+        raise error
+    finally:
+        duckdb_con.close()
+
+# Entry point for running the silver compaction locally
+if __name__ == "__main__":
+    process_data_compaction()
@@ -0,0 +1,351 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import duckdb
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.silver import clean
+
+# --- CONSTANTS ---
+# OHLCV bars of the Silver snapshots: bars/resolution=<r>/coin_id=<coin>/period=<period>/bars_0.parquet
+# One file per coin and period (a day of 1m bars, a month of 1h bars, a year of 1d bars), so
+# every run only rewrites the few files its new bars fall into.
+BARS_DIR = clean.SILVER_DIR / "bars"
+RESOLUTIONS = {"1m": 60, "1h": 3_600, "1d": 86_400}
+PERIOD_FORMATS = {"1m": "%Y-%m-%d", "1h": "%Y-%m", "1d": "%Y"}
+# Records, per resolution, where each coin's open bar starts and how many snapshots the
+# closed bars hold
+BARS_MANIFEST_FILE = BARS_DIR / "_manifest.json"
+# Local Silver timestamps are strings (see clean.py)
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+# Resolutions can be rolled up by concurrent calls (see run_pipeline.py): each one merges
+# its own entries into the manifest under this lock
+_MANIFEST_LOCK = threading.Lock()
+
+def load_bars_manifest() -> dict:
+    """
+    Loads the rollup manifest, or returns an empty one if this is the first run.
+    """
+    if not BARS_MANIFEST_FILE.exists():
+        return {"resolutions": {}}
+
+    with open(BARS_MANIFEST_FILE, "r") as manifest_file:
+        return json.load(manifest_file)
+
+def save_bars_manifest(manifest: dict) -> None:
+    """
+    Writes the manifest atomically (temp file + rename) so a crash never leaves it half-written.
+    """
+    temp_file = BARS_MANIFEST_FILE.with_suffix(".json.tmp")
+    with open(temp_file, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=4)
+    os.replace(temp_file, BARS_MANIFEST_FILE)
+
+def snapshot_bars_sql(source: str) -> str:
+    """
+    Returns the given Silver rows as one-snapshot bars (the shape bars_query() aggregates).
+    """
+    return f"""
+        SELECT
+            coin_id,
+            extraction_timestamp,
+            price_usd as open_usd,
+            price_usd as high_usd,
+            price_usd as low_usd,
+            price_usd,
+            volume_24h,
+            1 as snapshots
+        FROM {source}
+    """
+
+def bars_query(source: str, seconds: int) -> str:
+    """
+    Returns the closed OHLCV bars ('seconds' wide, aligned on the Unix epoch) of the given bars
+    (Silver rows through snapshot_bars_sql(), or finer bars). The last bar of each coin may
+    still receive snapshots: it is left out and built by a later run.
+
+    'extraction_timestamp' is the bar start, 'price_usd' its close and 'volume_24h' the last
+    24h volume reading; 'snapshots' counts the Silver rows it aggregates.
+    """
+    return f"""
+        SELECT
+            coin_id,
+            strftime(bar_start, '{TIMESTAMP_FORMAT}') as extraction_timestamp,
+            arg_min(open_usd, extraction_timestamp) as open_usd,
+            MAX(high_usd) as high_usd,
+            MIN(low_usd) as low_usd,
+            arg_max(price_usd, extraction_timestamp) as price_usd,
+            arg_max(volume_24h, extraction_timestamp) as volume_24h,
+            SUM(snapshots) as snapshots
+        FROM (
+            SELECT
+                *,
+                time_bucket(
+                    INTERVAL ({seconds}) SECOND,
+                    strptime(extraction_timestamp, '{TIMESTAMP_FORMAT}'),
+                    TIMESTAMP '1970-01-01'
+                ) as bar_start
+            FROM {source}
+        )
+        GROUP BY coin_id, bar_start
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY coin_id ORDER BY bar_start DESC) > 1
+    """
+
+def bars_files(resolution: str) -> list:
+    """
+    Returns the bar files of the given resolution.
+    """
+    return sorted((BARS_DIR / f"resolution={resolution}").glob("coin_id=*/period=*/*.parquet"))
+
+def bars_scan_sql(resolution: str) -> str:
+    """
+    Returns a query over the bars of the given resolution (coin_id from the partition path).
+    Filters on 'coin_id' prune whole folders before DuckDB opens them.
+    """
+    return f"""
+        SELECT coin_id, extraction_timestamp, open_usd, high_usd, low_usd, price_usd, volume_24h, snapshots
+        FROM read_parquet(
+            '{BARS_DIR / f"resolution={resolution}"}/coin_id=*/period=*/*.parquet',
+            hive_partitioning = true,
+            hive_types = {{'coin_id': VARCHAR, 'period': VARCHAR}}
+        )
+    """
+
+def rolled_up_sql(resolution: str, silver_source: str) -> str:
+    """
+    Returns every row of 'silver_source' as bars of the given resolution: the closed bars,
+    followed by the Silver rows not rolled up yet (each coin's open bar, as one-snapshot
+    bars). Aggregating it gives the same bars as aggregating the snapshots, from far fewer rows.
+    """
+    watermarks = load_bars_manifest()["resolutions"][resolution]["watermarks"]
+    values = ", ".join(
+        "('{}', '{}')".format(coin_id.replace("'", "''"), watermark) for coin_id, watermark in watermarks.items()
+    )
+    watermarks_sql = f"(VALUES {values})" if values else "(SELECT NULL, NULL WHERE false)"
+    pending = f"""(
+        SELECT silver.*
+        FROM {silver_source} silver
+        LEFT JOIN {watermarks_sql} watermarks(coin_id, watermark) USING (coin_id)
+        WHERE watermarks.watermark IS NULL OR silver.extraction_timestamp >= watermarks.watermark
+    )"""
+    return f"""
+        SELECT * FROM ({bars_scan_sql(resolution)})
+        UNION ALL BY NAME
+        {snapshot_bars_sql(pending)}
+    """
+
+def available_resolutions() -> dict:
+    """
+    Returns the resolutions (name -> seconds) the rollup has been built for.
+    """
+    built = load_bars_manifest()["resolutions"]
+    return {name: seconds for name, seconds in RESOLUTIONS.items() if name in built and bars_files(name)}
+
+def _pending_files(silver_files: list, watermarks: dict) -> list:
+    """
+    Keeps the Silver part files that can hold rows at or after their coin's watermark (the
+    'date=' and 'coin_id=' folders of each part are compared before any file is opened).
+    """
+    pending = []
+    for path in silver_files:
+        partitions = dict(part.split("=", 1) for part in Path(path).parts if "=" in part)
+        watermark = watermarks.get(partitions.get("coin_id"))
+        if watermark is None or partitions.get("date", "") >= f"{watermark[:4]}-{watermark[4:6]}-{watermark[6:8]}":
+            pending.append(path)
+    return pending
+
+def _write_bars(duckdb_con, resolution: str) -> int:
+    """
+    Merges the 'closed' bars into the files of their (coin, period) and replaces those files.
+
+    Returns:
+        int: Number of files written.
+    """
+    resolution_dir = BARS_DIR / f"resolution={resolution}"
+    staging_dir = resolution_dir / "_staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    resolution_dir.mkdir(parents=True, exist_ok=True)
+
+    duckdb_con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE touched AS
+        SELECT *, strftime(strptime(extraction_timestamp, '{TIMESTAMP_FORMAT}'), '{PERIOD_FORMATS[resolution]}') as period
+        FROM closed
+    """)
+    touched = duckdb_con.execute("SELECT DISTINCT coin_id, period FROM touched").fetchall()
+    existing = [
+        str(path)
+        for coin_id, period in touched
+        for path in (resolution_dir / f"coin_id={coin_id}" / f"period={period}").glob("*.parquet")
+    ]
+
+    # Existing bars of the touched files + the new ones (a bar rewritten by an interrupted run
+    # is replaced, not duplicated)
+    existing_bars = "SELECT * FROM touched WHERE false"
+    if existing:
+        existing_bars = f"""
+            SELECT * FROM read_parquet({existing}, hive_partitioning = true, hive_types = {{'coin_id': VARCHAR, 'period': VARCHAR}})
+            ANTI JOIN touched USING (coin_id, extraction_timestamp)
+        """
+    duckdb_con.execute(f"""
+        COPY (
+            SELECT * FROM ({existing_bars}) UNION ALL BY NAME SELECT * FROM touched
+            ORDER BY coin_id, extraction_timestamp
+        ) TO '{staging_dir}' (FORMAT PARQUET, PARTITION_BY (coin_id, period), FILENAME_PATTERN 'bars_{{i}}')
+    """)
+
+    # Each staged file replaces its counterpart atomically
+    written = 0
+    for staged_dir in sorted({path.parent for path in staging_dir.rglob("*.parquet")}):
+        target_dir = resolution_dir / staged_dir.relative_to(staging_dir)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        staged_names = set()
+        for staged_file in sorted(staged_dir.glob("*.parquet")):
+            os.replace(staged_file, target_dir / staged_file.name)
+            staged_names.add(staged_file.name)
+            written += 1
+        for stale_file in target_dir.glob("*.parquet"):
+            if stale_file.name not in staged_names:
+                stale_file.unlink()
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    return written
+
+def process_data_rollup(full_rebuild: bool = False, resolutions: list = None) -> Path:
+    """
+    Maintains OHLCV bars of the Silver snapshots at every resolution (1m, 1h, 1d).
+
+    Process:
+    1. Per resolution, reads only the Silver rows at or after each coin's open bar (the
+       manifest watermark): older date partitions are never opened.
+    2. Aggregates them into bars (open, high, low, close, last volume, snapshot count). The
+       open bar of each coin is left for the next run, so published bars never change.
+    3. Merges the closed bars into their (coin, period) files and replaces those files.
+    4. Records the new watermarks and snapshot counts in the manifest.
+
+    Every Silver row must be either in a closed bar or at/after the watermarks; late or
+    rewritten Silver rows rebuild the resolution from scratch.
+
+    Resolutions are independent (own folder, own manifest entry), so they can be rolled up
+    by concurrent calls with different 'resolutions'.
+
+    Args:
+        full_rebuild (bool): Rebuilds every resolution from the entire Silver history.
+        resolutions (list): Only rolls up these resolutions (default: all of RESOLUTIONS).
+
+    Returns:
+        Path: The absolute path to the bars directory.
+
+    Raises:
+        FileNotFoundError: If the Silver dataset is missing.
+    """
+    print("🚀 Starting Silver Layer - Bar Rollups")
+
+    silver_files = [str(path) for path in clean.list_silver_files()]
+    if not silver_files:
+        raise FileNotFoundError("❌ No Silver parquet files found. Please run 'clean.py' first.")
+
+    BARS_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = load_bars_manifest()
+    duckdb_con = duckdb.connect(database=':memory:')
+
+    try:
+        # Row counts come from the Parquet footers: no data pages are read
+        silver_rows = duckdb_con.execute(f"SELECT COUNT(*) FROM ({clean.silver_scan_sql(silver_files)})").fetchone()[0]
+
+        for resolution, seconds in RESOLUTIONS.items():
+            if resolutions is not None and resolution not in resolutions:
+                continue
+            state = manifest["resolutions"].get(resolution)
+            if full_rebuild or state is None:
+                state = {"watermarks": {}, "snapshots": 0}
+                shutil.rmtree(BARS_DIR / f"resolution={resolution}", ignore_errors=True)
+
+            # 1. Silver rows at or after each coin's watermark
+            pending_files = _pending_files(silver_files, state["watermarks"])
+            duckdb_con.execute("CREATE OR REPLACE TEMP TABLE watermarks (coin_id VARCHAR, watermark VARCHAR)")
+            if state["watermarks"]:
+                duckdb_con.executemany("INSERT INTO watermarks VALUES (?, ?)", list(state["watermarks"].items()))
+            duckdb_con.execute(f"""
+                CREATE OR REPLACE TEMP TABLE pending AS
+                SELECT silver.* EXCLUDE (date)
+                FROM ({clean.silver_scan_sql(pending_files or silver_files)}) silver
+                LEFT JOIN watermarks USING (coin_id)
+                WHERE watermarks.watermark IS NULL OR silver.extraction_timestamp >= watermarks.watermark
+            """)
+            pending_rows = duckdb_con.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+            if state["snapshots"] + pending_rows != silver_rows:
+                print(f"⚠️ Silver history changed since the last {resolution} rollup. Rebuilding it.")
+                state = {"watermarks": {}, "snapshots": 0}
+                shutil.rmtree(BARS_DIR / f"resolution={resolution}", ignore_errors=True)
+                duckdb_con.execute(f"""
+                    CREATE OR REPLACE TEMP TABLE pending AS
+                    SELECT * EXCLUDE (date) FROM ({clean.silver_scan_sql(silver_files)})
+                """)
+
+            # 2. Closed bars (the open bar of each coin stays pending)
+            duckdb_con.execute(f"""
+                CREATE OR REPLACE TEMP TABLE closed AS
+                {bars_query(f"({snapshot_bars_sql('pending')})", seconds)}
+            """)
+            closed_bars, closed_snapshots = duckdb_con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(snapshots), 0) FROM closed"
+            ).fetchone()
+            if closed_bars == 0:
+                manifest["resolutions"][resolution] = state
+                print(f"✅ {resolution}: no new closed bars.")
+                continue
+
+            # 3. Merge them into their files
+            written = _write_bars(duckdb_con, resolution)
+
+            # 4. The next run starts at each coin's open bar
+            next_bars = duckdb_con.execute(f"""
+                SELECT coin_id, strftime(MAX(bar_start), '{TIMESTAMP_FORMAT}')
+                FROM (
+                    SELECT coin_id, time_bucket(
+                        INTERVAL ({seconds}) SECOND, strptime(extraction_timestamp, '{TIMESTAMP_FORMAT}'), TIMESTAMP '1970-01-01'
+                    ) as bar_start
+                    FROM pending
+                )
+                GROUP BY coin_id
+            """).fetchall()
+            state["watermarks"].update(dict(next_bars))
+            state["snapshots"] += int(closed_snapshots)
+            manifest["resolutions"][resolution] = state
+            print(f"✅ {resolution}: {closed_bars} new closed bars ({written} files rewritten).")
+
+        # Only this call's resolutions: entries saved meanwhile by a concurrent call are kept
+        with _MANIFEST_LOCK:
+            latest = load_bars_manifest()
+            latest["resolutions"].update({
+                resolution: state for resolution, state in manifest["resolutions"].items()
+                if resolutions is None or resolution in resolutions
+            })
+            save_bars_manifest(latest)
+        return BARS_DIR
+
+    except Exception as error:
+        print(f"❌ Error during the bar rollups: {error}")
+        raise error
+    finally:
+        duckdb_con.close()
+
+# Entry point for running the bar rollups locally
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Silver Layer - OHLCV Bar Rollups")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Rebuild every resolution from the entire Silver history."
+    )
+    args = parser.parse_args()
+
+    process_data_rollup(full_rebuild=args.full_rebuild)
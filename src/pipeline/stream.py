@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# --- SETUP ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+# --- IMPORTS ---
+from src.pipeline.bronze import fetch, ingest
+from src.pipeline.silver.clean import process_data_cleaning
+from src.pipeline.silver.rollup import process_data_rollup
+from src.pipeline.gold.analyze import process_data_analytics
+
+# --- CONSTANTS ---
+POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", 15))
+# Bronze file names have second resolution: two polls must not share a second
+MIN_POLL_INTERVAL = 1.0
+# Flush the buffer to Bronze/Silver/Gold once it holds FLUSH_SNAPSHOTS or every FLUSH_SECONDS
+FLUSH_SNAPSHOTS = int(os.getenv("STREAM_FLUSH_SNAPSHOTS", 8))
+FLUSH_SECONDS = float(os.getenv("STREAM_FLUSH_SECONDS", 120))
+# Backpressure: when downstream falls behind (the buffer reaches MAX_BUFFERED snapshots, or a
+# flush takes longer than FLUSH_SECONDS), polling drops to SLOW_POLL_INTERVAL until it catches up
+MAX_BUFFERED = int(os.getenv("STREAM_MAX_BUFFERED", 32))
+SLOW_POLL_INTERVAL = float(os.getenv("STREAM_SLOW_POLL_INTERVAL", 60))
+# While flushes keep failing, at most MAX_PENDING snapshots stay in memory: older ones are
+# spilled to Bronze only (Silver picks them up once it recovers), or dropped if that fails too
+MAX_PENDING = int(os.getenv("STREAM_MAX_PENDING", 256))
+# A failed flush is retried after FLUSH_RETRY_SECONDS, doubling per failure up to FLUSH_SECONDS
+FLUSH_RETRY_SECONDS = float(os.getenv("STREAM_FLUSH_RETRY_SECONDS", 5))
+
+def flush_to_pipeline(batch: list) -> int:
+    """
+    Writes a batch of buffered (extracted_at, snapshot) pairs to Bronze, then runs the
+    incremental Silver, rollup and Gold steps once for the whole batch.
+
+    Re-flushing a batch after a failure is safe: identical snapshots are not stored twice
+    (content hash) and Silver only ingests files it has not seen.
+
+    Returns:
+        int: The number of new Bronze files.
+    """
+    stored = {ingest.store_snapshot(snapshot, extracted_at) for extracted_at, snapshot in batch}
+    process_data_cleaning()
+    process_data_rollup()
+    process_data_analytics()
+    return len(stored)
+
+def spill_to_bronze(batch: list) -> int:
+    """
+    Writes buffered (extracted_at, snapshot) pairs to Bronze only, without running the
+    downstream steps. Returns the number of new Bronze files.
+    """
+    return len({ingest.store_snapshot(snapshot, extracted_at) for extracted_at, snapshot in batch})
+
+class StreamingIngestion:
+    """
+    Long-running ingestion loop: polls CoinGecko every 'poll_interval' seconds, buffers the
+    snapshots in memory and flushes them downstream in batches (by size or by time).
+
+    Polling and flushing are two asyncio tasks; the blocking fetch and pipeline calls run in
+    worker threads, so a slow flush never delays a poll. While downstream is behind, polls
+    happen every 'slow_poll_interval' seconds instead.
+
+    When flushes fail, they are retried with exponential backoff and the buffer is capped at
+    'max_pending' snapshots (the oldest are spilled to Bronze only).
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = POLL_INTERVAL,
+        flush_snapshots: int = FLUSH_SNAPSHOTS,
+        flush_seconds: float = FLUSH_SECONDS,
+        max_buffered: int = MAX_BUFFERED,
+        slow_poll_interval: float = SLOW_POLL_INTERVAL,
+        max_pending: int = MAX_PENDING,
+        flush_retry_seconds: float = FLUSH_RETRY_SECONDS,
+        fetcher=None,
+        sink=flush_to_pipeline,
+        spill=spill_to_bronze
+    ):
+        if poll_interval < MIN_POLL_INTERVAL:
+            raise ValueError(
+                f"poll_interval must be at least {MIN_POLL_INTERVAL:g} s (Bronze file names have second resolution)."
+            )
+
+        self.poll_interval = poll_interval
+        self.flush_snapshots = flush_snapshots
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max_buffered
+        self.slow_poll_interval = max(slow_poll_interval, poll_interval)
+        self.max_pending = max(max_pending, flush_snapshots)
+        self.flush_retry_seconds = flush_retry_seconds
+        self.fetcher = fetcher
+        self.sink = sink
+        self.spill = spill
+
+        self.buffer = []
+        self.slow = False
+        self.last_flush_seconds = 0.0
+        self.failed_in_a_row = 0
+        self.retry_at = 0.0
+        self.stats = {
+            "polls": 0, "failed_polls": 0, "flushes": 0, "failed_flushes": 0, "slowdowns": 0,
+            "spilled": 0, "dropped": 0
+        }
+
+    @property
+    def current_interval(self) -> float:
+        return self.slow_poll_interval if self.slow else self.poll_interval
+
+    def _update_cadence(self) -> None:
+        """
+        Switches to the slow cadence when downstream falls behind, back once it has caught up.
+        """
+        behind = len(self.buffer) >= self.max_buffered or self.last_flush_seconds > self.flush_seconds
+        caught_up = len(self.buffer) < self.flush_snapshots and self.last_flush_seconds <= self.flush_seconds
+
+        if behind and not self.slow:
+            self.slow = True
+            self.stats["slowdowns"] += 1
+            print(
+                f"🐢 Downstream is behind ({len(self.buffer)} buffered, last flush {self.last_flush_seconds:.1f} s). "
+                f"Polling every {self.slow_poll_interval:g} s."
+            )
+        elif caught_up and self.slow:
+            self.slow = False
+            print(f"🐇 Downstream caught up. Polling every {self.poll_interval:g} s again.")
+
+    async def _cap_buffer(self) -> None:
+        """
+        Keeps at most 'max_pending' snapshots in memory: the oldest go to Bronze only (or are
+        dropped if even that fails).
+        """
+        overflow = len(self.buffer) - self.max_pending
+        if overflow <= 0:
+            return
+        oldest, self.buffer = self.buffer[:overflow], self.buffer[overflow:]
+        try:
+            await asyncio.to_thread(self.spill, oldest)
+        except Exception as error:
+            self.stats["dropped"] += len(oldest)
+            print(f"❌ Could not spill {len(oldest)} snapshots to Bronze ({error}). Dropped.")
+        else:
+            self.stats["spilled"] += len(oldest)
+            print(f"🪣 Buffer full: spilled the {len(oldest)} oldest snapshots to Bronze only.")
+
+    async def _poll_loop(self, stop: asyncio.Event, flush_due: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            started = loop.time()
+            extracted_at = datetime.now()
+            try:
+                snapshot = await asyncio.to_thread(self.fetcher)
+            except Exception as error:
+                # One failed poll is a gap, not a reason to stop the service
+                self.stats["failed_polls"] += 1
+                print(f"⚠️ Poll failed ({error}). Retrying at the next tick.")
+            else:
+                self.stats["polls"] += 1
+                self.buffer.append((extracted_at, snapshot))
+                await self._cap_buffer()
+                if len(self.buffer) >= self.flush_snapshots:
+                    flush_due.set()
+            self._update_cadence()
+
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=max(0.0, self.current_interval - (loop.time() - started)))
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush(self) -> None:
+        """
+        Hands the buffered snapshots to the sink. On failure they go back to the front of
+        the buffer and the next flush waits 'flush_retry_seconds', doubled per failure in a
+        row (at most 'flush_seconds').
+        """
+        batch, self.buffer = self.buffer, []
+        started = time.perf_counter()
+        try:
+            stored = await asyncio.to_thread(self.sink, batch)
+        except Exception as error:
+            self.buffer = batch + self.buffer
+            self.stats["failed_flushes"] += 1
+            self.failed_in_a_row += 1
+            delay = min(
+                max(self.flush_seconds, self.flush_retry_seconds),
+                self.flush_retry_seconds * 2 ** (self.failed_in_a_row - 1)
+            )
+            self.retry_at = time.monotonic() + delay
+            print(f"❌ Flush of {len(batch)} snapshots failed ({error}). Kept in the buffer, retrying in {delay:g} s.")
+            await self._cap_buffer()
+        else:
+            self.failed_in_a_row = 0
+            self.retry_at = 0.0
+            self.stats["flushes"] += 1
+            print(f"💾 Flushed {len(batch)} snapshots ({stored} new Bronze files) in {time.perf_counter() - started:.1f} s.")
+        self.last_flush_seconds = time.perf_counter() - started
+        self._update_cadence()
+
+    async def _flush_loop(self, stop: asyncio.Event, flush_due: asyncio.Event) -> None:
+        while not stop.is_set():
+            backoff = self.retry_at - time.monotonic()
+            try:
+                await asyncio.wait_for(flush_due.wait(), timeout=backoff if backoff > 0 else self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            flush_due.clear()
+            # After a failure, nothing is flushed before the backoff is over (except at shutdown)
+            if self.buffer and time.monotonic() >= self.retry_at:
+                await self.flush()
+
+        # Shutdown: whatever is still buffered goes downstream
+        if self.buffer:
+            await self.flush()
+
+    async def run(self, duration: float = None) -> dict:
+        """
+        Polls and flushes until SIGINT/SIGTERM (or for 'duration' seconds), then flushes
+        the buffer and returns the counters.
+        """
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        flush_due = asyncio.Event()
+
+        session = None
+        if self.fetcher is None:
+            # One pooled session for the whole run: keep-alive connections between polls
+            session = fetch.create_session()
+            self.fetcher = lambda: ingest.fetch_snapshot(session=session)
+
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass # Not supported on this platform / outside the main thread
+        if duration is not None:
+            loop.call_later(duration, stop.set)
+
+        print(
+            f"🚀 Streaming ingestion: polling every {self.poll_interval:g} s, flushing every "
+            f"{self.flush_snapshots} snapshots or {self.flush_seconds:g} s."
+        )
+        try:
+            poller = asyncio.create_task(self._poll_loop(stop, flush_due))
+            flusher = asyncio.create_task(self._flush_loop(stop, flush_due))
+            await stop.wait()
+            flush_due.set()
+            await asyncio.gather(poller, flusher)
+        finally:
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(signal_number)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            if session is not None:
+                session.close()
+                self.fetcher = None
+
+        print(f"🛑 Streaming ingestion stopped: {self.stats}")
+        return self.stats
+
+# Entry point: python src/pipeline/stream.py --interval 15 --flush-snapshots 8 --flush-seconds 120
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming ingestion daemon (Bronze -> Silver -> Gold)")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Seconds between polls.")
+    parser.add_argument("--flush-snapshots", type=int, default=FLUSH_SNAPSHOTS, help="Flush once this many snapshots are buffered.")
+    parser.add_argument("--flush-seconds", type=float, default=FLUSH_SECONDS, help="Flush at least this often (seconds).")
+    parser.add_argument("--max-buffered", type=int, default=MAX_BUFFERED, help="Buffered snapshots that trigger the slow cadence.")
+    parser.add_argument("--slow-interval", type=float, default=SLOW_POLL_INTERVAL, help="Seconds between polls while downstream is behind.")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING, help="Snapshots kept in memory while flushes fail (older ones are spilled to Bronze).")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds (default: run until interrupted).")
+    args = parser.parse_args()
+
+    try:
+        daemon = StreamingIngestion(
+            poll_interval=args.interval,
+            flush_snapshots=args.flush_snapshots,
+            flush_seconds=args.flush_seconds,
+            max_buffered=args.max_buffered,
+            slow_poll_interval=args.slow_interval,
+            max_pending=args.max_pending
+        )
+    except ValueError as error:
+        parser.error(str(error))
+
+    asyncio.run(daemon.run(duration=args.duration))
@@ -0,0 +1,69 @@
+import sys
+import os
+import json
+import pytest
+
+# Make 'cloud_functions' importable the same way the Cloud Functions runtime sees it
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+# Local pipeline in a temporary directory, one layer per fixture: each one redirects its
+# module's folders on top of the layers below it and returns the Bronze folder
+@pytest.fixture
+def silver_env(tmp_path, monkeypatch):
+    from src.pipeline.silver import clean
+
+    bronze_dir = tmp_path / "bronze"
+    silver_dir = tmp_path / "silver"
+    bronze_dir.mkdir()
+
+    monkeypatch.setattr(clean, "BRONZE_DIR", bronze_dir)
+    monkeypatch.setattr(clean, "SILVER_DIR", silver_dir)
+    monkeypatch.setattr(clean, "SILVER_DATASET_DIR", silver_dir / "cleaned_crypto_prices")
+    monkeypatch.setattr(clean, "SILVER_STAGING_DIR", silver_dir / "_rebuild")
+    monkeypatch.setattr(clean, "MANIFEST_FILE", silver_dir / "_manifest.json")
+    monkeypatch.setattr(clean, "QUARANTINE_DIR", tmp_path / "quarantine")
+    monkeypatch.setattr(clean, "QUARANTINE_INDEX_FILE", tmp_path / "quarantine" / "_index.json")
+    return bronze_dir
+
+@pytest.fixture
+def rollup_env(silver_env, tmp_path, monkeypatch):
+    from src.pipeline.silver import rollup
+
+    monkeypatch.setattr(rollup, "BARS_DIR", tmp_path / "silver" / "bars")
+    monkeypatch.setattr(rollup, "BARS_MANIFEST_FILE", tmp_path / "silver" / "bars" / "_manifest.json")
+    return silver_env
+
+@pytest.fixture
+def gold_env(rollup_env, tmp_path, monkeypatch):
+    from src.pipeline.gold import analyze
+
+    gold_dir = tmp_path / "gold"
+    monkeypatch.setattr(analyze, "GOLD_DIR", gold_dir)
+    monkeypatch.setattr(analyze, "GOLD_FILE", gold_dir / "analyzed_market_summary.parquet")
+    monkeypatch.setattr(analyze, "SUMMARY_MANIFEST_FILE", gold_dir / "_summary_manifest.json")
+    monkeypatch.setattr(analyze, "SUMMARY_PARTS_DIR", gold_dir / "summary_parts")
+    monkeypatch.setattr(analyze, "STATE_FILE", gold_dir / "_rolling_state.parquet")
+    monkeypatch.setattr(analyze, "LATEST_FILE", gold_dir / "latest_per_coin.parquet")
+    return rollup_env
+
+@pytest.fixture
+def lake_env(gold_env, monkeypatch):
+    # Every layer, including the Bronze ingestion writes
+    from src.pipeline.bronze import ingest
+
+    monkeypatch.setattr(ingest, "DATA_DIR", gold_env)
+    monkeypatch.setattr(ingest, "HASH_INDEX_FILE", gold_env / "_index" / "recent_hashes.json")
+    return gold_env
+
+@pytest.fixture
+def write_snapshots(silver_env):
+    def write(minutes):
+        # Snapshots on 2026-01-16 from 10:00 onwards, a few seconds into the minute.
+        # Deterministic but non-monotonic prices so BUY/SELL/WAIT all occur
+        for minute in minutes:
+            timestamp = f"20260116_{10 + minute // 60:02d}{minute % 60:02d}{minute % 3 * 15:02d}"
+            (silver_env / f"raw_prices_{timestamp}.json").write_text(json.dumps({
+                "bitcoin": {"usd": 50000.0 + (minute * 37) % 11 * 125.5, "usd_24h_vol": 1000.0 + minute},
+                "solana": {"usd": 140.0 + (minute * 13) % 7 * 0.33, "usd_24h_vol": 500.0 + minute}
+            }))
+    return write
@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+def fake_price(coin_id: str) -> float:
+    # Deterministic price per coin so merged snapshots can be checked
+    return float(sum(ord(char) for char in coin_id))
+
+class FakeCoinGecko:
+    """
+    Local stand-in for CoinGecko's /simple/price endpoint, served on a random port.
+
+    Records the ids of every request and the peak number of requests in flight.
+
+    'faults' scripts the first responses, one entry per request, before normal service:
+        429 / 503 ...           -> that status code
+        (429, "2")              -> that status code with a 'Retry-After: 2' header
+        "timeout"               -> the response is held for 'timeout_delay' seconds
+    """
+
+    def __init__(self, latency: float = 0.0, status: int = 200, faults: list = None, timeout_delay: float = 1.0):
+        self.latency = latency
+        self.status = status
+        self.faults = list(faults or [])
+        self.timeout_delay = timeout_delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/api/v3/simple/price"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                coin_ids = parse_qs(urlparse(self.path).query).get("ids", [""])[0].split(",")
+                with fake._lock:
+                    fake.requests.append(coin_ids)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    fault = fake.faults.pop(0) if fake.faults else None
+                try:
+                    time.sleep(fake.timeout_delay if fault == "timeout" else fake.latency)
+                    status, retry_after = fake.status, None
+                    if isinstance(fault, int):
+                        status = fault
+                    elif isinstance(fault, tuple):
+                        status, retry_after = fault
+
+                    body = json.dumps({
+                        coin_id: {"usd": fake_price(coin_id), "usd_24h_vol": 1000.0} for coin_id in coin_ids
+                    }).encode()
+                    self.send_response(status)
+                    if retry_after is not None:
+                        self.send_header("Retry-After", retry_after)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timeout) before the response was sent
+                    pass
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -1,70 +1,158 @@
-import sys
+import json
 import os
+import shutil
+import subprocess
+import sys
 import pytest
 from requests.exceptions import HTTPError
 
 # Import the function to be tested
-from cloud_functions.bronze.main import ingest_bronze
+from cloud_functions.bronze import main as bronze_main
+from cloud_functions.bronze.main import process_data_ingestion
+from fake_coingecko import FakeCoinGecko
+
+@pytest.fixture(autouse=True)
+def cold_instance(mocker):
+    # Every test starts like a fresh function instance (no cached clients)
+    mocker.patch.object(bronze_main, "_http_session", None)
+    mocker.patch.object(bronze_main, "_storage_client", None)
+    mocker.patch.object(bronze_main, "_rate_limiter", None)
+
+def fake_bucket(mocker):
+    # Mock the 'storage' library to not hit real Google Cloud: blobs are kept in 'uploads'
+    mock_storage = mocker.patch('cloud_functions.bronze.main.storage')
+    uploads = {}
+
+    def make_blob(blob_name):
+        blob = mocker.Mock(spec=["exists", "download_as_bytes", "upload_from_string"])
+        blob.exists.side_effect = lambda: blob_name in uploads
+        blob.download_as_bytes.side_effect = lambda: uploads[blob_name].encode()
+        blob.upload_from_string.side_effect = lambda data, content_type=None: uploads.__setitem__(blob_name, data)
+        return blob
+
+    mock_storage.Client.return_value.bucket.return_value.blob.side_effect = make_blob
+    return mock_storage, uploads
 
-# Setup config for testing
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+def snapshots(uploads):
+    return {name: json.loads(data) for name, data in uploads.items() if name.startswith("raw_prices_")}
+
+def fake_request(mocker, coins=None):
+    request = mocker.Mock()
+    request.args = {"coins": coins} if coins else {}
+    return request
 
 # Test 1
 def test_ingest_bronze_success(mocker):
-    # Verifies that params are passed correctly to requests.get
+    # Verifies that the requested coins are fetched and uploaded as one snapshot
 
     # SETUP:
-    # Mock the 'requests' library to not hit the real CoinGecko API
-    mock_requests = mocker.patch('cloud_functions.bronze.main.requests')
-
-    # Define what the fake API should return
-    mock_response = mocker.Mock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "bitcoin": {"usd": 50000},
-        "ethereum": {"usd": 3000},
-        "solana": {"usd": 100}
-    }
-    mock_requests.get.return_value = mock_response
-
-    # Mock the 'storage' library to not hit real Google Cloud
-    mock_storage = mocker.patch('cloud_functions.bronze.main.storage')
+    # A local fake API instead of the real CoinGecko API
+    with FakeCoinGecko() as server:
+        mocker.patch.object(bronze_main, "COINGECKO_URL", server.url)
 
-    # Drill down to the blob. This mocks the entire chain: storage.Client().bucket().blob()
-    mock_blob = mock_storage.Client.return_value.bucket.return_value.blob.return_value
+        mock_storage, uploads = fake_bucket(mocker)
 
-    # EXECUTE:
-    # Run the actual function
-    ingest_bronze(mocker.Mock())
+        # EXECUTE:
+        # Run the actual function
+        message, status = process_data_ingestion(fake_request(mocker, "bitcoin,ethereum,solana"))
 
     # ASSERT:
-    # Check that it was called with 'params', not just a long URL string
-    mock_requests.get.assert_called_once_with(
-        "https://api.coingecko.com/api/v3/simple/price",
-        params={
-            "ids": "bitcoin,ethereum,solana",
-            "vs_currencies": "usd",
-            "include_24hr_vol": "true"
-        }
-    )
+    assert status == 200
+    assert server.requests == [["bitcoin", "ethereum", "solana"]]
 
-    mock_blob.upload_from_string.assert_called_once()
+    assert len(snapshots(uploads)) == 1
+    assert list(*snapshots(uploads).values()) == ["bitcoin", "ethereum", "solana"]
 
 # Test 2
+def test_ingest_bronze_batches_large_coin_lists(mocker):
+    coins = [f"coin-{index}" for index in range(120)]
+    with FakeCoinGecko() as server:
+        mocker.patch.object(bronze_main, "COINGECKO_URL", server.url)
+        mock_storage, uploads = fake_bucket(mocker)
+
+        process_data_ingestion(fake_request(mocker, ",".join(coins)))
+
+    assert sorted(len(batch) for batch in server.requests) == [20, 50, 50]
+    assert [len(snapshot) for snapshot in snapshots(uploads).values()] == [120]
+
+# Test 3
+def test_ingest_bronze_retries_throttled_requests(mocker):
+    # A transient 429 no longer fails the whole run
+    with FakeCoinGecko(faults=[(429, "0")]) as server:
+        mocker.patch.object(bronze_main, "COINGECKO_URL", server.url)
+        # A 429 empties the token bucket: refill fast so the test doesn't wait 2s for a token
+        mocker.patch.object(bronze_main, "REQUESTS_PER_MINUTE", 6000)
+        mock_storage, uploads = fake_bucket(mocker)
+
+        message, status = process_data_ingestion(fake_request(mocker, "bitcoin"))
+
+    assert status == 200
+    assert len(server.requests) == 2
+    assert len(snapshots(uploads)) == 1
+
+# Test 4
 def test_ingest_bronze_api_failure(mocker):
-    # Test that the function handles API failures gracefully (or raises error).
-    mock_requests = mocker.patch('cloud_functions.bronze.main.requests')
+    # Test that the function raises on API failures instead of uploading a partial snapshot
+    with FakeCoinGecko(status=404) as server:
+        mocker.patch.object(bronze_main, "COINGECKO_URL", server.url)
+        mock_storage, uploads = fake_bucket(mocker)
+
+        # Run function and expect it to fail
+        with pytest.raises(HTTPError) as excinfo:
+            process_data_ingestion(fake_request(mocker))
+
+    assert "404" in str(excinfo.value)
+    assert uploads == {}
+
+# Test 5
+def test_warm_invocations_reuse_the_clients(mocker, capsys):
+    with FakeCoinGecko() as server:
+        mocker.patch.object(bronze_main, "COINGECKO_URL", server.url)
+        mock_storage, uploads = fake_bucket(mocker)
+
+        process_data_ingestion(fake_request(mocker, "bitcoin"))
+        session = bronze_main._http_session
+        process_data_ingestion(fake_request(mocker, "bitcoin"))
 
-    # Fake a 404 Error
-    mock_response = mocker.Mock()
-    mock_response.status_code = 404
+    # One GCS client and one HTTP session for both calls
+    mock_storage.Client.assert_called_once()
+    assert bronze_main._http_session is session
+
+    output = capsys.readouterr().out
+    assert output.count("Timings (cold)") == 1
+    assert output.count("Timings (warm)") == 1
+    assert '"setup_s"' in output and '"fetch_s"' in output and '"upload_s"' in output
+
+# Test 6
+def test_deployed_bundle_uses_the_shared_fetch_engine(tmp_path):
+    # SETUP: the archive layout built by infra/functions.tf (main.py + a copy of fetch.py)
+    src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+    shutil.copy(os.path.join(src_dir, "cloud_functions/bronze/main.py"), tmp_path / "main.py")
+    shutil.copy(os.path.join(src_dir, "pipeline/bronze/fetch.py"), tmp_path / "fetch.py")
+
+    # EXECUTE: imported the way the runtime does, without the repository on the path
+    result = subprocess.run(
+        [sys.executable, "-c", "import main; print(main.fetch.__name__)"],
+        cwd=tmp_path, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ""}
+    )
+
+    # ASSERT:
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "fetch"
 
-    # Mock raise_for_status to actually raise an error
-    mock_response.raise_for_status.side_effect = Exception("Failed to fetch data")
-    mock_requests.get.return_value = mock_response
+# Test 7
+def test_identical_payload_is_not_uploaded_again(mocker):
+    with FakeCoinGecko() as server:
+        mocker.patch.object(bronze_main, "COINGECKO_URL", server.url)
+        mock_storage, uploads = fake_bucket(mocker)
+        first_message, _ = process_data_ingestion(fake_request(mocker, "bitcoin"))
 
-    # Run function and expect it to fail
-    with pytest.raises(Exception) as excinfo:
-        ingest_bronze(mocker.Mock())
+        # EXECUTE: the API serves the same (cached) payload again
+        message, status = process_data_ingestion(fake_request(mocker, "bitcoin"))
 
-    assert "Failed to fetch data" in str(excinfo.value)
+    # ASSERT: one Bronze snapshot, and a marker (skipped by Silver's trigger) pointing to it
+    assert status == 200
+    assert len(snapshots(uploads)) == 1
+    assert message == f"{first_message} (unchanged)"
+    markers = [name for name in uploads if name.startswith("_hashes/")]
+    assert len(markers) == 1 and not markers[0].endswith(".json")
@@ -0,0 +1,155 @@
+import json
+import time
+import pytest
+import requests
+
+# Import the module to be tested (local Bronze fetch engine)
+from src.pipeline.bronze import fetch, ingest
+from fake_coingecko import FakeCoinGecko, fake_price
+
+@pytest.fixture
+def fake_api():
+    with FakeCoinGecko() as server:
+        yield server
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    # Keep the backoff short so the retry tests run in milliseconds
+    monkeypatch.setattr(fetch, "BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(fetch, "REQUEST_TIMEOUT", 0.2)
+
+def unlimited():
+    return fetch.TokenBucket(requests_per_minute=600_000, capacity=100)
+
+COINS = [f"coin-{index:03d}" for index in range(230)]
+
+# Test 1
+def test_batches_are_merged_into_one_snapshot(fake_api):
+    snapshot = fetch.fetch_prices(COINS, api_url=fake_api.url, batch_size=50, rate_limiter=unlimited())
+
+    # 230 coins -> 5 requests of at most 50 ids, every coin fetched exactly once
+    assert sorted(len(batch) for batch in fake_api.requests) == [30, 50, 50, 50, 50]
+    assert sorted(coin for batch in fake_api.requests for coin in batch) == COINS
+    assert snapshot == {coin: {"usd": fake_price(coin), "usd_24h_vol": 1000.0} for coin in COINS}
+
+# Test 2
+def test_batches_run_concurrently_up_to_the_limit():
+    with FakeCoinGecko(latency=0.2) as server:
+        started = time.perf_counter()
+        fetch.fetch_prices(COINS[:80], api_url=server.url, batch_size=10, max_concurrency=4, rate_limiter=unlimited())
+        elapsed = time.perf_counter() - started
+
+    # 8 batches of 0.2s, 4 at a time: ~0.4s instead of ~1.6s sequentially
+    assert server.max_in_flight == 4
+    assert elapsed < 1.0
+
+# Test 3
+def test_token_bucket_allows_a_burst_then_spaces_requests(fake_api):
+    started = time.perf_counter()
+    fetch.fetch_prices(
+        COINS[:60], api_url=fake_api.url, batch_size=10,
+        rate_limiter=fetch.TokenBucket(requests_per_minute=600, capacity=2)
+    )
+
+    # 6 requests: 2 from the burst, then one every 0.1s
+    assert time.perf_counter() - started >= 0.35
+
+# Test 4
+def test_failed_batch_fails_the_snapshot(fast_retries):
+    metrics = fetch.FetchMetrics()
+    with FakeCoinGecko(status=404) as server:
+        with pytest.raises(requests.HTTPError):
+            fetch.fetch_prices(COINS, api_url=server.url, rate_limiter=unlimited(), metrics=metrics)
+
+    # Client errors are not retried
+    assert metrics.summary()["retries"] == 0
+    assert metrics.summary()["failures"] == 5
+
+# Test 5
+def test_ingestion_writes_the_merged_snapshot(fake_api, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(ingest, "HASH_INDEX_FILE", tmp_path / "_index" / "recent_hashes.json")
+    monkeypatch.setattr(ingest, "COINGECKO_API_URL", fake_api.url)
+    monkeypatch.setattr(ingest, "TARGET_COINS", " bitcoin,ethereum, solana,,bitcoin")
+
+    file_path = ingest.process_data_ingestion()
+
+    assert fake_api.requests == [["bitcoin", "ethereum", "solana"]]
+    assert list(json.loads(file_path.read_text())) == ["bitcoin", "ethereum", "solana"]
+
+# Test 6
+def test_throttling_and_timeouts_are_retried(fast_retries):
+    metrics = fetch.FetchMetrics()
+    with FakeCoinGecko(faults=[429, "timeout", 503], timeout_delay=0.5) as server:
+        snapshot = fetch.fetch_prices(COINS[:10], api_url=server.url, rate_limiter=unlimited(), metrics=metrics)
+
+    assert snapshot == {coin: {"usd": fake_price(coin), "usd_24h_vol": 1000.0} for coin in COINS[:10]}
+    summary = metrics.summary()
+    assert (summary["requests"], summary["retries"], summary["throttled"], summary["failures"]) == (4, 3, 1, 0)
+    assert summary["latency_max_s"] >= 0.2
+
+# Test 7
+def test_retry_after_pauses_every_caller(fast_retries):
+    rate_limiter = unlimited()
+    with FakeCoinGecko(faults=[(429, "1")]) as server:
+        started = time.perf_counter()
+        fetch.fetch_prices(COINS[:40], api_url=server.url, batch_size=10, rate_limiter=rate_limiter)
+        elapsed = time.perf_counter() - started
+
+    # The cool-down is honoured (not the 10ms backoff) and shared through the bucket
+    assert elapsed >= 1.0
+    assert len(server.requests) == 5
+
+# Test 8
+def test_long_retry_after_fails_the_batch_instead_of_pausing(fast_retries):
+    rate_limiter = unlimited()
+    metrics = fetch.FetchMetrics()
+    with FakeCoinGecko(faults=[(429, "3600")]) as server:
+        started = time.perf_counter()
+        with pytest.raises(requests.HTTPError):
+            fetch.fetch_prices(COINS[:10], api_url=server.url, rate_limiter=rate_limiter, metrics=metrics)
+
+    # No hour-long pause of the shared bucket: the next caller gets a token right away
+    assert time.perf_counter() - started < 1.0
+    assert metrics.summary()["failures"] == 1
+    started = time.perf_counter()
+    rate_limiter.acquire()
+    assert time.perf_counter() - started < 0.1
+
+# Test 9
+def test_gives_up_after_max_retries(fast_retries, monkeypatch):
+    monkeypatch.setattr(fetch, "MAX_RETRIES", 2)
+    metrics = fetch.FetchMetrics()
+    with FakeCoinGecko(status=503) as server:
+        with pytest.raises(requests.HTTPError):
+            fetch.fetch_prices(COINS[:10], api_url=server.url, rate_limiter=unlimited(), metrics=metrics)
+
+    assert len(server.requests) == 3
+    assert metrics.summary()["retries"] == 2
+
+# Test 10
+def test_rate_limiter_is_shared_by_the_process():
+    assert fetch.get_rate_limiter() is fetch.get_rate_limiter()
+
+# Test 11
+def test_identical_payloads_are_stored_once(fake_api, tmp_path, monkeypatch, mocker):
+    monkeypatch.setattr(ingest, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(ingest, "HASH_INDEX_FILE", tmp_path / "_index" / "recent_hashes.json")
+    monkeypatch.setattr(ingest, "COINGECKO_API_URL", fake_api.url)
+    monkeypatch.setattr(ingest, "TARGET_COINS", "bitcoin,ethereum")
+    clock = mocker.patch.object(ingest, "datetime")
+
+    # EXECUTE: the API serves the same cached payload twice, then a new one
+    clock.now.return_value.strftime.return_value = "20260116_120000"
+    first = ingest.process_data_ingestion()
+    clock.now.return_value.strftime.return_value = "20260116_120010"
+    repeated = ingest.process_data_ingestion()
+    monkeypatch.setattr(ingest, "TARGET_COINS", "bitcoin,solana")
+    changed = ingest.process_data_ingestion()
+
+    # ASSERT: the repeat is a reference to the stored snapshot (no new file)
+    assert repeated == first
+    assert changed.name == "raw_prices_20260116_120010.json"
+    assert sorted(path.name for path in tmp_path.glob("*.json")) == [first.name, changed.name]
+    assert list(ingest.load_hash_index()["recent"].values()) == [first.name, changed.name]
+    assert ingest.content_hash(first.read_bytes()) == ingest.content_hash(ingest.snapshot_bytes(json.loads(first.read_text())))
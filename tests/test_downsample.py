@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# Import the module to be tested (dashboard chart downsampling)
+from downsample import downsample_frame, lttb_indices, minmax_indices
+
+def minute_series(count):
+    timestamps = pd.date_range("2026-01-01", periods=count, freq="min")
+    prices = 50000 + 1000 * np.sin(np.arange(count) / 500.0)
+    return timestamps, prices
+
+# Test 1
+def test_lttb_keeps_the_endpoints_and_the_point_budget():
+    timestamps, prices = minute_series(100_000)
+    prices[43_210] = 90_000.0 # a spike must survive
+
+    indices = lttb_indices(timestamps, prices, 1_000)
+
+    assert len(indices) == 1_000
+    assert indices[0] == 0 and indices[-1] == 99_999
+    assert np.all(np.diff(indices) > 0)
+    assert 43_210 in indices
+
+# Test 2
+def test_minmax_keeps_every_bucket_extreme():
+    timestamps, prices = minute_series(100_000)
+
+    indices = minmax_indices(timestamps, prices, 1_000)
+
+    assert len(indices) <= 1_000
+    assert prices[indices].max() == prices.max()
+    assert prices[indices].min() == prices.min()
+
+# Test 3
+def test_short_series_are_kept_at_full_resolution():
+    timestamps, prices = minute_series(500)
+    prices[10] = np.nan
+    df = pd.DataFrame({"extraction_timestamp": timestamps, "price_usd": prices})
+
+    kept = downsample_frame(df, "extraction_timestamp", "price_usd", n_out=1_000)
+
+    # Only the missing price is dropped
+    assert len(kept) == 499
+    assert kept["price_usd"].notna().all()
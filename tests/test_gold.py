@@ -0,0 +1,294 @@
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import pytest
+import pandas as pd
+import duckdb
+from fsspec.implementations.memory import MemoryFileSystem
+
+# Import the function to be tested
+from cloud_functions.gold import main as gold_main
+from cloud_functions.gold.main import process_data_analyzing
+
+@pytest.fixture
+def fake_gcs(mocker):
+    # Local fake object store: an in-memory fsspec filesystem instead of gcsfs
+    filesystem = MemoryFileSystem()
+    filesystem.store.clear()
+    filesystem.pseudo_dirs.clear()
+    filesystem.pseudo_dirs.append("")
+    mocker.patch('cloud_functions.gold.main._get_filesystem', return_value=filesystem)
+    return filesystem
+
+def add_silver_snapshot(filesystem, tmp_path, minute):
+    # Writes one Silver Parquet file per coin, Hive-partitioned like the Silver cloud function
+    names = []
+    for coin_id, price in [("bitcoin", f"50000 + ({minute} * 37) % 11 * 125.5"),
+                           ("ethereum", f"3000 + ({minute} * 13) % 7 * 3.3")]:
+        local_file = tmp_path / f"silver_{minute}_{coin_id}.parquet"
+        duckdb.execute(f"""
+            COPY (
+                SELECT
+                    TIMESTAMP '2026-01-14 12:00:00' + INTERVAL {minute} MINUTE as extraction_timestamp,
+                    CAST({price} AS DECIMAL(18, 2)) as price_usd,
+                    CAST(0 AS DECIMAL(24, 2)) as market_cap,
+                    CAST(0 AS DECIMAL(24, 2)) as volume_24h
+            ) TO '{local_file}' (FORMAT PARQUET)
+        """)
+        name = f"processed/date=2026-01-14/coin_id={coin_id}/raw_prices_20260114_12{minute:02d}00_0.parquet"
+        filesystem.pipe(f"fake-silver-bucket/{name}", local_file.read_bytes())
+        names.append(name)
+    return names
+
+def fire_event(mocker, name):
+    fake_cloud_event = mocker.Mock()
+    fake_cloud_event.data = {"bucket": "fake-silver-bucket", "name": name}
+    process_data_analyzing(fake_cloud_event)
+
+def read_summary(filesystem):
+    # The base file + the incremental parts listed in the manifest
+    manifest = json.loads(filesystem.cat(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_MANIFEST_BLOB_NAME}"))
+    frames = [
+        pd.read_parquet(io.BytesIO(filesystem.cat(f"{gold_main.GOLD_BUCKET_NAME}/{name}")))
+        for name in [manifest["base"]] + manifest["parts"]
+    ]
+    return pd.concat(frames).sort_values(["coin_id", "extraction_timestamp"]).reset_index(drop=True)
+
+# Test 1
+def test_incremental_gold_matches_full_recompute(fake_gcs, tmp_path, mocker, capsys):
+    # SETUP + EXECUTE: one event per new Silver file (one file per coin and snapshot)
+    for minute in range(12):
+        for name in add_silver_snapshot(fake_gcs, tmp_path, minute):
+            fire_event(mocker, name)
+    incremental_df = read_summary(fake_gcs)
+
+    # Only the very first event needs the full history; the ethereum event of each snapshot
+    # finds its file already picked up by the bitcoin one
+    output = capsys.readouterr().out
+    assert output.count("Incremental mode") == 11
+    assert output.count("duplicate event") == 12
+
+    # Each incremental run only wrote its new rows: one part per snapshot, the base is untouched
+    manifest = json.loads(fake_gcs.cat(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_MANIFEST_BLOB_NAME}"))
+    assert len(manifest["parts"]) == 11
+    part = pd.read_parquet(io.BytesIO(fake_gcs.cat(f"{gold_main.GOLD_BUCKET_NAME}/{manifest['parts'][-1]}")))
+    assert len(part) == 2
+
+    mocker.patch.object(gold_main, "FULL_REBUILD", True)
+    fire_event(mocker, name)
+    full_df = read_summary(fake_gcs)
+
+    # ASSERT:
+    pd.testing.assert_frame_equal(incremental_df, full_df)
+    assert len(full_df) == 24
+    assert not fake_gcs.glob(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_PARTS_PREFIX}/*")
+
+    # The latest row per coin is published next to the summary for the dashboard's metrics
+    latest_df = pd.read_parquet(io.BytesIO(fake_gcs.cat(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.LATEST_BLOB_NAME}")))
+    assert list(latest_df["coin_id"]) == ["bitcoin", "ethereum"]
+    assert (latest_df["extraction_timestamp"] == full_df["extraction_timestamp"].max()).all()
+
+# Test 2
+def test_duplicate_event_is_skipped(fake_gcs, tmp_path, mocker, capsys):
+    for minute in range(3):
+        names = add_silver_snapshot(fake_gcs, tmp_path, minute)
+        fire_event(mocker, names[0])
+    before = read_summary(fake_gcs)
+
+    capsys.readouterr()
+    fire_event(mocker, names[0])
+
+    assert "duplicate event" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(before, read_summary(fake_gcs))
+
+# Test 3
+def test_full_scan_reads_silver_in_place(fake_gcs, tmp_path, mocker):
+    # The history is read straight from the object store and staged outputs are moved into place
+    for minute in range(5):
+        add_silver_snapshot(fake_gcs, tmp_path, minute)
+    mocker.patch.object(gold_main, "FULL_REBUILD", True)
+
+    fire_event(mocker, add_silver_snapshot(fake_gcs, tmp_path, 5)[0])
+
+    assert len(read_summary(fake_gcs)) == 12
+    assert not fake_gcs.glob(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.STAGING_PREFIX}/*")
+
+# Test 4
+def test_gold_reads_compacted_silver_transparently(fake_gcs, tmp_path, mocker):
+    from cloud_functions.silver import main as silver_main
+    mocker.patch.object(silver_main, "SILVER_BUCKET_NAME", "fake-silver-bucket")
+    mocker.patch('cloud_functions.silver.main._get_filesystem', return_value=fake_gcs)
+    mocker.patch.object(gold_main, "FULL_REBUILD", True)
+
+    # SETUP: history before compaction
+    for minute in range(6):
+        names = add_silver_snapshot(fake_gcs, tmp_path, minute)
+    fire_event(mocker, names[0])
+    before = read_summary(fake_gcs)
+
+    # EXECUTE: compact, add one more snapshot, compact again (which deletes the first tombstones)
+    silver_main.process_data_compaction(mocker.Mock())
+    assert fake_gcs.glob("fake-silver-bucket/compacted/date=2026-01-14/coin_id=*/*.parquet")
+    fire_event(mocker, names[0])
+    pd.testing.assert_frame_equal(before, read_summary(fake_gcs))
+
+    names = add_silver_snapshot(fake_gcs, tmp_path, 6)
+    silver_main.process_data_compaction(mocker.Mock())
+    fire_event(mocker, names[0])
+
+    # ASSERT: first-run tombstones are gone, the second run's are kept until the next run
+    manifest = json.loads(fake_gcs.cat("fake-silver-bucket/compacted/_manifest.json"))
+    assert manifest["files"] == [
+        "compacted/date=2026-01-14/coin_id=bitcoin/part-00002.parquet",
+        "compacted/date=2026-01-14/coin_id=ethereum/part-00002.parquet",
+    ]
+    assert len(fake_gcs.glob(f"fake-silver-bucket/{gold_main.PROCESSED_GLOB}")) == 2
+    assert len(fake_gcs.glob("fake-silver-bucket/compacted/*/*/*.parquet")) == 4
+
+    # Gold sees every row exactly once
+    assert len(read_summary(fake_gcs)) == 14
+
+# Test 5
+def test_micro_batch_with_late_rows_triggers_full_recompute(fake_gcs, tmp_path, mocker, capsys):
+    for minute in range(4):
+        fire_event(mocker, add_silver_snapshot(fake_gcs, tmp_path, minute)[0])
+    capsys.readouterr()
+
+    # A Silver micro-batch for bitcoin mixes a late row (12:01:30) with a new one (12:05)
+    local_file = tmp_path / "batch.parquet"
+    duckdb.execute(f"""
+        COPY (
+            SELECT extraction_timestamp, CAST(price AS DECIMAL(18, 2)) as price_usd
+            FROM (VALUES (TIMESTAMP '2026-01-14 12:01:30', 51000.0),
+                         (TIMESTAMP '2026-01-14 12:05:00', 52000.0)) t(extraction_timestamp, price)
+        ) TO '{local_file}' (FORMAT PARQUET)
+    """)
+    name = "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120130_to_20260114_120500_abcd1234_0.parquet"
+    fake_gcs.pipe(f"fake-silver-bucket/{name}", local_file.read_bytes())
+
+    fire_event(mocker, name)
+
+    # The late row can't be seeded from the rolling state: full recompute, nothing dropped
+    assert "Incremental mode" not in capsys.readouterr().out
+    summary = read_summary(fake_gcs)
+    assert len(summary) == 10
+    assert summary["extraction_timestamp"].astype(str).str.contains("12:01:30").any()
+
+# Test 6
+def test_deployed_bundle_uses_the_shared_indicator_engine(tmp_path):
+    # SETUP: the archive layout built by infra/functions.tf (main.py + a copy of indicators.py)
+    src_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+    shutil.copy(os.path.join(src_dir, "cloud_functions/gold/main.py"), tmp_path / "main.py")
+    shutil.copy(os.path.join(src_dir, "pipeline/gold/indicators.py"), tmp_path / "indicators.py")
+
+    # EXECUTE: imported the way the runtime does, without the repository on the path
+    result = subprocess.run(
+        [sys.executable, "-c", "import main; print(main.compute_indicators.__module__)"],
+        cwd=tmp_path, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ""}
+    )
+
+    # ASSERT:
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "indicators"
+
+# Test 7
+def test_summary_parts_are_folded_into_the_base(fake_gcs, tmp_path, mocker, capsys):
+    mocker.patch.object(gold_main, "MAX_SUMMARY_PARTS", 3)
+
+    for minute in range(8):
+        fire_event(mocker, add_silver_snapshot(fake_gcs, tmp_path, minute)[0])
+    incremental_df = read_summary(fake_gcs)
+
+    # ASSERT: the 4th part was folded into the base instead, the summary is unchanged by it
+    assert capsys.readouterr().out.count("Folding 3 summary parts") == 1
+    manifest = json.loads(fake_gcs.cat(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_MANIFEST_BLOB_NAME}"))
+    assert len(manifest["parts"]) == 3
+    assert len(fake_gcs.glob(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_PARTS_PREFIX}/*")) == 3
+
+    mocker.patch.object(gold_main, "FULL_REBUILD", True)
+    fire_event(mocker, "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120700_0.parquet")
+    pd.testing.assert_frame_equal(incremental_df, read_summary(fake_gcs))
+
+# Test 8
+def test_redelivered_bronze_event_after_compaction_adds_no_rows(fake_gcs, tmp_path, mocker):
+    from cloud_functions.silver import main as silver_main
+    mocker.patch.object(silver_main, "SILVER_BUCKET_NAME", "fake-silver-bucket")
+    mocker.patch.object(silver_main, "MICRO_BATCH", False)
+    mocker.patch('cloud_functions.silver.main._get_filesystem', return_value=fake_gcs)
+    mocker.patch.object(gold_main, "FULL_REBUILD", True)
+
+    # The single-event Silver path uses the storage client: blobs backed by the fake store
+    def make_blob(path):
+        return mocker.Mock(**{
+            "exists.side_effect": lambda: fake_gcs.exists(path),
+            "download_as_bytes.side_effect": lambda: fake_gcs.cat(path),
+            "upload_from_string.side_effect": lambda data, content_type=None: fake_gcs.pipe(
+                path, data.encode() if isinstance(data, str) else data
+            ),
+        })
+    storage_client = mocker.Mock()
+    storage_client.bucket.side_effect = lambda bucket_name: mocker.Mock(
+        **{"blob.side_effect": lambda blob_name: make_blob(f"{bucket_name}/{blob_name}")}
+    )
+    mocker.patch('cloud_functions.silver.main._get_storage_client', return_value=storage_client)
+
+    def transform(name):
+        fake_cloud_event = mocker.Mock()
+        fake_cloud_event.data = {"bucket": "fake-bronze-bucket", "name": name}
+        silver_main.process_data_cleaning(fake_cloud_event)
+
+    # SETUP: three Bronze snapshots transformed, then compacted twice (the tombstones are gone)
+    for minute in range(3):
+        name = f"raw_prices_20260114_12{minute:02d}00.json"
+        fake_gcs.pipe(f"fake-bronze-bucket/{name}", json.dumps({
+            "bitcoin": {"usd": 50000.0 + minute, "usd_24h_vol": 1.0},
+            "ethereum": {"usd": 3000.0 + minute, "usd_24h_vol": 1.0},
+        }).encode())
+        transform(name)
+    silver_main.process_data_compaction(mocker.Mock())
+    silver_main.process_data_compaction(mocker.Mock())
+    assert not fake_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet")
+    fire_event(mocker, "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120200_0.parquet")
+    assert len(read_summary(fake_gcs)) == 6
+
+    # EXECUTE: the event of the first snapshot is delivered again
+    transform("raw_prices_20260114_120000.json")
+
+    # ASSERT: nothing is rewritten next to the compacted rows, Gold counts every row once
+    assert not fake_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet")
+    fire_event(mocker, "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120200_0.parquet")
+    assert len(read_summary(fake_gcs)) == 6
+
+# Test 9
+def test_interrupted_full_publish_keeps_the_previous_summary(fake_gcs, tmp_path, mocker):
+    for minute in range(4):
+        fire_event(mocker, add_silver_snapshot(fake_gcs, tmp_path, minute)[0])
+    before = read_summary(fake_gcs)
+    old_manifest = json.loads(fake_gcs.cat(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_MANIFEST_BLOB_NAME}"))
+    assert old_manifest["parts"]
+
+    # EXECUTE: a full recompute dies while moving its new base into place
+    mocker.patch.object(gold_main, "FULL_REBUILD", True)
+    mv = fake_gcs.mv
+    def failing_mv(source, destination, **kwargs):
+        if source.endswith(f"{gold_main.STAGING_PREFIX}/market_summary.parquet"):
+            raise RuntimeError("instance killed")
+        return mv(source, destination, **kwargs)
+    mocker.patch.object(fake_gcs, "mv", side_effect=failing_mv)
+    with pytest.raises(RuntimeError):
+        fire_event(mocker, "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120300_0.parquet")
+    mocker.patch.object(fake_gcs, "mv", side_effect=mv)
+
+    # ASSERT: the old base and parts are still published together
+    pd.testing.assert_frame_equal(before, read_summary(fake_gcs))
+
+    # The next full run switches to its own base and deletes the replaced objects
+    fire_event(mocker, "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120300_0.parquet")
+    manifest = json.loads(fake_gcs.cat(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_MANIFEST_BLOB_NAME}"))
+    assert manifest["base"] != old_manifest["base"] and manifest["parts"] == []
+    assert not fake_gcs.exists(f"{gold_main.GOLD_BUCKET_NAME}/{old_manifest['base']}")
+    assert not fake_gcs.glob(f"{gold_main.GOLD_BUCKET_NAME}/{gold_main.SUMMARY_PARTS_PREFIX}/*")
+    pd.testing.assert_frame_equal(before, read_summary(fake_gcs))
@@ -0,0 +1,123 @@
+import shutil
+import duckdb
+import pandas as pd
+
+# Import the modules to be tested (local Silver + Gold layers)
+from src.pipeline.silver import clean, rollup
+from src.pipeline.gold import analyze
+from src.pipeline.gold.indicators import history_rows
+
+def read_gold():
+    # The summary base + its incremental parts, in the order of a full recompute
+    gold_files = [str(path) for path in analyze.list_gold_files()]
+    return duckdb.execute(f"SELECT * FROM read_parquet({gold_files}) ORDER BY coin_id, extraction_timestamp").df()
+
+# Test 1
+def test_incremental_gold_matches_full_recompute(gold_env, write_snapshots, capsys):
+    # SETUP: build Gold in three incremental steps
+    for start, count in [(0, 10), (10, 3), (13, 1)]:
+        write_snapshots(range(start, start + count))
+        clean.process_data_cleaning()
+        analyze.process_data_analytics()
+    incremental_df = read_gold()
+    assert capsys.readouterr().out.count("Incremental mode") == 2
+
+    # EXECUTE: recompute everything from scratch
+    analyze.process_data_analytics(full_rebuild=True)
+    full_df = read_gold()
+
+    # ASSERT: row-for-row identical (every indicator), and the state holds only the window tail
+    pd.testing.assert_frame_equal(incremental_df, full_df, check_exact=True)
+    assert len(full_df) == 28
+    assert len(pd.read_parquet(analyze.STATE_FILE)) == 2 * min(history_rows(analyze.INDICATORS), 14)
+
+    # The dashboard's metrics row: the most recent Gold row of each coin
+    latest_df = pd.read_parquet(analyze.LATEST_FILE)
+    expected = full_df.sort_values("extraction_timestamp").groupby("coin_id").tail(1).sort_values("coin_id")
+    pd.testing.assert_frame_equal(latest_df, expected.reset_index(drop=True))
+
+# Test 2
+def test_late_silver_rows_fall_back_to_full_recompute(gold_env, write_snapshots):
+    write_snapshots(range(10, 15))
+    clean.process_data_cleaning()
+    analyze.process_data_analytics()
+
+    # A snapshot older than the watermark arrives late
+    write_snapshots(range(1))
+    clean.process_data_cleaning()
+    analyze.process_data_analytics()
+    late_df = read_gold()
+
+    analyze.process_data_analytics(full_rebuild=True)
+    pd.testing.assert_frame_equal(late_df, read_gold())
+    assert len(late_df) == 12
+
+# Test 3
+def test_bars_with_time_windows_match_full_recompute(gold_env, write_snapshots, monkeypatch, capsys):
+    # 5-minute OHLC bars, windows spanning days
+    monkeypatch.setattr(analyze, "BAR_SECONDS", 300)
+    monkeypatch.setattr(analyze, "WINDOW_MODE", "time")
+
+    for start, count in [(0, 17), (17, 9), (26, 1), (27, 14)]:
+        write_snapshots(range(start, start + count))
+        clean.process_data_cleaning()
+        rollup.process_data_rollup()
+        analyze.process_data_analytics()
+    incremental_df = read_gold()
+    output = capsys.readouterr().out
+    assert output.count("Incremental mode") == 2
+    assert output.count("up to date") == 1
+    # 5-minute bars are built from the 1m rollup (the coarsest one that divides 5 minutes)
+    assert output.count("from the 1m rollup bars") == 4
+
+    analyze.process_data_analytics(full_rebuild=True)
+    full_df = read_gold()
+    pd.testing.assert_frame_equal(incremental_df, full_df, check_exact=True)
+
+    # Same bars as aggregating the Silver snapshots directly
+    shutil.rmtree(rollup.BARS_DIR)
+    analyze.process_data_analytics(full_rebuild=True)
+    assert "from the Silver snapshots" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(read_gold(), full_df, check_exact=True)
+
+    # 41 minutes per coin: 8 closed bars (10:40 is still open), each the OHLC of its snapshots
+    assert len(full_df) == 2 * 8
+    first_bar = full_df[full_df["coin_id"] == "bitcoin"].iloc[0]
+    prices = [50000.0 + (minute * 37) % 11 * 125.5 for minute in range(5)]
+    assert first_bar["extraction_timestamp"] == "20260116_100000"
+    assert (first_bar["open_usd"], first_bar["high_usd"], first_bar["low_usd"], first_bar["price_usd"]) == \
+        (prices[0], max(prices), min(prices), prices[-1])
+    assert first_bar["snapshots"] == 5
+
+# Test 4
+def test_incremental_runs_only_write_their_new_rows(gold_env, write_snapshots, monkeypatch):
+    monkeypatch.setattr(analyze, "MAX_SUMMARY_PARTS", 2)
+    write_snapshots(range(10))
+    clean.process_data_cleaning()
+    analyze.process_data_analytics()
+    base = analyze.list_gold_files()[0]
+    base_stat = base.stat()
+
+    # EXECUTE: two incremental runs, then a third past MAX_SUMMARY_PARTS
+    for minute in [10, 11]:
+        write_snapshots([minute])
+        clean.process_data_cleaning()
+        analyze.process_data_analytics()
+
+    # ASSERT: the base is untouched, each run added one part with its 2 new rows
+    gold_files = analyze.list_gold_files()
+    assert gold_files[0] == base and (base.stat().st_mtime_ns, base.stat().st_size) == (base_stat.st_mtime_ns, base_stat.st_size)
+    assert [len(pd.read_parquet(part)) for part in gold_files[1:]] == [2, 2]
+
+    # The next run folds the parts into a new base and deletes the files it replaces
+    write_snapshots([12])
+    clean.process_data_cleaning()
+    analyze.process_data_analytics()
+    incremental_df = read_gold()
+    assert len(analyze.list_gold_files()) == 1
+    assert sorted(analyze.GOLD_DIR.glob("analyzed_market_summary*.parquet")) == analyze.list_gold_files()
+    assert not list(analyze.SUMMARY_PARTS_DIR.glob("*.parquet"))
+
+    analyze.process_data_analytics(full_rebuild=True)
+    pd.testing.assert_frame_equal(incremental_df, read_gold(), check_exact=True)
+    assert len(incremental_df) == 26
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+# Import the modules to be tested (Gold backtest + indicator engine)
+from src.pipeline.gold import backtest, indicators
+
+def price_history(rows_per_coin):
+    rng = np.random.default_rng(9)
+    frames = []
+    for coin_id in ["bitcoin", "ethereum", "solana"]:
+        prices = 100 * np.exp(rng.normal(0, 0.02, rows_per_coin).cumsum())
+        prices[11] = np.nan # a missing price keeps the position and the previous price
+        frames.append(pd.DataFrame({
+            "coin_id": coin_id,
+            "extraction_timestamp": pd.date_range("2026-01-01", periods=rows_per_coin, freq="h").strftime("%Y%m%d_%H%M%S"),
+            "price_usd": prices,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def reference_backtest(prices, window, threshold):
+    # Row-by-row simulation of one coin
+    position, equity, peak, drawdown, trades, wins, trade_return = False, 0.0, 0.0, 0.0, 0, 0, 0.0
+    last_price = prices[0]
+    for row, price in enumerate(prices):
+        window_prices = prices[max(0, row - window + 1):row + 1]
+        sma = np.nanmean(window_prices)
+        if not np.isnan(price):
+            step = np.log(price / last_price)
+            if position:
+                equity += step
+                trade_return += step
+            last_price = price
+        peak = max(peak, equity)
+        drawdown = max(drawdown, peak - equity)
+        if price < sma * (1 - threshold) and not position:
+            position, trades, trade_return = True, trades + 1, 0.0
+        elif price > sma * (1 + threshold) and position:
+            position = False
+            wins += trade_return > 0
+    wins += position and trade_return > 0
+    return np.expm1(equity), trades, wins / trades if trades else np.nan, -np.expm1(-drawdown)
+
+# Test 1
+def test_threshold_zero_reproduces_the_gold_signal():
+    history = price_history(300)
+    series = backtest.prepare_series(history)
+
+    buy, sell = backtest.signals(series, backtest.rolling_mean(series, indicators.WINDOW_SIZE), 0.0)
+
+    gold = indicators.compute_indicators(history.assign(is_seed=False), [], window_mode="rows")
+    expected = np.select([buy, sell], ["BUY", "SELL"], default="WAIT")
+    assert (gold["signal"].to_numpy() == expected).all()
+
+# Test 2
+@pytest.mark.parametrize("window, threshold", [(7, 0.0), (20, 0.01)])
+def test_metrics_match_a_row_by_row_simulation(window, threshold):
+    history = price_history(500)
+
+    results = backtest.backtest(history, [window], [threshold])
+
+    for coin_id, group in history.groupby("coin_id"):
+        total_return, trades, hit_rate, max_drawdown = reference_backtest(group["price_usd"].to_numpy(), window, threshold)
+        coin = results[results["coin_id"] == coin_id].iloc[0]
+        assert coin["total_return"] == pytest.approx(total_return, rel=1e-9)
+        assert coin["trades"] == trades
+        assert coin["hit_rate"] == pytest.approx(hit_rate)
+        assert coin["max_drawdown"] == pytest.approx(max_drawdown, rel=1e-9)
+
+# Test 3
+def test_parallel_grid_matches_in_process_run():
+    history = price_history(200)
+
+    in_process = backtest.backtest(history, [3, 7, 14], [0.0, 0.005, 0.01], workers=1)
+    parallel = backtest.backtest(history, [3, 7, 14], [0.0, 0.005, 0.01], workers=2)
+
+    # One row per parameter set and coin, identical whatever the worker count
+    assert len(in_process) == 3 * 3 * 3
+    pd.testing.assert_frame_equal(in_process, parallel)
+    with pytest.raises(ValueError):
+        backtest.parse_grid("7,1", int, 2)
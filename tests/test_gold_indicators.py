@@ -0,0 +1,96 @@
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+# Import the module to be tested (Gold indicator engine)
+from src.pipeline.gold import indicators
+
+INDICATORS = indicators.parse_indicators("sma:5,ema:4,rsi:3,bollinger:6")
+
+def price_history(rows_per_coin, freq="min"):
+    rng = np.random.default_rng(3)
+    frames = []
+    for coin_id in ["bitcoin", "solana"]:
+        prices = 100 + rng.normal(0, 1, rows_per_coin).cumsum()
+        prices[17] = np.nan # a missing price is ignored, like SQL's NULL
+        frames.append(pd.DataFrame({
+            "coin_id": coin_id,
+            "extraction_timestamp": pd.date_range("2026-01-01", periods=rows_per_coin, freq=freq),
+            "price_usd": prices,
+        }))
+    return pd.concat(frames, ignore_index=True).assign(is_seed=False)
+
+# Test 1
+def test_indicators_match_their_reference_definitions():
+    history = price_history(200)
+
+    metrics = indicators.compute_indicators(history.sample(frac=1, random_state=1), INDICATORS)
+
+    # Rolling indicators: same as SQL's ROWS frames
+    expected = duckdb.execute("""
+        SELECT
+            coin_id, extraction_timestamp,
+            AVG(price_usd) OVER (PARTITION BY coin_id ORDER BY extraction_timestamp ROWS BETWEEN 4 PRECEDING AND CURRENT ROW) as sma_5,
+            AVG(price_usd) OVER (PARTITION BY coin_id ORDER BY extraction_timestamp ROWS BETWEEN 5 PRECEDING AND CURRENT ROW)
+                + 2 * STDDEV(price_usd) OVER (PARTITION BY coin_id ORDER BY extraction_timestamp ROWS BETWEEN 5 PRECEDING AND CURRENT ROW) as bollinger_upper_6
+        FROM history
+        ORDER BY coin_id, extraction_timestamp
+    """).df()
+    np.testing.assert_allclose(metrics["sma_5"], expected["sma_5"], rtol=1e-12)
+    np.testing.assert_allclose(metrics["bollinger_upper_6"], expected["bollinger_upper_6"], rtol=1e-12)
+
+    # Recursive indicators: standard EMA and an RSI bounded to [0, 100]
+    bitcoin = metrics[metrics["coin_id"] == "bitcoin"]
+    bitcoin_prices = history[history["coin_id"] == "bitcoin"]["price_usd"]
+    reference_ema = bitcoin_prices.ewm(span=4, adjust=False, ignore_na=True).mean()
+    np.testing.assert_allclose(bitcoin["ema_4"], reference_ema, rtol=1e-12)
+    assert bitcoin["rsi_3"].iloc[1:].between(0, 100).all()
+    assert set(metrics["signal"]) == {"BUY", "SELL", "WAIT"}
+
+# Test 2
+def test_time_windows_span_days_whatever_the_cadence():
+    # Irregular cadence: 6-hourly snapshots with random gaps (missed ingestions)
+    history = price_history(400, freq="6h")
+    history = history.drop(history.sample(frac=0.3, random_state=2).index).reset_index(drop=True)
+
+    metrics = indicators.compute_indicators(history, INDICATORS, window_mode="time")
+
+    # Same as pandas' time-based rolling windows: (t - N days, t]
+    for coin_id, group in history.groupby("coin_id"):
+        prices = group.set_index("extraction_timestamp")["price_usd"]
+        coin_metrics = metrics[metrics["coin_id"] == coin_id]
+        np.testing.assert_allclose(coin_metrics["sma_7d"], prices.rolling("7D").mean(), rtol=1e-12)
+        np.testing.assert_allclose(coin_metrics["volatility_7d"], prices.rolling("7D").std(), rtol=1e-9)
+        np.testing.assert_allclose(coin_metrics["sma_5"], prices.rolling("5D").mean(), rtol=1e-12)
+
+# Test 3
+@pytest.mark.parametrize("window_mode, freq", [("rows", "min"), ("time", "6h")])
+def test_seeded_run_continues_exactly_like_a_full_run(window_mode, freq):
+    history = price_history(200, freq)
+    full = indicators.compute_indicators(history, INDICATORS, window_mode)
+    split = history["extraction_timestamp"].iloc[150]
+
+    # First run over the first 150 rows per coin, then keep only the rolling state
+    first = history[history["extraction_timestamp"] < split]
+    first_metrics = indicators.compute_indicators(first, INDICATORS, window_mode)
+    state = first_metrics.merge(first, on=["coin_id", "extraction_timestamp", "is_seed"])
+    state = state[state["in_state"]].assign(is_seed=True)
+    assert len(state) < len(first)
+
+    # Second run: state + new rows only
+    new_rows = history[history["extraction_timestamp"] >= split]
+    window_input = pd.concat([state[list(history.columns) + indicators.carry_columns(INDICATORS)], new_rows])
+    continued = indicators.compute_indicators(window_input, INDICATORS, window_mode)
+
+    continued = continued[~continued["is_seed"]].drop(columns="in_state").reset_index(drop=True)
+    expected = full[full["extraction_timestamp"] >= split].drop(columns="in_state").reset_index(drop=True)
+    pd.testing.assert_frame_equal(continued, expected, check_exact=True)
+
+# Test 4
+def test_invalid_indicator_spec_is_rejected():
+    assert indicators.parse_indicators(" SMA:30, ema:12,,sma:30") == [("sma", 30), ("ema", 12)]
+    with pytest.raises(ValueError):
+        indicators.parse_indicators("macd:12")
+    with pytest.raises(ValueError):
+        indicators.parse_window_mode("range")
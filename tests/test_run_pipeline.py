@@ -0,0 +1,113 @@
+import json
+import threading
+import pytest
+
+# Import the module to be tested (local pipeline DAG runner)
+from src.pipeline import run_pipeline
+from src.pipeline.bronze import fetch, ingest
+from fake_coingecko import FakeCoinGecko
+
+# Test 1
+def test_independent_tasks_run_concurrently_and_failures_only_stop_dependents():
+    # Both branches must be running at the same time to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+
+    def step(name, fail=False):
+        def function():
+            order.append(name)
+            if fail:
+                raise RuntimeError(f"{name} broke")
+            if name in ("left", "right"):
+                barrier.wait()
+            return {"rows": 1}
+        return function
+
+    tasks = [
+        run_pipeline.Task("a.root", step("root")),
+        run_pipeline.Task("a.left", step("left"), deps=["a.root"]),
+        run_pipeline.Task("a.right", step("right"), deps=["a.root"]),
+        run_pipeline.Task("b.broken", step("broken", fail=True), deps=["a.left"]),
+        run_pipeline.Task("b.after", step("after"), deps=["b.broken"]),
+        run_pipeline.Task("b.last", step("last"), deps=["b.after", "a.right"]),
+    ]
+
+    results = run_pipeline.run_dag(tasks, max_workers=4)
+
+    assert order[0] == "root" and "after" not in order and "last" not in order
+    assert [result["status"] for result in results.values()] == [
+        "success", "success", "success", "failed", "upstream_failed", "upstream_failed"
+    ]
+    assert results["b.broken"]["error"] == "RuntimeError: broken broke"
+    stages = run_pipeline.summarize_stages(results)
+    assert stages["a"]["status"] == "success" and stages["a"]["rows"] == 3
+    assert stages["b"]["status"] == "failed"
+
+    with pytest.raises(ValueError):
+        run_pipeline.run_dag([run_pipeline.Task("x.one", step("one"), deps=["x.two"]), run_pipeline.Task("x.two", step("two"), deps=["x.one"])])
+
+# Test 2
+def test_tasks_with_unchanged_inputs_are_skipped(tmp_path):
+    source, output = tmp_path / "input.txt", tmp_path / "output.txt"
+    source.write_text("v1")
+    calls = []
+
+    def build():
+        calls.append(source.read_text())
+        output.write_text(source.read_text() * 2)
+
+    task = run_pipeline.Task(
+        "gold.build", build, fingerprint=lambda: run_pipeline.fingerprint(run_pipeline.file_digest(source)), outputs=[output]
+    )
+    fingerprints = {}
+
+    first = run_pipeline.run_dag([task], fingerprints=fingerprints)["gold.build"]
+    second = run_pipeline.run_dag([task], fingerprints=fingerprints)["gold.build"]
+    output.unlink() # A missing output is rebuilt even if the inputs are unchanged
+    third = run_pipeline.run_dag([task], fingerprints=fingerprints)["gold.build"]
+    source.write_text("v2")
+    fourth = run_pipeline.run_dag([task], fingerprints=fingerprints)["gold.build"]
+
+    assert [first["status"], second["status"], third["status"], fourth["status"]] == ["success", "skipped", "success", "success"]
+    assert first["bytes"] == 4 and second["bytes"] == 0
+    assert calls == ["v1", "v1", "v2"]
+
+@pytest.fixture
+def pipeline_env(lake_env, tmp_path, monkeypatch):
+    # Every layer, the run reports and the fingerprints in a temporary directory
+    monkeypatch.setattr(run_pipeline, "RUNS_DIR", tmp_path / "runs")
+    monkeypatch.setattr(run_pipeline, "FINGERPRINTS_FILE", tmp_path / "runs" / "_fingerprints.json")
+    monkeypatch.setattr(fetch, "get_rate_limiter", lambda: fetch.TokenBucket(requests_per_minute=600_000, capacity=100))
+
+    with FakeCoinGecko() as server:
+        monkeypatch.setattr(ingest, "COINGECKO_API_URL", server.url)
+        monkeypatch.setattr(ingest, "TARGET_COINS", ",".join(f"coin-{index:03d}" for index in range(120)))
+        yield server
+
+# Test 3
+def test_pipeline_run_writes_a_report_and_skips_unchanged_stages(pipeline_env, tmp_path):
+    report = run_pipeline.run_pipeline(report_file=tmp_path / "first.json")
+
+    # ASSERT: one fetch task per coin batch, every stage ran and reported rows and bytes
+    assert report["status"] == "success"
+    assert json.loads((tmp_path / "first.json").read_text()) == report
+    assert sorted(len(batch) for batch in pipeline_env.requests) == [20, 50, 50]
+    assert [name for name in report["tasks"] if name.startswith("bronze.fetch")] == [
+        "bronze.fetch.batch-1", "bronze.fetch.batch-2", "bronze.fetch.batch-3"
+    ]
+    assert report["tasks"]["bronze.store"]["rows"] == 120
+    assert report["tasks"]["silver.clean"]["rows"] == 120
+    assert report["tasks"]["gold.analyze"]["rows"] == 120
+    for stage in ["bronze", "silver", "gold"]:
+        assert report["stages"][stage]["status"] == "success"
+        assert report["stages"][stage]["bytes"] > 0 and report["stages"][stage]["wall_time_s"] > 0
+
+    # EXECUTE: the API serves the same payload again
+    second = run_pipeline.run_pipeline()
+
+    # ASSERT: nothing new in Bronze, so Silver and Gold are skipped
+    assert second["tasks"]["bronze.store"]["rows"] == 0
+    assert second["tasks"]["silver.clean"]["status"] == "skipped"
+    assert second["tasks"]["gold.analyze"]["status"] == "skipped"
+    assert second["tasks"]["gold.backtest"]["status"] == "skipped"
+    assert len(list((tmp_path / "runs").glob("run_*.json"))) == 1
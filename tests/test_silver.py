@@ -1,16 +1,42 @@
-import sys
-import os
+import io
+import json
 import pytest
 import pandas as pd
-import duckdb
 
 # Import the function to be tested
-from cloud_functions.silver.main import process_silver
+from cloud_functions.silver.main import process_data_cleaning
 
-# Setup config
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+def run_silver(mocker, json_content, test_filename="raw_prices_20260114_120000.json"):
+    # Mock setup
+    mocker.patch('cloud_functions.silver.main._storage_client', None)
+    mock_storage = mocker.patch('cloud_functions.silver.main.storage')
+    mock_bucket = mock_storage.Client.return_value.bucket.return_value
+
+    # Bytes in, bytes out: the file-based blob methods don't exist on these mocks
+    uploads = {}
+
+    def make_blob(blob_name):
+        blob = mocker.Mock(spec=["download_as_bytes", "upload_from_string", "exists"])
+        blob.download_as_bytes.return_value = json_content.encode()
+        blob.exists.return_value = blob_name in uploads
+        blob.upload_from_string.side_effect = lambda data, content_type=None: uploads.__setitem__(
+            blob_name, pd.read_parquet(io.BytesIO(data)) if blob_name.endswith(".parquet") else json.loads(data)
+        )
+        return blob
+
+    mock_bucket.blob.side_effect = make_blob
+
+    # EXECUTE:
+    fake_cloud_event = mocker.Mock()
+    fake_cloud_event.data = {
+        "bucket": "fake-bronze-bucket",
+        "name": test_filename
+    }
+    process_data_cleaning(fake_cloud_event)
+    return uploads
 
-def test_silver_transformation_logic(mocker):    
+# Test 1
+def test_silver_transformation_logic(mocker):
     # SETUP DATA:
     fake_json_content = """
     {
@@ -19,49 +45,302 @@ def test_silver_transformation_logic(mocker):
     }
     """
 
-    # Add time component to match the Regex expectation
-    test_filename = "raw_prices_20260114_120000.json"
+    uploads = run_silver(mocker, fake_json_content)
 
-    # Mock setup
-    mock_storage = mocker.patch('cloud_functions.silver.main.storage')
-    mock_bucket = mock_storage.Client.return_value.bucket.return_value
-    mock_blob = mock_bucket.blob.return_value
+    # ASSERT: one Hive partition per coin, coin_id lives in the path
+    assert sorted(name for name in uploads if name.startswith("processed/")) == [
+        "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120000_0.parquet",
+        "processed/date=2026-01-14/coin_id=ethereum/raw_prices_20260114_120000_0.parquet",
+    ]
+    df = uploads["processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120000_0.parquet"]
+    assert "price_usd" in df.columns
+    assert float(df["price_usd"].iloc[0]) == 50000.0
+    assert str(df["extraction_timestamp"].iloc[0]) == "2026-01-14 12:00:00"
+
+# Test 2
+def test_silver_handles_any_coin_set(mocker):
+    # Coins added through the Bronze '?coins=' override are kept, not dropped
+    coins = {f"coin-{index}": {"usd": float(index), "usd_24h_vol": 1.0} for index in range(300)}
+    coins["dogecoin"] = {"usd": 0.25, "usd_market_cap": 1.0e9, "usd_24h_vol": 1.0e6}
+
+    uploads = run_silver(mocker, json.dumps(coins))
+
+    assert len([name for name in uploads if name.startswith("processed/")]) == 301
+    doge = uploads["processed/date=2026-01-14/coin_id=dogecoin/raw_prices_20260114_120000_0.parquet"]
+    assert float(doge["price_usd"].iloc[0]) == 0.25
+    assert float(doge["market_cap"].iloc[0]) == 1.0e9
+    # Missing metrics are NULL rather than failing the file
+    assert uploads["processed/date=2026-01-14/coin_id=coin-7/raw_prices_20260114_120000_0.parquet"]["market_cap"].isna().all()
+
+# Test 3
+def test_silver_never_touches_local_files(mocker):
+    mocker.patch('builtins.open', side_effect=AssertionError("local file opened"))
+    mocker.patch('pathlib.Path.write_bytes', side_effect=AssertionError("local file written"))
+
+    uploads = run_silver(mocker, json.dumps({"bitcoin": {"usd": 50000.0, "usd_24h_vol": 1.0}}))
+
+    assert [name for name in uploads if not name.startswith("_hashes/")] == [
+        "processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120000_0.parquet"
+    ]
+    # Same file layout as DuckDB's partitioned COPY: the partition columns are not stored
+    assert list(uploads["processed/date=2026-01-14/coin_id=bitcoin/raw_prices_20260114_120000_0.parquet"].columns) == ["extraction_timestamp", "price_usd", "market_cap", "volume_24h"]
+
+@pytest.fixture
+def micro_batch_gcs(mocker):
+    # In-memory object store instead of gcsfs, with micro-batching switched on
+    from fsspec.implementations.memory import MemoryFileSystem
+    from cloud_functions.silver import main as silver_main
+
+    filesystem = MemoryFileSystem()
+    filesystem.store.clear()
+    filesystem.pseudo_dirs.clear()
+    filesystem.pseudo_dirs.append("")
+    mocker.patch('cloud_functions.silver.main._get_filesystem', return_value=filesystem)
+    mocker.patch.object(silver_main, "SILVER_BUCKET_NAME", "fake-silver-bucket")
+    mocker.patch.object(silver_main, "MICRO_BATCH", True)
+    return filesystem
+
+def land_bronze(mocker, filesystem, minute):
+    # A Bronze snapshot lands and its event fires
+    name = f"raw_prices_20260114_12{minute:02d}00.json"
+    filesystem.pipe(f"fake-bronze-bucket/{name}", json.dumps({
+        "bitcoin": {"usd": 50000.0 + minute, "usd_24h_vol": 1.0},
+        "ethereum": {"usd": 3000.0 + minute, "usd_24h_vol": 1.0},
+    }).encode())
+    fake_cloud_event = mocker.Mock()
+    fake_cloud_event.data = {"bucket": "fake-bronze-bucket", "name": name}
+    process_data_cleaning(fake_cloud_event)
+    return name
+
+def read_processed(filesystem):
+    import duckdb
+    con = duckdb.connect()
+    con.register_filesystem(filesystem)
+    files = [filesystem.unstrip_protocol(path) for path in filesystem.glob("fake-silver-bucket/processed/*/*/*.parquet")]
+    return con.execute(f"SELECT * FROM read_parquet({files}, hive_partitioning = true)").df()
+
+# Test 4
+def test_micro_batch_transforms_a_burst_in_one_pass(micro_batch_gcs, mocker):
+    from cloud_functions.silver.main import process_pending_batch
+
+    # SETUP: a burst of 5 events only queues markers
+    for minute in range(5):
+        land_bronze(mocker, micro_batch_gcs, minute)
+    assert len(micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")) == 5
+    assert not micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet")
+
+    # EXECUTE:
+    message, status = process_pending_batch(mocker.Mock())
+
+    # ASSERT: one file per partition for the whole batch, named after its snapshot range
+    assert status == 200
+    outputs = sorted(path.lstrip("/") for path in micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet"))
+    assert len(outputs) == 2
+    assert all("/raw_prices_20260114_120000_to_20260114_120400_" in path for path in outputs)
+    assert len(read_processed(micro_batch_gcs)) == 10
+    assert not micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")
+    assert len(micro_batch_gcs.glob("fake-silver-bucket/_ledger/*.json")) == 5
+
+# Test 5
+def test_micro_batch_is_idempotent_for_redelivered_events(micro_batch_gcs, mocker):
+    from cloud_functions.silver.main import process_pending_batch
 
-    def create_fake_file(filename):
-        with open(filename, 'w') as f:
-            f.write(fake_json_content)
+    land_bronze(mocker, micro_batch_gcs, 0)
+    land_bronze(mocker, micro_batch_gcs, 0) # redelivered before the drain
+    process_pending_batch(mocker.Mock())
+    land_bronze(mocker, micro_batch_gcs, 0) # redelivered after the drain
 
-    mock_blob.download_to_filename.side_effect = create_fake_file
+    process_pending_batch(mocker.Mock())
 
-    # Tries to upload first then read the file before it gets deleted
-    captured_data = {} 
+    assert len(read_processed(micro_batch_gcs)) == 2
+    assert not micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")
 
-    def intercept_upload(filename):
-        print(f"Intercepting file at: {filename}")
-        # Read the file now while it still exists
-        captured_data['df'] = pd.read_parquet(filename)
+# Test 6
+def test_interrupted_batch_is_rerun_with_the_same_files(micro_batch_gcs, mocker):
+    from cloud_functions.silver import main as silver_main
 
-    mock_blob.upload_from_filename.side_effect = intercept_upload
+    for minute in range(3):
+        land_bronze(mocker, micro_batch_gcs, minute)
+
+    # The first drain dies after writing the outputs, before the ledger is updated
+    killed_rm = mocker.patch.object(micro_batch_gcs, "rm", side_effect=RuntimeError("instance killed"))
+    with pytest.raises(RuntimeError):
+        silver_main.process_pending_batch(mocker.Mock())
+    first_outputs = sorted(micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet"))
+    mocker.stop(killed_rm)
+
+    # A new file arrives before the retry; it goes into its own batch
+    land_bronze(mocker, micro_batch_gcs, 5)
+    silver_main.process_pending_batch(mocker.Mock())
+
+    # The claimed batch overwrote its own objects: no duplicated rows
+    outputs = sorted(micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet"))
+    assert set(first_outputs) < set(outputs)
+    assert len(outputs) == 4
+    assert len(read_processed(micro_batch_gcs)) == 8
+
+# Test 7
+def test_corrupt_bronze_files_are_quarantined_not_retried(micro_batch_gcs, mocker):
+    from cloud_functions.silver import main as silver_main
+
+    land_bronze(mocker, micro_batch_gcs, 0)
+    corrupt = "raw_prices_20260114_120100.json"
+    micro_batch_gcs.pipe(f"fake-bronze-bucket/{corrupt}", b'{"bitcoin": {"usd": "n/a"}}')
+    fake_cloud_event = mocker.Mock()
+    fake_cloud_event.data = {"bucket": "fake-bronze-bucket", "name": corrupt}
+    process_data_cleaning(fake_cloud_event)
+
+    # EXECUTE: the drain succeeds, the corrupt file goes to quarantine with its reason
+    message, status = silver_main.process_pending_batch(mocker.Mock())
+    assert status == 200
+    assert len(read_processed(micro_batch_gcs)) == 2
+    assert micro_batch_gcs.exists(f"fake-silver-bucket/quarantine/{corrupt}")
+    entry = json.loads(micro_batch_gcs.cat(f"fake-silver-bucket/quarantine/_index/{corrupt}.json"))
+    assert entry["reason"] == "non-numeric coin metrics"
+    assert not micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")
+
+    # A redelivered event is skipped without being queued again
+    process_data_cleaning(fake_cloud_event)
+    assert not micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")
+
+    # ASSERT: once fixed in Bronze, the reprocessing command sends it through again
+    micro_batch_gcs.pipe(f"fake-bronze-bucket/{corrupt}", b'{"bitcoin": {"usd": 50001.0, "usd_24h_vol": 1.0}}')
+    request = mocker.Mock()
+    request.get_json.return_value = {"files": [corrupt]}
+    assert silver_main.process_quarantine_reprocess(request)[1] == 200
+    silver_main.process_pending_batch(mocker.Mock())
+
+    assert len(read_processed(micro_batch_gcs)) == 3
+    assert not micro_batch_gcs.glob("fake-silver-bucket/quarantine/_index/*.json")
+
+    # A non-UTF-8 file is quarantined on its own, not with the rest of its batch
+    undecodable = "raw_prices_20260114_120200.json"
+    micro_batch_gcs.pipe(f"fake-bronze-bucket/{undecodable}", b'\xff\xfe{"bitcoin": {"usd": 1}}')
+    fake_cloud_event.data = {"bucket": "fake-bronze-bucket", "name": undecodable}
+    process_data_cleaning(fake_cloud_event)
+    land_bronze(mocker, micro_batch_gcs, 3)
+    assert silver_main.process_pending_batch(mocker.Mock())[1] == 200
+
+    assert len(read_processed(micro_batch_gcs)) == 5
+    entry = json.loads(micro_batch_gcs.cat(f"fake-silver-bucket/quarantine/_index/{undecodable}.json"))
+    assert entry["reason"] == "malformed JSON"
+    assert not micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")
+
+# Test 8
+def test_corrupt_event_is_quarantined_instead_of_raising(mocker):
+    uploads = run_silver(mocker, '{"bitcoin": {"usd": 5')
+
+    # No Silver output and no exception (the event would be retried forever): an index entry
+    assert list(uploads) == ["quarantine/_index/raw_prices_20260114_120000.json.json"]
+    assert uploads["quarantine/_index/raw_prices_20260114_120000.json.json"]["reason"] == "malformed JSON"
+
+# Test 9
+def test_event_without_a_snapshot_timestamp_is_quarantined(mocker):
+    uploads = run_silver(mocker, json.dumps({"bitcoin": {"usd": 50000.0, "usd_24h_vol": 1.0}}), "raw_prices_copy_2.json")
+
+    assert list(uploads) == ["quarantine/_index/raw_prices_copy_2.json.json"]
+    assert uploads["quarantine/_index/raw_prices_copy_2.json.json"]["reason"] == "invalid snapshot file name"
+
+# Test 10
+def test_identical_snapshots_add_no_rows(micro_batch_gcs, mocker):
+    from cloud_functions.silver import main as silver_main
+
+    # SETUP: the same payload under three names (a cached API response), in two batches
+    original = land_bronze(mocker, micro_batch_gcs, 0)
+    silver_main.process_pending_batch(mocker.Mock())
+    for name in ["raw_prices_20260114_120010.json", "raw_prices_20260114_120020.json"]:
+        micro_batch_gcs.copy(f"fake-bronze-bucket/{original}", f"fake-bronze-bucket/{name}")
+        fake_cloud_event = mocker.Mock()
+        fake_cloud_event.data = {"bucket": "fake-bronze-bucket", "name": name}
+        process_data_cleaning(fake_cloud_event)
+    land_bronze(mocker, micro_batch_gcs, 1)
 
     # EXECUTE:
+    message, status = silver_main.process_pending_batch(mocker.Mock())
+
+    # ASSERT: only the new snapshot adds rows; the copies are in the ledger, not pending
+    assert status == 200
+    assert len(read_processed(micro_batch_gcs)) == 4
+    assert len(micro_batch_gcs.glob("fake-silver-bucket/_hashes/*.json")) == 2
+    assert len(micro_batch_gcs.glob("fake-silver-bucket/_ledger/*.json")) == 4
+    assert not micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")
+
+    # The single-event path uses the same markers
+    mocker.patch.object(silver_main, "MICRO_BATCH", False)
+    mock_storage = mocker.patch('cloud_functions.silver.main.storage')
+    mocker.patch.object(silver_main, "_storage_client", None)
+    marker = mocker.Mock()
+    marker.exists.return_value = True
+    marker.download_as_bytes.return_value = json.dumps({"file": original}).encode()
+    mock_storage.Client.return_value.bucket.return_value.blob.side_effect = lambda name: (
+        marker if name.startswith("_hashes/") else mocker.Mock(**{
+            "exists.return_value": False,
+            "download_as_bytes.return_value": micro_batch_gcs.cat(f"fake-bronze-bucket/{original}"),
+        })
+    )
     fake_cloud_event = mocker.Mock()
-    fake_cloud_event.data = {
-        "bucket": "fake-bronze-bucket",
-        "name": test_filename 
-    }
+    fake_cloud_event.data = {"bucket": "fake-bronze-bucket", "name": "raw_prices_20260114_120030.json"}
+    process_data_cleaning(fake_cloud_event)
+    assert not marker.upload_from_string.called
 
-    process_silver(fake_cloud_event)
+# Test 11
+def test_compaction_never_brings_back_rows_of_an_interrupted_batch(micro_batch_gcs, mocker):
+    from cloud_functions.silver import main as silver_main
 
-    # ASSERT:
-    # Verify the intercepted the data
-    assert 'df' in captured_data, "Did not intercept any upload call!"
-    df = captured_data['df']
+    def compacted_rows():
+        import duckdb
+        con = duckdb.connect()
+        con.register_filesystem(micro_batch_gcs)
+        manifest = json.loads(micro_batch_gcs.cat("fake-silver-bucket/compacted/_manifest.json"))
+        files = [micro_batch_gcs.unstrip_protocol(f"fake-silver-bucket/{name}") for name in manifest["files"]]
+        return con.execute(f"SELECT COUNT(*) FROM read_parquet({files})").fetchone()[0]
 
-    print("\nIntercepted Parquet Data (Before Deletion):")
-    print(df)
+    # SETUP: a drain dies after writing its outputs; its files stay claimed in 'pending/'
+    for minute in range(3):
+        land_bronze(mocker, micro_batch_gcs, minute)
+    killed_rm = mocker.patch.object(micro_batch_gcs, "rm", side_effect=RuntimeError("instance killed"))
+    with pytest.raises(RuntimeError):
+        silver_main.process_pending_batch(mocker.Mock())
+    mocker.stop(killed_rm)
+    batch_outputs = sorted(micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet"))
+
+    # EXECUTE: compactions before and after the re-run of the batch
+    silver_main.process_data_compaction(mocker.Mock())
+    silver_main.process_data_compaction(mocker.Mock())
+    assert sorted(micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet")) == batch_outputs
+    silver_main.process_pending_batch(mocker.Mock())
+    silver_main.process_data_compaction(mocker.Mock())
+
+    # ASSERT: every row compacted exactly once
+    assert compacted_rows() == 6
+
+    # A batch compacted by an older run (no claim check) is not rewritten by its re-run
+    land_bronze(mocker, micro_batch_gcs, 5)
+    killed_rm = mocker.patch.object(micro_batch_gcs, "rm", side_effect=RuntimeError("instance killed"))
+    with pytest.raises(RuntimeError):
+        silver_main.process_pending_batch(mocker.Mock())
+    mocker.stop(killed_rm)
+    batch_outputs = micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/raw_prices_20260114_120500_*.parquet")
+    pending = mocker.patch.object(silver_main, "PENDING_PREFIX", "no-claims")
+    silver_main.process_data_compaction(mocker.Mock())
+    mocker.stop(pending)
+    for path in batch_outputs:
+        micro_batch_gcs.rm(path) # Deleted as the tombstones they are
+
+    silver_main.process_pending_batch(mocker.Mock())
+    assert not micro_batch_gcs.glob("fake-silver-bucket/processed/*/*/*.parquet")
+    assert not micro_batch_gcs.glob("fake-silver-bucket/pending/*.json")
+    assert compacted_rows() == 8
+
+# Test 12
+def test_bronze_hash_markers_are_dropped_first_thing(mocker, capsys):
+    mock_storage = mocker.patch('cloud_functions.silver.main.storage')
+    mock_filesystem = mocker.patch('cloud_functions.silver.main._get_filesystem')
+
+    fake_cloud_event = mocker.Mock()
+    fake_cloud_event.data = {"bucket": "fake-bronze-bucket", "name": "_hashes/" + "0" * 64}
+    process_data_cleaning(fake_cloud_event)
 
-    # Verify logic (DuckDB transformation)
-    assert "coin_id" in df.columns
-    assert "price_usd" in df.columns 
-    assert 50000.0 in df['price_usd'].values
-    assert "bitcoin" in df['coin_id'].values
+    # No client, no object store call, no log line per marker
+    assert not mock_storage.Client.called and not mock_filesystem.called
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,244 @@
+import json
+import pytest
+import pandas as pd
+import duckdb
+
+# Import the module to be tested (local Silver layer)
+from src.pipeline.silver import clean
+
+def write_snapshot(bronze_dir, timestamp, price):
+    file_path = bronze_dir / f"raw_prices_{timestamp}.json"
+    file_path.write_text(json.dumps({
+        "bitcoin": {"usd": price, "usd_24h_vol": 1000.0},
+        "ethereum": {"usd": price / 10, "usd_24h_vol": 500.0}
+    }))
+    return file_path
+
+def read_silver():
+    return duckdb.execute(clean.silver_scan_sql(clean.list_silver_files())).df()
+
+# Test 1
+def test_incremental_run_only_parses_new_files(silver_env, mocker):
+    # SETUP:
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    clean.process_data_cleaning()
+
+    write_snapshot(silver_env, "20260116_095133", 51000.0)
+    parse_spy = mocker.spy(clean, "_parse_bronze_files")
+
+    # EXECUTE:
+    clean.process_data_cleaning()
+
+    # ASSERT:
+    # Only the new snapshot is parsed and appended as one more part per coin partition
+    assert [path.name for path in parse_spy.call_args.args[0]] == ["raw_prices_20260116_095133.json"]
+    assert len(clean.list_silver_files()) == 4
+    assert all(path.parent.name in ("coin_id=bitcoin", "coin_id=ethereum") for path in clean.list_silver_files())
+    assert all(path.parent.parent.name == "date=2026-01-16" for path in clean.list_silver_files())
+
+    df = read_silver()
+    assert len(df) == 4
+    assert set(df["extraction_timestamp"]) == {"20260116_095115", "20260116_095133"}
+
+# Test 2
+def test_no_new_files_is_a_no_op(silver_env, mocker):
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    clean.process_data_cleaning()
+
+    parse_spy = mocker.spy(clean, "_parse_bronze_files")
+    clean.process_data_cleaning()
+
+    assert parse_spy.call_count == 0
+    assert len(clean.list_silver_files()) == 2
+
+# Test 3
+def test_full_rebuild_replaces_all_parts(silver_env):
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    clean.process_data_cleaning()
+    write_snapshot(silver_env, "20260116_095133", 51000.0)
+    clean.process_data_cleaning()
+
+    clean.process_data_cleaning(full_rebuild=True)
+
+    # Both snapshots land in a single fresh part per partition, with no duplicated rows
+    assert len(clean.list_silver_files()) == 2
+    assert len(read_silver()) == 4
+    assert len(list(clean.SILVER_DATASET_DIR.rglob("*.parquet"))) == 2
+
+# Test 4
+def test_compaction_merges_parts_per_partition(silver_env):
+    from src.pipeline.silver import compact
+
+    # SETUP: three incremental runs over two days
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    clean.process_data_cleaning()
+    write_snapshot(silver_env, "20260116_095133", 51000.0)
+    write_snapshot(silver_env, "20260117_080000", 52000.0)
+    clean.process_data_cleaning()
+    before = read_silver().sort_values(["coin_id", "extraction_timestamp"]).reset_index(drop=True)
+
+    # EXECUTE:
+    compact.process_data_compaction()
+    write_snapshot(silver_env, "20260117_090000", 53000.0)
+    clean.process_data_cleaning()
+    compact.process_data_compaction()
+
+    # ASSERT: one file per (date, coin_id), same rows, nothing left on disk outside the manifest
+    parts = clean.load_manifest()["parts"]
+    assert sorted(part.rsplit("/", 1)[0] for part in parts) == [
+        "date=2026-01-16/coin_id=bitcoin", "date=2026-01-16/coin_id=ethereum",
+        "date=2026-01-17/coin_id=bitcoin", "date=2026-01-17/coin_id=ethereum",
+    ]
+    assert sorted(clean.SILVER_DATASET_DIR.rglob("*.parquet")) == sorted(clean.list_silver_files())
+
+    after = read_silver().sort_values(["coin_id", "extraction_timestamp"]).reset_index(drop=True)
+    assert len(after) == 8
+    pd.testing.assert_frame_equal(after[after["extraction_timestamp"] < "20260117_090000"].reset_index(drop=True), before)
+
+# Test 5
+def test_corrupt_files_are_skipped_with_a_warning(silver_env, capsys):
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    (silver_env / "raw_prices_20260116_095120.json").write_text('{"bitcoin": {"usd": 5')
+    (silver_env / "raw_prices_20260116_095125.json").write_text('{"bitcoin": 5}')
+    (silver_env / "raw_prices_20260116_095130.json").write_text('{"solana": {"usd": 150}}')
+
+    clean.process_data_cleaning()
+
+    output = capsys.readouterr().out
+    assert "Skipping corrupt file raw_prices_20260116_095120.json" in output
+    assert "Skipping corrupt file raw_prices_20260116_095125.json" in output
+
+    # Valid files keep the row-per-coin output, missing metrics default to 0
+    df = read_silver().sort_values(["extraction_timestamp", "coin_id"]).reset_index(drop=True)
+    assert df[["coin_id", "price_usd", "volume_24h"]].values.tolist() == [
+        ["bitcoin", 50000.0, 1000.0], ["ethereum", 5000.0, 500.0], ["solana", 150.0, 0.0],
+    ]
+    assert sorted(clean.load_manifest()["bronze_files"]) == [
+        "raw_prices_20260116_095115.json", "raw_prices_20260116_095130.json",
+    ]
+
+# Test 6
+def test_parallel_parsing_matches_serial(silver_env, capsys):
+    for second in range(10):
+        write_snapshot(silver_env, f"20260116_0951{second:02d}", 50000.0 + second)
+    (silver_env / "raw_prices_20260116_095199.json").write_text("not json")
+
+    clean.process_data_cleaning(workers=3)
+    parallel = read_silver().sort_values(["extraction_timestamp", "coin_id"]).reset_index(drop=True)
+    assert "Skipping corrupt file raw_prices_20260116_095199.json" in capsys.readouterr().out
+
+    clean.process_data_cleaning(full_rebuild=True)
+    serial = read_silver().sort_values(["extraction_timestamp", "coin_id"]).reset_index(drop=True)
+
+    assert len(parallel) == 20
+    pd.testing.assert_frame_equal(parallel, serial)
+
+# Test 7
+def test_corrupt_files_are_quarantined_and_can_be_reprocessed(silver_env, mocker):
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    (silver_env / "raw_prices_20260116_095120.json").write_text('{"bitcoin": {"usd": 5')
+    (silver_env / "raw_prices_20260116_095125.json").write_text('{"bitcoin": {"usd": "n/a"}}')
+    clean.process_data_cleaning()
+
+    # Moved out of Bronze and indexed with the reason
+    assert sorted(path.name for path in silver_env.glob("*.json")) == ["raw_prices_20260116_095115.json"]
+    index = clean.load_quarantine_index()["files"]
+    assert index["raw_prices_20260116_095120.json"]["reason"] == "malformed JSON"
+    assert index["raw_prices_20260116_095125.json"]["reason"] == "non-numeric coin metrics"
+
+    # A later run never parses them again, even if a Bronze re-sync brings one back
+    (silver_env / "raw_prices_20260116_095120.json").write_text('{"bitcoin": {"usd": 5')
+    write_snapshot(silver_env, "20260116_095130", 51000.0)
+    parse_spy = mocker.spy(clean, "_parse_bronze_files")
+    clean.process_data_cleaning()
+    assert [path.name for path in parse_spy.call_args.args[0]] == ["raw_prices_20260116_095130.json"]
+
+    # EXECUTE: the file is fixed in quarantine, then reprocessed
+    (clean.QUARANTINE_DIR / "raw_prices_20260116_095125.json").write_text('{"bitcoin": {"usd": 50500, "usd_24h_vol": 1}}')
+    assert clean.reprocess_quarantine(["raw_prices_20260116_095125.json"]) == ["raw_prices_20260116_095125.json"]
+    clean.process_data_cleaning()
+
+    # ASSERT: its rows are in Silver, the other file stays quarantined
+    assert len(read_silver()) == 5
+    assert list(clean.load_quarantine_index()["files"]) == ["raw_prices_20260116_095120.json"]
+
+# Test 8
+def test_identical_snapshots_are_ingested_once(silver_env, mocker):
+    first = write_snapshot(silver_env, "20260116_095115", 50000.0)
+    clean.process_data_cleaning()
+
+    # EXECUTE: the same payload again (a cached API response), twice in one run, plus a new one
+    for timestamp in ["20260116_095130", "20260116_095145"]:
+        (silver_env / f"raw_prices_{timestamp}.json").write_bytes(first.read_bytes())
+    write_snapshot(silver_env, "20260116_095200", 51000.0)
+    parse_spy = mocker.spy(clean, "_parse_bronze_files")
+    clean.process_data_cleaning()
+
+    # ASSERT: the copies are never parsed and add no rows; the manifest points to the original
+    assert [path.name for path in parse_spy.call_args.args[0]] == ["raw_prices_20260116_095200.json"]
+    assert len(read_silver()) == 4
+    ingested = clean.load_manifest()["bronze_files"]
+    assert ingested["raw_prices_20260116_095145.json"]["duplicate_of"] == first.name
+
+    # A full rebuild (a replay of Bronze) makes the same choice
+    clean.process_data_cleaning(full_rebuild=True)
+    assert len(read_silver()) == 4
+    rebuilt = clean.load_manifest()["bronze_files"]
+    assert {name: entry.get("duplicate_of") for name, entry in rebuilt.items()} == {
+        name: entry.get("duplicate_of") for name, entry in ingested.items()
+    }
+
+# Test 9
+def test_files_without_a_snapshot_timestamp_are_quarantined(silver_env):
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    write_snapshot(silver_env, "copy_2", 50500.0)
+    write_snapshot(silver_env, "20260116_095130 (1)", 51000.0)
+
+    # EXECUTE: a stray name must not fail the whole parse
+    clean.process_data_cleaning()
+
+    # ASSERT: the unreadable name is quarantined, a suffixed copy keeps its timestamp
+    index = clean.load_quarantine_index()["files"]
+    assert index["raw_prices_copy_2.json"]["reason"] == "invalid snapshot file name"
+    df = read_silver()
+    assert len(df) == 4
+    assert set(df["extraction_timestamp"]) == {"20260116_095115", "20260116_095130"}
+
+# Test 10
+def test_failed_full_rebuild_leaves_silver_intact(silver_env, mocker):
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    write_snapshot(silver_env, "20260116_095133", 51000.0)
+    clean.process_data_cleaning()
+    before = read_silver()
+
+    # EXECUTE: the rebuild dies after writing its parts, before swapping them in
+    mocker.patch.object(clean, "save_manifest", side_effect=OSError("disk full"))
+    with pytest.raises(OSError):
+        clean.process_data_cleaning(full_rebuild=True)
+    mocker.stopall()
+
+    # ASSERT: the manifest still lists existing parts with the same rows
+    assert all(path.exists() for path in clean.list_silver_files())
+    pd.testing.assert_frame_equal(read_silver(), before)
+
+    # A later rebuild succeeds and leaves nothing but its own parts
+    clean.process_data_cleaning(full_rebuild=True)
+    assert len(read_silver()) == 4
+    assert sorted(clean.SILVER_DATASET_DIR.rglob("*.parquet")) == sorted(clean.list_silver_files())
+    assert not clean.SILVER_STAGING_DIR.exists()
+
+# Test 11
+def test_empty_snapshots_are_parsed_once(silver_env, mocker):
+    write_snapshot(silver_env, "20260116_095115", 50000.0)
+    clean.process_data_cleaning()
+
+    # EXECUTE: an empty payload lands, then two more runs
+    (silver_env / "raw_prices_20260116_095130.json").write_text("{}")
+    clean.process_data_cleaning()
+    parse_spy = mocker.spy(clean, "_parse_bronze_files")
+    clean.process_data_cleaning()
+
+    # ASSERT: recorded with no rows, never parsed again
+    assert clean.load_manifest()["bronze_files"]["raw_prices_20260116_095130.json"]["rows"] == 0
+    assert parse_spy.call_count == 0
+    assert len(read_silver()) == 2
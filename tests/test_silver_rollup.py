@@ -0,0 +1,98 @@
+import json
+import pandas as pd
+import duckdb
+
+# Import the modules to be tested (local Silver layer + bar rollups)
+from src.pipeline.silver import clean, rollup
+
+def read_bars(resolution):
+    return duckdb.execute(f"""
+        SELECT * FROM ({rollup.bars_scan_sql(resolution)}) ORDER BY coin_id, extraction_timestamp
+    """).df()
+
+def expected_bars(freq):
+    # Reference: pandas resample of the Silver snapshots, without each coin's last (open) bar
+    silver = duckdb.execute(clean.silver_scan_sql(clean.list_silver_files())).df()
+    silver["extraction_timestamp"] = pd.to_datetime(silver["extraction_timestamp"], format=rollup.TIMESTAMP_FORMAT)
+    frames = []
+    for coin_id, group in silver.sort_values("extraction_timestamp").groupby("coin_id"):
+        resampled = group.set_index("extraction_timestamp").resample(freq)
+        bars = pd.DataFrame({
+            "open_usd": resampled["price_usd"].first(),
+            "high_usd": resampled["price_usd"].max(),
+            "low_usd": resampled["price_usd"].min(),
+            "price_usd": resampled["price_usd"].last(),
+            "snapshots": resampled["price_usd"].count(),
+        })
+        frames.append(bars[bars["snapshots"] > 0].iloc[:-1].assign(coin_id=coin_id))
+    return pd.concat(frames).reset_index()
+
+# Test 1
+def test_incremental_rollups_match_a_resample_of_silver(rollup_env, write_snapshots):
+    # SETUP: three incremental runs
+    for minutes in [range(0, 50, 7), range(50, 130, 7), range(130, 200, 7)]:
+        write_snapshots(minutes)
+        clean.process_data_cleaning()
+        rollup.process_data_rollup()
+    incremental = {resolution: read_bars(resolution) for resolution in ["1m", "1h"]}
+
+    # ASSERT: same bars as resampling the snapshots, and as a rebuild from scratch
+    for resolution, freq in [("1m", "1min"), ("1h", "1h")]:
+        bars = incremental[resolution]
+        expected = expected_bars(freq)
+        assert bars["extraction_timestamp"].tolist() == expected["extraction_timestamp"].dt.strftime(rollup.TIMESTAMP_FORMAT).tolist()
+        for column in ["open_usd", "high_usd", "low_usd", "price_usd", "snapshots"]:
+            assert bars[column].tolist() == expected[column].tolist()
+
+    rollup.process_data_rollup(full_rebuild=True)
+    for resolution, bars in incremental.items():
+        pd.testing.assert_frame_equal(bars, read_bars(resolution), check_exact=True)
+
+    # Still within one day: nothing is closed at 1d, so Gold would not pick it
+    assert set(rollup.available_resolutions()) == {"1m", "1h"}
+
+# Test 2
+def test_only_touched_period_files_are_rewritten(rollup_env, write_snapshots):
+    write_snapshots(range(0, 130, 7))
+    clean.process_data_cleaning()
+    rollup.process_data_rollup()
+
+    # The next day starts: the 16th gets its last 1m bars, the 17th its first
+    for minute in range(3):
+        (rollup_env / f"raw_prices_20260117_00{minute:02d}00.json").write_text(json.dumps({
+            "bitcoin": {"usd": 51000.0 + minute, "usd_24h_vol": 1000.0},
+            "solana": {"usd": 141.0 + minute, "usd_24h_vol": 500.0}
+        }))
+    clean.process_data_cleaning()
+    rollup.process_data_rollup()
+    day_16_files = {path: path.stat().st_mtime_ns for path in rollup.bars_files("1m") if "period=2026-01-16" in str(path)}
+    assert len(day_16_files) == 2
+
+    # EXECUTE: more snapshots on the 17th
+    (rollup_env / "raw_prices_20260117_001000.json").write_text(json.dumps({
+        "bitcoin": {"usd": 51010.0, "usd_24h_vol": 1000.0},
+        "solana": {"usd": 141.5, "usd_24h_vol": 500.0}
+    }))
+    clean.process_data_cleaning()
+    rollup.process_data_rollup()
+
+    # ASSERT: the files of the 16th were not touched, one file per coin and period
+    assert {path: path.stat().st_mtime_ns for path in day_16_files} == day_16_files
+    assert {path.parent.name for path in rollup.bars_files("1m")} == {"period=2026-01-16", "period=2026-01-17"}
+    assert len(rollup.bars_files("1m")) == 4
+    assert len(read_bars("1m")) == len(expected_bars("1min"))
+
+# Test 3
+def test_late_silver_rows_rebuild_the_rollup(rollup_env, write_snapshots, capsys):
+    write_snapshots(range(60, 200, 7))
+    clean.process_data_cleaning()
+    rollup.process_data_rollup()
+
+    # Snapshots older than the rolled-up bars arrive late
+    write_snapshots(range(0, 60, 7))
+    clean.process_data_cleaning()
+    rollup.process_data_rollup()
+
+    assert "Rebuilding it" in capsys.readouterr().out
+    bars = read_bars("1h")
+    assert bars["snapshots"].tolist() == expected_bars("1h")["snapshots"].tolist()
@@ -0,0 +1,147 @@
+import asyncio
+import time
+import pytest
+
+# Import the module to be tested (streaming ingestion daemon)
+from src.pipeline import stream
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    # The fake fetchers and sinks write no Bronze files: sub-second polls are fine here
+    monkeypatch.setattr(stream, "MIN_POLL_INTERVAL", 0.0)
+
+def counting_fetcher():
+    polls = []
+
+    def fetcher():
+        polls.append(time.monotonic())
+        return {"bitcoin": {"usd": 50000.0 + len(polls), "usd_24h_vol": 1.0}}
+    return fetcher, polls
+
+# Test 1
+def test_snapshots_are_flushed_in_batches_by_size_and_time():
+    fetcher, polls = counting_fetcher()
+    batches = []
+    daemon = stream.StreamingIngestion(
+        poll_interval=0.01, flush_snapshots=5, flush_seconds=10, fetcher=fetcher,
+        sink=lambda batch: batches.append(batch) or len(batch)
+    )
+
+    # EXECUTE: size-triggered flushes, then the shutdown flush of the remainder
+    stats = asyncio.run(daemon.run(duration=0.3))
+
+    # ASSERT: every snapshot reaches the sink exactly once, in poll order
+    flushed = [snapshot["bitcoin"]["usd"] for batch in batches for _, snapshot in batch]
+    assert flushed == [50000.0 + poll for poll in range(1, len(polls) + 1)]
+    assert all(len(batch) >= 5 for batch in batches[:-1])
+    assert stats["flushes"] == len(batches) and not daemon.buffer
+
+    # Few polls, short flush window: the timer flushes without waiting for a full batch
+    batches.clear()
+    daemon = stream.StreamingIngestion(
+        poll_interval=0.05, flush_snapshots=100, flush_seconds=0.1, fetcher=counting_fetcher()[0],
+        sink=lambda batch: batches.append(batch) or len(batch)
+    )
+    asyncio.run(daemon.run(duration=0.5))
+    assert len(batches) >= 3
+
+# Test 2
+def test_slow_downstream_drops_to_the_slow_cadence():
+    fetcher, polls = counting_fetcher()
+    sink_delays = [0.4] # The first flush is slow, the next ones are fast
+
+    def sink(batch):
+        time.sleep(sink_delays.pop() if sink_delays else 0)
+        return len(batch)
+
+    daemon = stream.StreamingIngestion(
+        poll_interval=0.02, flush_snapshots=2, flush_seconds=0.2, max_buffered=5,
+        slow_poll_interval=0.1, fetcher=fetcher, sink=sink
+    )
+
+    stats = asyncio.run(daemon.run(duration=1.2))
+
+    # ASSERT: the buffer filled up during the slow flush, polling slowed down, then recovered
+    gaps = [later - earlier for earlier, later in zip(polls, polls[1:])]
+    assert stats["slowdowns"] >= 1
+    assert max(gaps) >= 0.08
+    assert min(gaps[-5:]) < 0.05
+    assert not daemon.slow
+
+# Test 3
+def test_failed_polls_and_flushes_lose_nothing():
+    calls = []
+
+    def fetcher():
+        calls.append(None)
+        if len(calls) == 2:
+            raise ConnectionError("CoinGecko unreachable")
+        return {"bitcoin": {"usd": float(len(calls)), "usd_24h_vol": 1.0}}
+
+    flushed = []
+    failures = [RuntimeError("Silver failed")]
+
+    def sink(batch):
+        if failures:
+            raise failures.pop()
+        flushed.extend(snapshot["bitcoin"]["usd"] for _, snapshot in batch)
+        return len(batch)
+
+    daemon = stream.StreamingIngestion(poll_interval=0.01, flush_snapshots=3, flush_seconds=10, fetcher=fetcher, sink=sink)
+
+    stats = asyncio.run(daemon.run(duration=0.2))
+
+    # ASSERT: the failed poll is a gap; the failed flush's snapshots are delivered later
+    assert stats["failed_polls"] == 1 and stats["failed_flushes"] == 1
+    assert flushed == [float(call) for call in range(1, len(calls) + 1) if call != 2]
+
+# Test 4
+def test_flushes_update_bronze_silver_and_gold_incrementally(lake_env):
+    from datetime import datetime, timedelta
+    import duckdb
+    from src.pipeline.gold import analyze
+
+    start = datetime(2026, 1, 16, 10, 0, 0)
+    snapshot = lambda second: {"bitcoin": {"usd": 50000.0 + second, "usd_24h_vol": 1.0}}
+
+    # EXECUTE: two flushes of 15-second snapshots; the second batch repeats a cached payload
+    assert stream.flush_to_pipeline([(start + timedelta(seconds=15 * step), snapshot(step)) for step in range(4)]) == 4
+    assert stream.flush_to_pipeline([
+        (start + timedelta(seconds=15 * step), snapshot(min(step, 5))) for step in range(4, 7)
+    ]) == 2
+
+    # ASSERT: sub-minute snapshots in every layer, the repeated payload only once
+    assert len(list(lake_env.glob("raw_prices_*.json"))) == 6
+    gold = duckdb.execute(f"SELECT * FROM read_parquet({[str(path) for path in analyze.list_gold_files()]})").df()
+    assert len(gold) == 6
+
+# Test 5
+def test_poll_interval_below_the_minimum_is_rejected(monkeypatch):
+    monkeypatch.setattr(stream, "MIN_POLL_INTERVAL", 1.0)
+
+    with pytest.raises(ValueError):
+        stream.StreamingIngestion(poll_interval=0.5)
+
+# Test 6
+def test_failing_downstream_backs_off_and_caps_the_buffer():
+    fetcher, polls = counting_fetcher()
+    spilled = []
+
+    def sink(batch):
+        raise RuntimeError("Silver failed")
+
+    daemon = stream.StreamingIngestion(
+        poll_interval=0.01, flush_snapshots=2, flush_seconds=1, max_pending=4, flush_retry_seconds=0.1,
+        fetcher=fetcher, sink=sink, spill=lambda batch: spilled.extend(batch)
+    )
+
+    stats = asyncio.run(daemon.run(duration=0.6))
+
+    # ASSERT: retries 0.1, 0.2, 0.4 s apart (not on every poll), plus the shutdown flush
+    assert 2 <= stats["failed_flushes"] <= 5
+    # Memory stays bounded; the oldest snapshots went to Bronze, none were lost
+    assert len(daemon.buffer) == 4
+    assert [snapshot for _, snapshot in spilled + daemon.buffer] == [
+        {"bitcoin": {"usd": 50000.0 + poll, "usd_24h_vol": 1.0}} for poll in range(1, len(polls) + 1)
+    ]
+    assert stats["spilled"] == len(polls) - 4 and stats["dropped"] == 0